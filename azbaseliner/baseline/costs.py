@@ -0,0 +1,126 @@
+import logging
+from logging import Logger
+
+import numpy as np
+import pandas as pd
+
+from azbaseliner.baseline.inventory import InventoryConstants
+from azbaseliner.pricing.pricer import PricingAPIConstants
+from azbaseliner.pricing.table import PricingTable
+
+
+class FleetCostEngine(object):
+    """Computes the monthly costs of a fleet under each pricing plan over columnar data.
+    An inventory frame (meterId, regionName, quantity, hours) is joined with a price set, each VM gets its cost per plan, its cheapest plan and its
+    savings over paygo, then the VM costs are rolled up per region or any other inventory columns.
+    Paygo is billed for the hours used while reservations and savings plans are commitments billed for the whole month.
+    A missing offer is NaN and is never picked as the best plan, a VM without any offer has no best plan and no savings"""
+
+    logger: Logger = logging.getLogger("FleetCostEngine")
+
+    PLANS: list = PricingTable.PRICE_COLUMNS
+    PLAN_PAYGO: str = "paygo"
+    COST_COLUMNS: list = [f"{plan}Cost" for plan in PLANS]
+    COLUMN_BEST_PLAN: str = "bestPlan"
+    COLUMN_BEST_COST: str = "bestCost"
+    COLUMN_SAVINGS: str = "savings"
+    COLUMN_SAVINGS_RATIO: str = "savingsRatio"
+    COLUMN_VM_COUNT: str = "vmCount"
+    COLUMN_UNPRICED: str = "unpriced"
+    COLUMN_BEST_UNIFORM_PLAN: str = "bestUniformPlan"
+    COLUMN_COMPARABLE_PAYGO_COST: str = "comparablePaygoCost"
+
+    @classmethod
+    def priceFrame(ctx, prices, currencyCode: str = None) -> pd.DataFrame:
+        """returns the (regionName, meterId) indexed price matrix of a PricingTable, a MonthlyPlanPricing iterable or a priced DataFrame.
+        currencyCode selects one currency when the prices hold several, the last price of a duplicated meter wins"""
+        if not isinstance(prices, pd.DataFrame):
+            table: PricingTable = prices if isinstance(prices, PricingTable) else PricingTable.fromRecords(prices)
+            prices = table.toDataFrame()
+        if PricingTable.COLUMN_CURRENCY in prices.columns:
+            currencies: np.ndarray = pd.unique(prices[PricingTable.COLUMN_CURRENCY])
+            if currencyCode is not None:
+                prices = prices[prices[PricingTable.COLUMN_CURRENCY] == currencyCode]
+            elif len(currencies) > 1:
+                raise ValueError(f"prices hold several currencies {list(currencies)}, a currency code must be selected")
+        prices = prices.drop_duplicates(subset=[InventoryConstants.COLUMN_REGION_NAME, InventoryConstants.COLUMN_METER_ID], keep="last")
+        index: pd.MultiIndex = pd.MultiIndex.from_arrays([prices[InventoryConstants.COLUMN_REGION_NAME].astype(str), prices[InventoryConstants.COLUMN_METER_ID].astype(str)])
+        return pd.DataFrame(prices[ctx.PLANS].to_numpy(dtype=np.float64), index=index, columns=ctx.PLANS)
+
+    @classmethod
+    def _joinPrices(ctx, inventory: pd.DataFrame, priceFrame: pd.DataFrame) -> np.ndarray:
+        """returns the price matrix aligned on the inventory rows, a NaN row for the meters missing from the prices"""
+        keys: pd.MultiIndex = pd.MultiIndex.from_arrays([inventory[InventoryConstants.COLUMN_REGION_NAME].astype(str), inventory[InventoryConstants.COLUMN_METER_ID].astype(str)])
+        rows: np.ndarray = priceFrame.index.get_indexer(keys)
+        # -1 marks a missing meter and picks the trailing NaN row
+        matrix: np.ndarray = np.vstack([priceFrame.to_numpy(dtype=np.float64), np.full((1, len(ctx.PLANS)), np.nan)])
+        return matrix[rows]
+
+    @classmethod
+    def _columnOrDefault(ctx, inventory: pd.DataFrame, column: str, default: float) -> np.ndarray:
+        if column not in inventory.columns:
+            return np.full(len(inventory), default, dtype=np.float64)
+        return pd.to_numeric(inventory[column], errors="coerce").fillna(default).to_numpy(dtype=np.float64)
+
+    @classmethod
+    def computeVmCosts(ctx, inventory: pd.DataFrame, prices, currencyCode: str = None) -> pd.DataFrame:
+        """returns the inventory with the monthly cost of each plan, the best plan, its cost and the savings over paygo of every row.
+        quantity defaults to 1 and hours to a full month when the inventory has no such column or leaves them empty, both are returned as floats"""
+        unitPrices: np.ndarray = ctx._joinPrices(inventory, ctx.priceFrame(prices, currencyCode))
+        quantities: np.ndarray = ctx._columnOrDefault(inventory, InventoryConstants.COLUMN_QUANTITY, 1.0)
+        hours: np.ndarray = ctx._columnOrDefault(inventory, InventoryConstants.COLUMN_HOURS, float(PricingAPIConstants.HOURS_IN_MONTH))
+        costs: np.ndarray = unitPrices * quantities[:, np.newaxis]
+        paygoColumn: int = ctx.PLANS.index(ctx.PLAN_PAYGO)
+        costs[:, paygoColumn] *= hours / PricingAPIConstants.HOURS_IN_MONTH
+
+        # NaN aware argmin, missing offers rank last and rows without any offer get no plan
+        priced: np.ndarray = ~np.isnan(costs)
+        anyPriced: np.ndarray = priced.any(axis=1)
+        bestColumns: np.ndarray = np.where(priced, costs, np.inf).argmin(axis=1)
+        bestCosts: np.ndarray = np.where(anyPriced, costs[np.arange(len(costs)), bestColumns], np.nan)
+        bestPlans: pd.Categorical = pd.Categorical.from_codes(np.where(anyPriced, bestColumns, -1), categories=ctx.PLANS)
+
+        result: pd.DataFrame = inventory.copy()
+        result[InventoryConstants.COLUMN_QUANTITY] = quantities
+        result[InventoryConstants.COLUMN_HOURS] = hours
+        for column, values in zip(ctx.COST_COLUMNS, costs.T):
+            result[column] = values
+        result[ctx.COLUMN_BEST_PLAN] = bestPlans
+        result[ctx.COLUMN_BEST_COST] = bestCosts
+        result[ctx.COLUMN_SAVINGS] = costs[:, paygoColumn] - bestCosts
+        unpricedCount: int = int((~anyPriced).sum())
+        if unpricedCount > 0:
+            ctx.logger.warning(f"{unpricedCount} of {len(inventory)} inventory rows have no offer")
+        return result
+
+    @classmethod
+    def rollUp(ctx, vmCosts: pd.DataFrame, by: list = None) -> pd.DataFrame:
+        """sums the VM costs per group, by default per region. Missing offers are skipped, a plan missing for every VM of a group totals NaN.
+        savingsRatio relates the savings to the paygo cost of the VMs having both a paygo price and a best plan, bestUniformPlan is the cheapest
+        plan among those priced for every VM of the group having an offer"""
+        by = by if by is not None else [InventoryConstants.COLUMN_REGION_NAME]
+        columns: list = ctx.COST_COLUMNS + [ctx.COLUMN_BEST_COST, ctx.COLUMN_SAVINGS]
+        frame: pd.DataFrame = vmCosts[by + [InventoryConstants.COLUMN_QUANTITY] + columns].copy()
+        frame[ctx.COLUMN_COMPARABLE_PAYGO_COST] = vmCosts[ctx.COST_COLUMNS[ctx.PLANS.index(ctx.PLAN_PAYGO)]].where(vmCosts[ctx.COLUMN_SAVINGS].notna())
+        frame[ctx.COLUMN_UNPRICED] = vmCosts[ctx.COLUMN_BEST_COST].isna()
+        grouped = frame.groupby(by, sort=False, observed=True)
+        totals: pd.DataFrame = grouped[columns + [ctx.COLUMN_COMPARABLE_PAYGO_COST]].sum(min_count=1)
+        # plans priced for every VM of the group having an offer
+        pricedCounts: np.ndarray = grouped.size().to_numpy() - grouped[ctx.COLUMN_UNPRICED].sum().to_numpy()
+        complete: np.ndarray = grouped[ctx.COST_COLUMNS].count().to_numpy() == pricedCounts[:, np.newaxis]
+        planTotals: np.ndarray = np.where(complete, totals[ctx.COST_COLUMNS].to_numpy(dtype=np.float64), np.inf)
+        hasUniformPlan: np.ndarray = complete.any(axis=1)
+
+        summary: pd.DataFrame = totals[columns].copy()
+        summary.insert(0, ctx.COLUMN_UNPRICED, grouped[ctx.COLUMN_UNPRICED].sum())
+        summary.insert(0, InventoryConstants.COLUMN_QUANTITY, grouped[InventoryConstants.COLUMN_QUANTITY].sum())
+        summary.insert(0, ctx.COLUMN_VM_COUNT, grouped.size())
+        summary[ctx.COLUMN_SAVINGS_RATIO] = totals[ctx.COLUMN_SAVINGS] / totals[ctx.COLUMN_COMPARABLE_PAYGO_COST]
+        summary[ctx.COLUMN_BEST_UNIFORM_PLAN] = pd.Categorical.from_codes(np.where(hasUniformPlan, planTotals.argmin(axis=1), -1), categories=ctx.PLANS)
+        return summary
+
+    @classmethod
+    def totals(ctx, vmCosts: pd.DataFrame) -> pd.Series:
+        """rolls the whole fleet up into a single row"""
+        fleet: pd.DataFrame = vmCosts.assign(fleet="fleet")
+        return ctx.rollUp(fleet, by=["fleet"]).iloc[0]
@@ -0,0 +1,121 @@
+import logging
+from logging import Logger
+from typing import Iterator
+
+import pandas as pd
+
+
+class InventoryConstants(object):
+    """Holds the defaults of inventory files"""
+
+    COLUMN_METER_ID: str = "meterId"
+    COLUMN_REGION_NAME: str = "regionName"
+    # number of instances of a row and monthly hours they run, used by the cost engine
+    COLUMN_QUANTITY: str = "quantity"
+    COLUMN_HOURS: str = "hours"
+    DEFAULT_CHUNK_ROWS: int = 10000
+    EXTENSIONS_CSV: tuple = (".csv", ".csv.gz", ".txt")
+    EXTENSIONS_XLSX: tuple = (".xlsx", ".xlsm")
+
+
+class InventoryReader(object):
+    """Reads a VM/meter inventory from a CSV or XLSX file in chunks of rows, only the meter id and region columns are kept.
+    The region column is optional when a default region is given"""
+
+    logger: Logger = logging.getLogger("InventoryReader")
+
+    def __init__(
+        self,
+        path: str,
+        meterIdColumn: str = InventoryConstants.COLUMN_METER_ID,
+        regionColumn: str = InventoryConstants.COLUMN_REGION_NAME,
+        defaultRegion: str = None,
+        chunkRows: int = InventoryConstants.DEFAULT_CHUNK_ROWS,
+        sheetName: str = None,
+    ) -> None:
+        self.path: str = path
+        self.meterIdColumn: str = meterIdColumn
+        self.regionColumn: str = regionColumn
+        self.defaultRegion: str = defaultRegion
+        self.chunkRows: int = max(1, chunkRows)
+        self.sheetName: str = sheetName
+
+    def _normalize(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """returns the (regionName, meterId) frame of a raw chunk, rows without meter id or region are dropped"""
+        if self.meterIdColumn not in frame.columns:
+            raise ValueError(f"inventory {self.path} has no {self.meterIdColumn} column")
+        if self.regionColumn in frame.columns:
+            regions: pd.Series = frame[self.regionColumn]
+            if self.defaultRegion is not None:
+                regions = regions.fillna(self.defaultRegion)
+        elif self.defaultRegion is not None:
+            regions = pd.Series(self.defaultRegion, index=frame.index)
+        else:
+            raise ValueError(f"inventory {self.path} has no {self.regionColumn} column and no default region is set")
+        normalized: pd.DataFrame = pd.DataFrame(
+            {
+                InventoryConstants.COLUMN_REGION_NAME: regions.astype("string").str.strip(),
+                InventoryConstants.COLUMN_METER_ID: frame[self.meterIdColumn].astype("string").str.strip(),
+            }
+        )
+        return normalized.dropna()
+
+    def _iterCsvChunks(self) -> Iterator[pd.DataFrame]:
+        columns: set = {self.meterIdColumn, self.regionColumn}
+        with pd.read_csv(self.path, chunksize=self.chunkRows, dtype=str, usecols=lambda column: column in columns) as reader:
+            for frame in reader:
+                yield frame
+
+    def _iterXlsxChunks(self) -> Iterator[pd.DataFrame]:
+        # imported here as only xlsx inventories need it
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[self.sheetName] if self.sheetName is not None else workbook.active
+            rows: Iterator = sheet.iter_rows(values_only=True)
+            header: tuple = next(rows, None)
+            if header is None:
+                return
+            header = tuple(str(name) if name is not None else "" for name in header)
+            chunk: list = list()
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) == self.chunkRows:
+                    yield pd.DataFrame.from_records(chunk, columns=header)
+                    chunk = list()
+            if len(chunk) > 0:
+                yield pd.DataFrame.from_records(chunk, columns=header)
+        finally:
+            workbook.close()
+
+    def iterChunks(self) -> Iterator[pd.DataFrame]:
+        """yields (regionName, meterId) frames of at most chunkRows rows, memory stays bound by the chunk size"""
+        lowerPath: str = self.path.lower()
+        if lowerPath.endswith(InventoryConstants.EXTENSIONS_XLSX):
+            frames: Iterator = self._iterXlsxChunks()
+        elif lowerPath.endswith(InventoryConstants.EXTENSIONS_CSV):
+            frames = self._iterCsvChunks()
+        else:
+            raise ValueError(f"unsupported inventory format for {self.path}, expecting one of {InventoryConstants.EXTENSIONS_CSV + InventoryConstants.EXTENSIONS_XLSX}")
+        for frame in frames:
+            yield self._normalize(frame)
+
+
+class MeterDeduplicator(object):
+    """Remembers the (regionName, meterId) pairs already seen, memory grows with the number of distinct meters and not with the inventory rows"""
+
+    def __init__(self) -> None:
+        self.seen: set = set()
+
+    def newPairs(self, frame: pd.DataFrame) -> list:
+        """returns the (regionName, meterId) pairs of a normalized chunk that were never seen before, in row order"""
+        pairs: list = list()
+        for pair in zip(frame[InventoryConstants.COLUMN_REGION_NAME].tolist(), frame[InventoryConstants.COLUMN_METER_ID].tolist()):
+            if pair not in self.seen:
+                self.seen.add(pair)
+                pairs.append(pair)
+        return pairs
+
+    def __len__(self) -> int:
+        return len(self.seen)
@@ -0,0 +1,107 @@
+import logging
+import time
+from dataclasses import dataclass
+from logging import Logger
+
+from azbaseliner.baseline.inventory import InventoryReader, MeterDeduplicator
+from azbaseliner.baseline.writers import PricingWriter
+from azbaseliner.pricing.fanout import PricingFanOut
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+
+
+@dataclass
+class BaselineStats:
+    """Counters of a baseline run"""
+
+    rowsRead: int = 0
+    uniqueMeters: int = 0
+    metersPriced: int = 0
+    recordsWritten: int = 0
+    batches: int = 0
+    elapsedSeconds: float = 0.0
+
+    @property
+    def metersPerSecond(self) -> float:
+        return self.metersPriced / self.elapsedSeconds if self.elapsedSeconds > 0 else 0.0
+
+
+class ProgressReporter(object):
+    """Logs the progress and throughput of a run, at most once every intervalSeconds"""
+
+    logger: Logger = logging.getLogger("ProgressReporter")
+
+    def __init__(self, intervalSeconds: float = 5.0, clock=time.monotonic) -> None:
+        self.intervalSeconds: float = intervalSeconds
+        self.clock = clock
+        self.startedAt: float = clock()
+        self.reportedAt: float = self.startedAt
+
+    def update(self, stats: BaselineStats, force: bool = False) -> None:
+        now: float = self.clock()
+        stats.elapsedSeconds = now - self.startedAt
+        if force or now - self.reportedAt >= self.intervalSeconds:
+            self.reportedAt = now
+            self.logger.info(
+                f"{stats.rowsRead} rows read, {stats.uniqueMeters} unique meters, {stats.metersPriced} priced, {stats.recordsWritten} written"
+                f" in {stats.elapsedSeconds:.1f}s ({stats.metersPerSecond:.0f} meters/s)"
+            )
+
+
+class BaselineRunner(object):
+    """Prices the meters of an inventory and writes their records as it goes.
+    Inventory chunks are deduplicated on (regionName, meterId) and the new meters are priced by batches of batchSize, so memory only grows with
+    the number of distinct meters and not with the inventory size"""
+
+    logger: Logger = logging.getLogger("BaselineRunner")
+
+    DEFAULT_BATCH_SIZE: int = 2000
+
+    def __init__(
+        self,
+        reader: InventoryReader,
+        writer: PricingWriter,
+        currencyCode: str = PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR,
+        workers: int = PricingAPIConstants.DEFAULT_MAX_CONCURRENT_REQUESTS,
+        batchSize: int = DEFAULT_BATCH_SIZE,
+        client=PricingAPIClient,
+        progress: ProgressReporter = None,
+    ) -> None:
+        self.reader: InventoryReader = reader
+        self.writer: PricingWriter = writer
+        self.currencyCode: str = currencyCode
+        self.workers: int = max(1, workers)
+        self.batchSize: int = max(1, batchSize)
+        self.client = client
+        self.progress: ProgressReporter = progress if progress is not None else ProgressReporter()
+
+    def _priceBatch(self, pairs: list, stats: BaselineStats) -> None:
+        """prices a batch of (regionName, meterId) pairs and writes their records, meters unknown to the api are not written"""
+        meterIdsPerRegion: dict = dict()
+        for regionName, meterId in pairs:
+            meterIdsPerRegion.setdefault(regionName, list()).append(meterId)
+        requests: list = [(regionName, self.currencyCode, meterIds) for regionName, meterIds in meterIdsPerRegion.items()]
+        results: dict = PricingFanOut.getOfferMonthlyPrices(requests, maxConcurrency=self.workers, client=self.client)
+        for regionName in meterIdsPerRegion.keys():
+            records: list = results[regionName][self.currencyCode]
+            self.writer.write(records)
+            stats.recordsWritten += len(records)
+        stats.metersPriced += len(pairs)
+        stats.batches += 1
+
+    def run(self) -> BaselineStats:
+        """reads, prices and writes the whole inventory, returns the counters of the run"""
+        stats: BaselineStats = BaselineStats()
+        deduplicator: MeterDeduplicator = MeterDeduplicator()
+        pending: list = list()
+        for frame in self.reader.iterChunks():
+            stats.rowsRead += len(frame)
+            pending.extend(deduplicator.newPairs(frame))
+            stats.uniqueMeters = len(deduplicator)
+            while len(pending) >= self.batchSize:
+                self._priceBatch(pending[: self.batchSize], stats)
+                del pending[: self.batchSize]
+                self.progress.update(stats)
+        if len(pending) > 0:
+            self._priceBatch(pending, stats)
+        self.progress.update(stats, force=True)
+        return stats
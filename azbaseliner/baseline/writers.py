@@ -0,0 +1,108 @@
+import csv
+import logging
+import math
+from dataclasses import astuple, fields
+from logging import Logger
+
+from azbaseliner.pricing.pricer import MonthlyPlanPricing
+
+
+class PricingWriter(object):
+    """Base class of the writers of MonthlyPlanPricing records, records are written batch by batch so nothing is kept in memory once written"""
+
+    logger: Logger = logging.getLogger("PricingWriter")
+
+    COLUMNS: tuple = tuple(field.name for field in fields(MonthlyPlanPricing))
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.recordCount: int = 0
+
+    @classmethod
+    def open(ctx, path: str) -> "PricingWriter":
+        """returns the writer matching the extension of path"""
+        lowerPath: str = path.lower()
+        for extensions, writerClass in ((".csv", CsvPricingWriter), (".parquet", ParquetPricingWriter), ((".xlsx", ".xlsm"), XlsxPricingWriter)):
+            if lowerPath.endswith(extensions):
+                return writerClass(path)
+        raise ValueError(f"unsupported output format for {path}, expecting a .csv, .parquet or .xlsx file")
+
+    def _writeRows(self, rows: list) -> None:
+        raise NotImplementedError()
+
+    def write(self, records: list) -> None:
+        """writes a batch of records"""
+        if len(records) > 0:
+            self._writeRows([astuple(record) for record in records])
+            self.recordCount += len(records)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "PricingWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class CsvPricingWriter(PricingWriter):
+    """Writes records as csv rows, flushed after each batch, missing prices are left empty"""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.COLUMNS)
+
+    def _writeRows(self, rows: list) -> None:
+        self.writer.writerows(tuple("" if isinstance(value, float) and math.isnan(value) else value for value in row) for row in rows)
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class XlsxPricingWriter(PricingWriter):
+    """Writes records in a write only workbook which streams its rows to disk, the file is complete once closed"""
+
+    SHEET_NAME: str = "pricing"
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        # imported here as only xlsx outputs need it
+        import openpyxl
+
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(self.SHEET_NAME)
+        self.sheet.append(self.COLUMNS)
+
+    def _writeRows(self, rows: list) -> None:
+        for row in rows:
+            self.sheet.append(tuple(None if isinstance(value, float) and math.isnan(value) else value for value in row))
+
+    def close(self) -> None:
+        self.workbook.save(self.path)
+
+
+class ParquetPricingWriter(PricingWriter):
+    """Writes each batch as a parquet row group, requires pyarrow"""
+
+    def __init__(self, path: str) -> None:
+        # optional, only imported to write parquet files
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("pyarrow is required to write parquet files")
+        super().__init__(path)
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(name, pyarrow.string() if field.type is str else pyarrow.float64()) for name, field in zip(self.COLUMNS, fields(MonthlyPlanPricing))])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def _writeRows(self, rows: list) -> None:
+        columns: list = [list(column) for column in zip(*rows)]
+        self.writer.write_table(self.pyarrow.Table.from_arrays([self.pyarrow.array(column, type=field.type) for column, field in zip(columns, self.schema)], schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from logging import Logger
+from typing import AsyncIterator
+
+from azbaseliner.pricing.metrics import MetricsConstants, MetricsRegistry
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants, PricingQueryRejectedError, PricingRequestError
+from azbaseliner.pricing.throttling import RequestScheduler
+
+
+@dataclass
+class PageResponse:
+    """Status, headers and body of a page request, read while the connection is held"""
+
+    status_code: int
+    headers: dict
+    content: bytes
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+
+class AsyncPricingAPIClient(object):
+    """asyncio counterpart of PricingAPIClient.getOfferMonthlyPriceForMeterIdList.
+    Filter building, chunk planning, grouping, parsing, cache and catalogs are those of the wrapped client, only the transport is asynchronous.
+    The session is any aiohttp.ClientSession compatible object, an aiohttp session keeping poolSize connections alive is built when none is given.
+    Sessions and semaphores are bound to an event loop, use one client per loop"""
+
+    logger: Logger = logging.getLogger("AsyncPricingAPIClient")
+
+    DEFAULT_MAX_CONCURRENT_REQUESTS: int = 8
+
+    def __init__(
+        self,
+        client=PricingAPIClient,
+        session=None,
+        maxConcurrency: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        poolSize: int = PricingAPIConstants.DEFAULT_CONNECTION_POOL_SIZE,
+        scheduler: RequestScheduler = None,
+    ) -> None:
+        self.client = client
+        self.session = session
+        self._ownsSession: bool = session is None
+        self.poolSize: int = poolSize
+        # number of page requests in flight at the same time, over all chunks
+        self.maxConcurrency: int = max(1, maxConcurrency)
+        self.scheduler: RequestScheduler = scheduler if scheduler is not None else client.scheduler
+        self._semaphore: asyncio.Semaphore = None
+
+    async def __aenter__(self) -> "AsyncPricingAPIClient":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """closes the session when it was built by this client"""
+        if self._ownsSession and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _getSession(self):
+        if self.session is None:
+            # a declared requirement, only imported to build the default session so that a caller given session never loads it
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError("AsyncPricingAPIClient requires aiohttp when no session is given, install the requirements or pass an aiohttp.ClientSession compatible session")
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.poolSize), headers=PricingAPIConstants.API_CALL_HEADERS)
+        return self.session
+
+    def _transportErrors(self) -> tuple:
+        # aiohttp errors can only be raised once aiohttp is loaded, a session of another kind never imports it
+        aiohttp = sys.modules.get("aiohttp")
+        return (asyncio.TimeoutError, OSError) if aiohttp is None else (asyncio.TimeoutError, OSError, aiohttp.ClientError)
+
+    async def _get(self, url: str) -> PageResponse:
+        async with self._getSession().get(url) as response:
+            return PageResponse(response.status, response.headers, await response.read())
+
+    async def _fetchPage(self, url: str) -> dict:
+        """async equivalent of PricingAPIClient._fetchPage, the scheduler timeout bounds each attempt"""
+        self.logger.info(f"invoking pricing api on url {url}")
+        metrics: MetricsRegistry = self.client.metrics
+        async with self._semaphore:
+            start: float = time.perf_counter()
+            response: PageResponse = await self.scheduler.executeAsync(lambda timeout: asyncio.wait_for(self._get(url), timeout), f"rest call on {url}", self._transportErrors())
+        if metrics is not None:
+            # observed rather than timed, timers measure self time per thread and coroutines interleave on the event loop thread
+            metrics.observe(MetricsConstants.REQUEST_SECONDS, time.perf_counter() - start)
+            metrics.observe(MetricsConstants.REQUEST_BYTES, len(response.content))
+            metrics.increment(MetricsConstants.REQUESTS)
+        message = f"rest call on {url} returned status {response.status_code}"
+        if response.status_code in PricingAPIConstants.QUERY_REJECTED_STATUS_CODES:
+            raise PricingQueryRejectedError(url, response.status_code)
+        if not response.ok:
+            raise PricingRequestError(url, response.status_code)
+        self.logger.info(message)
+        with self.client._timer(MetricsConstants.DECODE_SECONDS):
+            return self.client._decodeJson(response.content)
+
+    async def _iterPages(self, url: str) -> AsyncIterator[list]:
+        """yields the items of each page, following the next page links"""
+        metrics: MetricsRegistry = self.client.metrics
+        nextUrl: str = url
+        pageCount: int = 0
+        while nextUrl is not None:
+            data: dict = await self._fetchPage(nextUrl)
+            nextUrl = data[PricingAPIConstants.KEY_NEXT_PAGE_LINK]
+            pageCount += 1
+            if metrics is not None:
+                metrics.observe(MetricsConstants.ITEMS_PER_PAGE, len(data[PricingAPIConstants.KEY_ITEMS]))
+            yield data[PricingAPIConstants.KEY_ITEMS]
+        if metrics is not None:
+            metrics.observe(MetricsConstants.PAGES_PER_QUERY, pageCount)
+
+    async def _fetchRecordsForMeterIdChunk(self, regionName: str, currencyCode: str, meterIds: list) -> dict:
+        """fetches the records of a chunk grouped by meterId, each page is grouped as soon as it arrives"""
+        url: str = f"{self.client._buildQueryUrl(currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={self.client._buildQueryFilter(regionName, meterIds)}"
+        recordsPerMeterId: dict = dict()
+        try:
+            async for pageItems in self._iterPages(url):
+                with self.client._timer(MetricsConstants.GROUP_SECONDS):
+                    self.client._groupRecordsByMeterId(pageItems, recordsPerMeterId, PricingAPIConstants.PRICING_ITEM_FIELDS)
+        except PricingQueryRejectedError as e:
+            if len(meterIds) <= 1:
+                self.logger.error(str(e))
+                return dict()
+            # the query was too large for the server, retry with two halves
+            self.logger.warning(f"{e}, retrying with {len(meterIds) // 2} meter ids per query")
+            half: int = len(meterIds) // 2
+            halves: list = await self._gather(
+                [self._fetchRecordsForMeterIdChunk(regionName, currencyCode, meterIds[:half]), self._fetchRecordsForMeterIdChunk(regionName, currencyCode, meterIds[half:])]
+            )
+            halves[0].update(halves[1])
+            return halves[0]
+        return recordsPerMeterId
+
+    async def _gather(self, coroutines: list) -> list:
+        """runs the coroutines concurrently and returns their results in order, the remaining ones are cancelled as soon as one fails or the caller is cancelled"""
+        tasks: list = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _fetchPricingRecords(self, regionName: str, meterIds: list, currencyCode: str) -> list:
+        listOfMeterIdList: list = self.client._planMeterIdChunks(regionName, currencyCode, meterIds)
+        recordsPerMeterId: dict = dict()
+        for mapRecordsPerMeterId in await self._gather([self._fetchRecordsForMeterIdChunk(regionName, currencyCode, meterIdList) for meterIdList in listOfMeterIdList]):
+            recordsPerMeterId.update(mapRecordsPerMeterId)
+        return self.client._getPricingRecords(regionName, currencyCode, recordsPerMeterId)
+
+    async def _getOfferMonthlyPriceForMeterIdList(self, regionName: str, meterIds: list, currencyCode: str) -> list:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.maxConcurrency)
+        if self.client.cache is None and (regionName, currencyCode) not in self.client.catalogs:
+            return await self._fetchPricingRecords(regionName, meterIds, currencyCode)
+        pricingPerMeterId, missingMeterIds = self.client._lookupLocalRecords(regionName, currencyCode, meterIds)
+        self.logger.info(f"{len(pricingPerMeterId)} meters resolved locally, {len(missingMeterIds)} to be queried")
+        if len(missingMeterIds) > 0:
+            fetchedRecords: list = await self._fetchPricingRecords(regionName, missingMeterIds, currencyCode)
+            self.client._storeLocalRecords(fetchedRecords)
+            pricingPerMeterId.update((record.meterId, record) for record in fetchedRecords)
+        return self.client._orderRecords(meterIds, pricingPerMeterId)
+
+    async def getOfferMonthlyPriceForMeterIdList(
+        self,
+        regionName: str,
+        meterIds: list,
+        currencyCode=PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR,
+        timeout: float = None,
+    ) -> list:
+        """Queries the pricing offers for a list of meter Ids, same results as PricingAPIClient.getOfferMonthlyPriceForMeterIdList.
+        All chunks are fetched concurrently under maxConcurrency, timeout bounds the whole call and raises asyncio.TimeoutError, cancelling the call cancels every pending request
+        """
+        if timeout is not None:
+            return await asyncio.wait_for(self._getOfferMonthlyPriceForMeterIdList(regionName, meterIds, currencyCode), timeout)
+        return await self._getOfferMonthlyPriceForMeterIdList(regionName, meterIds, currencyCode)
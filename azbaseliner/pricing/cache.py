@@ -0,0 +1,321 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from logging import Logger
+
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIConstants
+from azbaseliner.util.collections import ListUtils
+
+
+@dataclass
+class CacheStats:
+    """Holds the usage counters of a price cache"""
+
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+
+    @property
+    def hitRatio(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else float("NaN")
+
+
+class PriceCache(object):
+    """Base class of the price caches, stores MonthlyPlanPricing records keyed on region, currency, meterId and api version"""
+
+    PRICE_FIELDS: list = [f.name for f in fields(MonthlyPlanPricing) if f.type == float]
+
+    def __init__(self, maxSize: int, ttlSeconds: float, clock=time.time) -> None:
+        self.maxSize: int = maxSize
+        self.ttlSeconds: float = ttlSeconds
+        self.clock = clock
+        self.stats: CacheStats = CacheStats()
+        self._lock = threading.RLock()
+        self._syncPoints: dict = dict()
+
+    @classmethod
+    def buildKey(ctx, regionName: str, currencyCode: str, meterId: str) -> tuple:
+        """builds the cache key of a meter id priced in a given region and currency"""
+        return (regionName, currencyCode, meterId, PricingAPIConstants.API_VERSION)
+
+    def _isExpired(self, storedAt: float) -> bool:
+        return self.ttlSeconds is not None and self.clock() - storedAt > self.ttlSeconds
+
+    def _loadEntry(self, key: tuple) -> tuple:
+        """returns the (record, storedAt) entry stored under key or None if absent or expired, without updating the hit/miss counters"""
+        raise NotImplementedError()
+
+    def _store(self, key: tuple, record: MonthlyPlanPricing, storedAt: float = None) -> None:
+        """stores a record, storedAt keeps the age of a record copied from another cache, now when None"""
+        raise NotImplementedError()
+
+    def _load(self, key: tuple) -> MonthlyPlanPricing:
+        entry: tuple = self._loadEntry(key)
+        return None if entry is None else entry[0]
+
+    def _loadEntries(self, regionName: str, currencyCode: str, meterIds: list) -> dict:
+        """returns the valid (record, storedAt) entries of meterIds per meterId, a cache backed by a database overrides it to look them up at once"""
+        entries: dict = dict()
+        for meterId in meterIds:
+            entry: tuple = self._loadEntry(self.buildKey(regionName, currencyCode, meterId))
+            if entry is not None:
+                entries[meterId] = entry
+        return entries
+
+    def _loadMany(self, regionName: str, currencyCode: str, meterIds: list) -> dict:
+        return {meterId: record for meterId, (record, _) in self._loadEntries(regionName, currencyCode, meterIds).items()}
+
+    def _storeMany(self, entries: list) -> None:
+        """stores a list of (key, record, storedAt), a cache backed by a database overrides it to write them in one transaction"""
+        for key, record, storedAt in entries:
+            self._store(key, record, storedAt)
+
+    def get(self, regionName: str, currencyCode: str, meterId: str) -> MonthlyPlanPricing:
+        """returns the cached record for the meter or None if absent or expired"""
+        with self._lock:
+            record: MonthlyPlanPricing = self._load(self.buildKey(regionName, currencyCode, meterId))
+            if record is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+            return record
+
+    def put(self, record: MonthlyPlanPricing) -> None:
+        """stores a record, evicting the least recently used ones when the cache is full"""
+        with self._lock:
+            self._store(self.buildKey(record.regionName, record.currency, record.meterId), record)
+
+    def getMany(self, regionName: str, currencyCode: str, meterIds: list) -> tuple:
+        """looks up a list of meter ids, returns the dict of cached records per meterId and the list of missing meter ids"""
+        uniqueMeterIds: list = list(dict.fromkeys(meterIds))
+        with self._lock:
+            found: dict = self._loadMany(regionName, currencyCode, uniqueMeterIds)
+            self.stats.hits += len(found)
+            self.stats.misses += len(uniqueMeterIds) - len(found)
+        cached: dict = {meterId: found[meterId] for meterId in uniqueMeterIds if meterId in found}
+        missing: list = [meterId for meterId in uniqueMeterIds if meterId not in found]
+        return cached, missing
+
+    def putMany(self, records: list) -> None:
+        with self._lock:
+            self._storeMany([(self.buildKey(record.regionName, record.currency, record.meterId), record, None) for record in records])
+
+    def _loadSyncPoint(self, key: tuple) -> str:
+        return self._syncPoints.get(key)
+
+    def _storeSyncPoint(self, key: tuple, syncPoint: str) -> None:
+        self._syncPoints[key] = syncPoint
+
+    def getSyncPoint(self, regionName: str, currencyCode: str) -> str:
+        """returns the sync point of the last incremental refresh of a region and currency, None if never refreshed"""
+        with self._lock:
+            return self._loadSyncPoint((regionName, currencyCode, PricingAPIConstants.API_VERSION))
+
+    def putSyncPoint(self, regionName: str, currencyCode: str, syncPoint: str) -> None:
+        with self._lock:
+            self._storeSyncPoint((regionName, currencyCode, PricingAPIConstants.API_VERSION), syncPoint)
+
+    def __len__(self) -> int:
+        raise NotImplementedError()
+
+
+class MemoryPriceCache(PriceCache):
+    """In memory LRU price cache"""
+
+    def __init__(self, maxSize: int = 100000, ttlSeconds: float = PricingAPIConstants.DEFAULT_CACHE_TTL_SECONDS, clock=time.time) -> None:
+        super().__init__(maxSize, ttlSeconds, clock)
+        self._entries: OrderedDict = OrderedDict()
+
+    def _loadEntry(self, key: tuple) -> tuple:
+        entry: tuple = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._isExpired(entry[1]):
+            del self._entries[key]
+            self.stats.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: tuple, record: MonthlyPlanPricing, storedAt: float = None) -> None:
+        self._entries[key] = (record, self.clock() if storedAt is None else storedAt)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxSize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqlitePriceCache(PriceCache):
+    """Persistent price cache backed by a sqlite database file, evicts the least recently accessed records"""
+
+    logger: Logger = logging.getLogger("SqlitePriceCache")
+
+    # meter ids per IN (...) clause, below the 999 parameters limit of older sqlite builds
+    MAX_QUERY_METER_IDS: int = 500
+
+    def __init__(self, path: str, maxSize: int = 1000000, ttlSeconds: float = PricingAPIConstants.DEFAULT_CACHE_TTL_SECONDS, clock=time.time) -> None:
+        super().__init__(maxSize, ttlSeconds, clock)
+        self.path: str = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        columns: str = ", ".join(f"{name} REAL" for name in self.PRICE_FIELDS)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS prices (regionName TEXT, currency TEXT, meterId TEXT, apiVersion TEXT, {columns}, storedAt REAL, accessedAt REAL, "
+            "PRIMARY KEY (regionName, currency, meterId, apiVersion))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS prices_accessed ON prices (accessedAt)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS syncPoints (regionName TEXT, currency TEXT, apiVersion TEXT, syncPoint TEXT, PRIMARY KEY (regionName, currency, apiVersion))")
+        self._connection.commit()
+        # running row count, kept up to date by the inserts, expirations and evictions of this instance
+        self._rowCount: int = self._connection.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+
+    def _loadEntry(self, key: tuple) -> tuple:
+        row = self._connection.execute(f"SELECT {', '.join(self.PRICE_FIELDS)}, storedAt FROM prices WHERE regionName=? AND currency=? AND meterId=? AND apiVersion=?", key).fetchone()
+        if row is None:
+            return None
+        if self._isExpired(row[-1]):
+            self._connection.execute("DELETE FROM prices WHERE regionName=? AND currency=? AND meterId=? AND apiVersion=?", key)
+            self._connection.commit()
+            self._rowCount -= 1
+            self.stats.expirations += 1
+            return None
+        self._connection.execute("UPDATE prices SET accessedAt=? WHERE regionName=? AND currency=? AND meterId=? AND apiVersion=?", (self.clock(), *key))
+        self._connection.commit()
+        # sqlite stores NaN as NULL
+        prices: dict = {name: float("NaN") if value is None else value for name, value in zip(self.PRICE_FIELDS, row[:-1])}
+        return MonthlyPlanPricing(meterId=key[2], regionName=key[0], currency=key[1], **prices), row[-1]
+
+    def _store(self, key: tuple, record: MonthlyPlanPricing, storedAt: float = None) -> None:
+        self._storeMany([(key, record, storedAt)])
+
+    def _meterIdClause(self, meterIds: list) -> str:
+        return f"meterId IN ({', '.join('?' * len(meterIds))})"
+
+    def _loadEntries(self, regionName: str, currencyCode: str, meterIds: list) -> dict:
+        """looks the meter ids up by IN (...) batches, expired rows are deleted and the access time of the hits updated, all in one transaction"""
+        entries: dict = dict()
+        expiredMeterIds: list = list()
+        scope: tuple = (regionName, currencyCode, PricingAPIConstants.API_VERSION)
+        for chunk in ListUtils.iterChunks(meterIds, self.MAX_QUERY_METER_IDS):
+            rows: list = self._connection.execute(
+                f"SELECT meterId, {', '.join(self.PRICE_FIELDS)}, storedAt FROM prices WHERE regionName=? AND currency=? AND apiVersion=? AND {self._meterIdClause(chunk)}",
+                (*scope, *chunk),
+            ).fetchall()
+            for row in rows:
+                if self._isExpired(row[-1]):
+                    expiredMeterIds.append(row[0])
+                    continue
+                # sqlite stores NaN as NULL
+                prices: dict = {name: float("NaN") if value is None else value for name, value in zip(self.PRICE_FIELDS, row[1:-1])}
+                entries[row[0]] = (MonthlyPlanPricing(meterId=row[0], regionName=regionName, currency=currencyCode, **prices), row[-1])
+        if len(expiredMeterIds) == 0 and len(entries) == 0:
+            return entries
+        for chunk in ListUtils.iterChunks(expiredMeterIds, self.MAX_QUERY_METER_IDS):
+            self._connection.execute(f"DELETE FROM prices WHERE regionName=? AND currency=? AND apiVersion=? AND {self._meterIdClause(chunk)}", (*scope, *chunk))
+        self._rowCount -= len(expiredMeterIds)
+        self.stats.expirations += len(expiredMeterIds)
+        now: float = self.clock()
+        for chunk in ListUtils.iterChunks(entries.keys(), self.MAX_QUERY_METER_IDS):
+            self._connection.execute(f"UPDATE prices SET accessedAt=? WHERE regionName=? AND currency=? AND apiVersion=? AND {self._meterIdClause(chunk)}", (now, *scope, *chunk))
+        self._connection.commit()
+        return entries
+
+    def _countExistingKeys(self, keys: list) -> int:
+        """counts the keys already stored, grouped by region, currency and api version to look them up by IN (...) batches"""
+        meterIdsPerScope: dict = dict()
+        for regionName, currencyCode, meterId, apiVersion in keys:
+            meterIdsPerScope.setdefault((regionName, currencyCode, apiVersion), list()).append(meterId)
+        count: int = 0
+        for scope, meterIds in meterIdsPerScope.items():
+            for chunk in ListUtils.iterChunks(meterIds, self.MAX_QUERY_METER_IDS):
+                count += self._connection.execute(
+                    f"SELECT COUNT(*) FROM prices WHERE regionName=? AND currency=? AND apiVersion=? AND {self._meterIdClause(chunk)}", (*scope, *chunk)
+                ).fetchone()[0]
+        return count
+
+    def _storeMany(self, entries: list) -> None:
+        """writes the records with executemany and evicts the overflow in a single transaction"""
+        # the last record of a key wins, as with successive puts
+        entriesPerKey: dict = {key: (record, storedAt) for key, record, storedAt in entries}
+        if len(entriesPerKey) == 0:
+            return
+        now: float = self.clock()
+        newRows: int = len(entriesPerKey) - self._countExistingKeys(list(entriesPerKey.keys()))
+        rows: list = [
+            (*key, *[None if math.isnan(getattr(record, name)) else getattr(record, name) for name in self.PRICE_FIELDS], now if storedAt is None else storedAt, now)
+            for key, (record, storedAt) in entriesPerKey.items()
+        ]
+        self._connection.executemany(f"INSERT OR REPLACE INTO prices VALUES ({', '.join('?' * len(rows[0]))})", rows)
+        self._rowCount += newRows
+        overflow: int = self._rowCount - self.maxSize
+        if overflow > 0:
+            self._connection.execute("DELETE FROM prices WHERE rowid IN (SELECT rowid FROM prices ORDER BY accessedAt LIMIT ?)", (overflow,))
+            self._rowCount -= overflow
+            self.stats.evictions += overflow
+        self._connection.commit()
+
+    def _loadSyncPoint(self, key: tuple) -> str:
+        row = self._connection.execute("SELECT syncPoint FROM syncPoints WHERE regionName=? AND currency=? AND apiVersion=?", key).fetchone()
+        return None if row is None else row[0]
+
+    def _storeSyncPoint(self, key: tuple, syncPoint: str) -> None:
+        self._connection.execute("INSERT OR REPLACE INTO syncPoints VALUES (?, ?, ?, ?)", (*key, syncPoint))
+        self._connection.commit()
+
+    def __len__(self) -> int:
+        return self._rowCount
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class TieredPriceCache(PriceCache):
+    """Chains an in memory cache in front of a persistent one, records found in the persistent cache are promoted to memory.
+    Promoted records keep the time they were stored at, so they expire from memory no later than from the persistent cache"""
+
+    def __init__(self, memoryCache: PriceCache, persistentCache: PriceCache) -> None:
+        super().__init__(persistentCache.maxSize, persistentCache.ttlSeconds, persistentCache.clock)
+        self.memoryCache: PriceCache = memoryCache
+        self.persistentCache: PriceCache = persistentCache
+
+    def _loadEntry(self, key: tuple) -> tuple:
+        entry: tuple = self.memoryCache._loadEntry(key)
+        if entry is None:
+            entry = self.persistentCache._loadEntry(key)
+            if entry is not None:
+                self.memoryCache._store(key, *entry)
+        return entry
+
+    def _store(self, key: tuple, record: MonthlyPlanPricing, storedAt: float = None) -> None:
+        self.memoryCache._store(key, record, storedAt)
+        self.persistentCache._store(key, record, storedAt)
+
+    def _loadEntries(self, regionName: str, currencyCode: str, meterIds: list) -> dict:
+        entries: dict = self.memoryCache._loadEntries(regionName, currencyCode, meterIds)
+        missingMeterIds: list = [meterId for meterId in meterIds if meterId not in entries]
+        if len(missingMeterIds) > 0:
+            promoted: dict = self.persistentCache._loadEntries(regionName, currencyCode, missingMeterIds)
+            self.memoryCache._storeMany([(self.buildKey(regionName, currencyCode, meterId), record, storedAt) for meterId, (record, storedAt) in promoted.items()])
+            entries.update(promoted)
+        return entries
+
+    def _storeMany(self, entries: list) -> None:
+        self.memoryCache._storeMany(entries)
+        self.persistentCache._storeMany(entries)
+
+    def _loadSyncPoint(self, key: tuple) -> str:
+        return self.persistentCache._loadSyncPoint(key)
+
+    def _storeSyncPoint(self, key: tuple, syncPoint: str) -> None:
+        self.persistentCache._storeSyncPoint(key, syncPoint)
+
+    def __len__(self) -> int:
+        return len(self.persistentCache)
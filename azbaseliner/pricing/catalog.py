@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+from datetime import datetime
+from logging import Logger
+
+import numpy as np
+
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.vectorized import BatchPricingEngine
+
+
+class PriceCatalog(object):
+    """Columnar snapshot of the monthly plan pricing of every meter of a region and currency, meters are kept sorted and binary searched"""
+
+    logger: Logger = logging.getLogger("PriceCatalog")
+
+    PRICE_COLUMNS: list = BatchPricingEngine.PRICE_COLUMNS
+    FILE_METADATA: str = "catalog.json"
+    FILE_METER_IDS: str = "meterIds.npy"
+    FILE_PRICES: str = "prices.npy"
+
+    def __init__(self, regionName: str, currencyCode: str, meterIds: np.ndarray, prices: np.ndarray, apiVersion: str = PricingAPIConstants.API_VERSION, isSorted: bool = False) -> None:
+        self.regionName: str = regionName
+        self.currencyCode: str = currencyCode
+        self.apiVersion: str = apiVersion
+        if not isSorted:
+            order: np.ndarray = np.argsort(meterIds, kind="stable")
+            meterIds, prices = meterIds[order], prices[order]
+        # sorted fixed width byte strings so that the array can be memory mapped and binary searched in place
+        self.meterIds: np.ndarray = meterIds
+        # one row per meter in the order of meterIds, one column per PRICE_COLUMNS entry
+        self.prices: np.ndarray = prices
+
+    @classmethod
+    def fromRecords(ctx, regionName: str, currencyCode: str, records: list) -> "PriceCatalog":
+        """builds a catalog from a list of MonthlyPlanPricing records"""
+        meterIds: np.ndarray = np.array([record.meterId.encode("ascii") for record in records], dtype=np.bytes_)
+        prices: np.ndarray = np.array([[getattr(record, column) for column in ctx.PRICE_COLUMNS] for record in records], dtype=np.float64).reshape(len(records), len(ctx.PRICE_COLUMNS))
+        return PriceCatalog(regionName, currencyCode, meterIds, prices)
+
+    @classmethod
+    def fromFrame(ctx, regionName: str, currencyCode: str, pricingFrame) -> "PriceCatalog":
+        """builds a catalog from a BatchPricingEngine pricing frame indexed by meterId"""
+        meterIds: np.ndarray = pricingFrame.index.to_numpy().astype(np.bytes_)
+        prices: np.ndarray = np.ascontiguousarray(pricingFrame[ctx.PRICE_COLUMNS].to_numpy(dtype=np.float64))
+        return PriceCatalog(regionName, currencyCode, meterIds, prices)
+
+    @classmethod
+    def download(ctx, regionName: str, currencyCode: str, client=PricingAPIClient) -> "PriceCatalog":
+        """pages through the whole compute service family of a region once and builds the catalog from it"""
+        oodFilter: str = f"{PricingAPIConstants.QUERY_PARAM_REGION} eq '{regionName}' and {PricingAPIConstants.KEY_SERVICE_FAMILY} eq '{PricingAPIConstants.VALUE_COMPUTE}'"
+        url: str = f"{client._buildQueryUrl(currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={oodFilter}"
+        catalog: PriceCatalog = ctx.fromFrame(regionName, currencyCode, BatchPricingEngine.computeFrame(client._iterItems(url)))
+        ctx.logger.info(f"downloaded {len(catalog)} meters for region {regionName} in {currencyCode}")
+        return catalog
+
+    def save(self, path: str) -> None:
+        """writes the catalog as a directory of numpy arrays plus a json metadata file"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, self.FILE_METER_IDS), self.meterIds)
+        np.save(os.path.join(path, self.FILE_PRICES), self.prices)
+        metadata: dict = {
+            "regionName": self.regionName,
+            "currencyCode": self.currencyCode,
+            "apiVersion": self.apiVersion,
+            "columns": self.PRICE_COLUMNS,
+            "meterCount": len(self),
+            "sortedMeterIds": True,
+            "createdAt": datetime.now().isoformat(),
+        }
+        with open(os.path.join(path, self.FILE_METADATA), "w") as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def load(ctx, path: str, mmap: bool = True) -> "PriceCatalog":
+        """loads a saved catalog, arrays are memory mapped read only by default so that several processes share the same pages.
+        Catalogs saved before meter ids were sorted are sorted in memory once loaded"""
+        with open(os.path.join(path, ctx.FILE_METADATA)) as f:
+            metadata: dict = json.load(f)
+        if metadata["columns"] != ctx.PRICE_COLUMNS:
+            raise ValueError(f"catalog {path} has columns {metadata['columns']}, expecting {ctx.PRICE_COLUMNS}")
+        mmapMode: str = "r" if mmap else None
+        meterIds: np.ndarray = np.load(os.path.join(path, ctx.FILE_METER_IDS), mmap_mode=mmapMode)
+        prices: np.ndarray = np.load(os.path.join(path, ctx.FILE_PRICES), mmap_mode=mmapMode)
+        return PriceCatalog(metadata["regionName"], metadata["currencyCode"], meterIds, prices, metadata["apiVersion"], isSorted=metadata.get("sortedMeterIds", False))
+
+    def _findRows(self, meterIds: list) -> np.ndarray:
+        """binary searches the meter ids in the sorted meterIds array, returns their rows, -1 for the meters absent from the catalog"""
+        keys: np.ndarray = np.array([meterId.encode("utf-8") for meterId in meterIds], dtype=np.bytes_)
+        if len(self.meterIds) == 0:
+            return np.full(len(keys), -1, dtype=np.intp)
+        rows: np.ndarray = np.minimum(np.searchsorted(self.meterIds, keys), len(self.meterIds) - 1)
+        return np.where(self.meterIds[rows] == keys, rows, -1)
+
+    def __len__(self) -> int:
+        return len(self.meterIds)
+
+    def __contains__(self, meterId: str) -> bool:
+        return self._findRows([meterId])[0] >= 0
+
+    def get(self, meterId: str) -> MonthlyPlanPricing:
+        """returns the pricing record of a meter or None if the meter is not part of the catalog"""
+        found, _ = self.getMany([meterId])
+        return found.get(meterId)
+
+    def getMany(self, meterIds: list) -> tuple:
+        """looks up a list of meter ids, returns the dict of found records per meterId and the list of meter ids absent from the catalog"""
+        uniqueMeterIds: list = list(dict.fromkeys(meterIds))
+        rows: np.ndarray = self._findRows(uniqueMeterIds)
+        isFound: np.ndarray = rows >= 0
+        foundMeterIds: list = [meterId for meterId, hit in zip(uniqueMeterIds, isFound.tolist()) if hit]
+        found: dict = dict()
+        for meterId, prices in zip(foundMeterIds, self.prices[rows[isFound]].tolist()):
+            found[meterId] = MonthlyPlanPricing(meterId=meterId, regionName=self.regionName, currency=self.currencyCode, **dict(zip(self.PRICE_COLUMNS, prices)))
+        missing: list = [meterId for meterId, hit in zip(uniqueMeterIds, isFound.tolist()) if not hit]
+        return found, missing
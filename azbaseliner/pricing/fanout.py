@@ -0,0 +1,58 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.throttling import RequestScheduler
+
+
+class PricingFanOut(object):
+    """Prices meter ids over several regions and currencies at once, identical sub requests are deduplicated and all chunks share one worker pool"""
+
+    logger: Logger = logging.getLogger("PricingFanOut")
+
+    @classmethod
+    def dedupRequests(ctx, requests: list) -> dict:
+        """merges (regionName, currencyCode, meterIds) requests into one ordered, duplicate free meter id list per (regionName, currencyCode)"""
+        meterIdsPerPair: dict = dict()
+        for regionName, currencyCode, meterIds in requests:
+            meterIdsPerPair.setdefault((regionName, currencyCode), dict()).update(dict.fromkeys(meterIds))
+        return {pair: list(meterIds) for pair, meterIds in meterIdsPerPair.items()}
+
+    @classmethod
+    def getOfferMonthlyPrices(
+        ctx,
+        requests: list,
+        maxConcurrency: int = PricingAPIConstants.DEFAULT_MAX_CONCURRENT_REQUESTS,
+        maxRequestsPerSecond: float = None,
+        client=PricingAPIClient,
+    ) -> dict:
+        """Queries the pricing offers for a list of (regionName, currencyCode, meterIds) requests.
+        maxRequestsPerSecond, when given, rate limits every page request of the call, next pages included, on a scheduler of its own, the client one is left as is.
+        Returns the MonthlyPlanPricing records indexed by region then currency, i.e result[regionName][currencyCode] is a list of records"""
+        meterIdsPerPair: dict = ctx.dedupRequests(requests)
+        pricingPerPair: dict = dict()
+        tasks: list = list()
+        for (regionName, currencyCode), meterIds in meterIdsPerPair.items():
+            pricingPerMeterId, missingMeterIds = client._lookupLocalRecords(regionName, currencyCode, meterIds)
+            pricingPerPair[(regionName, currencyCode)] = pricingPerMeterId
+            for meterIdList in client._planMeterIdChunks(regionName, currencyCode, missingMeterIds):
+                tasks.append((regionName, currencyCode, meterIdList))
+        ctx.logger.info(f"{len(requests)} requests deduplicated into {len(meterIdsPerPair)} region/currency pairs and {len(tasks)} chunk queries")
+
+        scheduler: RequestScheduler = client.scheduler.withRate(maxRequestsPerSecond) if maxRequestsPerSecond is not None else None
+        with ThreadPoolExecutor(max_workers=max(1, min(maxConcurrency, len(tasks))), thread_name_prefix="PricingFanOut") as executor:
+            chunkResults: list = list(executor.map(lambda task: client._fetchRecordsForMeterIdChunk(*task, scheduler=scheduler), tasks))
+
+        recordsPerPair: dict = dict()
+        for (regionName, currencyCode, _), mapRecordsPerMeterId in zip(tasks, chunkResults):
+            recordsPerPair.setdefault((regionName, currencyCode), dict()).update(mapRecordsPerMeterId)
+        for (regionName, currencyCode), recordsPerMeterId in recordsPerPair.items():
+            fetchedRecords: list = client._getPricingRecords(regionName, currencyCode, recordsPerMeterId)
+            client._storeLocalRecords(fetchedRecords)
+            pricingPerPair[(regionName, currencyCode)].update((record.meterId, record) for record in fetchedRecords)
+
+        results: dict = dict()
+        for (regionName, currencyCode), meterIds in meterIdsPerPair.items():
+            results.setdefault(regionName, dict())[currencyCode] = client._orderRecords(meterIds, pricingPerPair[(regionName, currencyCode)])
+        return results
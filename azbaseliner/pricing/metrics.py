@@ -0,0 +1,191 @@
+import io
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from logging import Logger
+from typing import TYPE_CHECKING, Callable, Iterator
+
+if TYPE_CHECKING:
+    # the profilers are imported when a CallProfiler samples its first call
+    import pstats
+
+
+class MetricsConstants(object):
+    """Names of the metrics recorded by PricingAPIClient"""
+
+    REQUESTS: str = "pricing.requests"
+    REQUEST_SECONDS: str = "pricing.request.seconds"
+    REQUEST_BYTES: str = "pricing.request.bytes"
+    DECODE_SECONDS: str = "pricing.decode.seconds"
+    PAGES_PER_QUERY: str = "pricing.query.pages"
+    ITEMS_PER_PAGE: str = "pricing.page.items"
+    GROUP_SECONDS: str = "pricing.group.seconds"
+    PARSE_SECONDS: str = "pricing.parse.seconds"
+    PARSED_METERS: str = "pricing.parse.meters"
+
+
+class Histogram(object):
+    """Running count, sum, min and max of observed values, plus a bounded uniform sample for percentiles"""
+
+    MAX_SAMPLES: int = 10000
+
+    def __init__(self, rnd: random.Random = None) -> None:
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+        self.samples: list = list()
+        self.rnd: random.Random = rnd if rnd is not None else random.Random(0)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        # reservoir sampling keeps memory flat on long runs
+        if len(self.samples) < self.MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot: int = self.rnd.randrange(self.count)
+            if slot < self.MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def percentile(self, percent: float) -> float:
+        if len(self.samples) == 0:
+            return math.nan
+        ordered: list = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count > 0 else math.nan,
+            "max": self.max if self.count > 0 else math.nan,
+            "mean": self.total / self.count if self.count > 0 else math.nan,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricsRegistry(object):
+    """Thread safe registry of counters and histograms, subscribers are called with (name, value) on every record.
+    Timers record their self time: time spent in timers nested in the same thread is subtracted"""
+
+    logger: Logger = logging.getLogger("MetricsRegistry")
+
+    def __init__(self) -> None:
+        self.counters: dict = dict()
+        self.histograms: dict = dict()
+        self.subscribers: list = list()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def subscribe(self, callback: Callable) -> None:
+        """registers a callback(name, value) invoked after each counter increment or observation"""
+        self.subscribers = self.subscribers + [callback]
+
+    def _notify(self, name: str, value: float) -> None:
+        for callback in self.subscribers:
+            callback(name, value)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self._notify(name, value)
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram: Histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+        self._notify(name, value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """observes the self time of the enclosed block in seconds"""
+        stack: list = self._local.__dict__.setdefault("stack", list())
+        stack.append(0.0)
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed: float = time.perf_counter() - start
+            nested: float = stack.pop()
+            if len(stack) > 0:
+                stack[-1] += elapsed
+            self.observe(name, elapsed - nested)
+
+    def snapshot(self) -> dict:
+        """returns the counters and the histogram summaries"""
+        with self._lock:
+            return {"counters": dict(self.counters), "histograms": {name: histogram.summary() for name, histogram in self.histograms.items()}}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters = dict()
+            self.histograms = dict()
+
+    def report(self) -> str:
+        """formats the snapshot as one line per metric"""
+        snapshot: dict = self.snapshot()
+        lines: list = [f"{name} = {value}" for name, value in sorted(snapshot["counters"].items())]
+        for name, summary in sorted(snapshot["histograms"].items()):
+            lines.append(f"{name} count={summary['count']} total={summary['total']:.6g} mean={summary['mean']:.6g} p50={summary['p50']:.6g} p99={summary['p99']:.6g} max={summary['max']:.6g}")
+        return "\n".join(lines)
+
+
+class CallProfiler(object):
+    """Runs one call out of every `every` calls under cProfile and accumulates the statistics of the sampled calls.
+    cProfile only sees the calling thread, and a call is not sampled while another one is being profiled"""
+
+    logger: Logger = logging.getLogger("CallProfiler")
+
+    def __init__(self, every: int = 1, outputPath: str = None) -> None:
+        self.every: int = max(1, every)
+        # the accumulated statistics are dumped there after each sampled call when set
+        self.outputPath: str = outputPath
+        self.calls: int = 0
+        self.stats: "pstats.Stats" = None
+        self._active: bool = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def sample(self) -> Iterator[None]:
+        with self._lock:
+            self.calls += 1
+            sampled: bool = not self._active and (self.calls - 1) % self.every == 0
+            self._active = self._active or sampled
+        if not sampled:
+            yield
+            return
+        import cProfile
+        import pstats
+
+        profiler: cProfile.Profile = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._active = False
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                else:
+                    self.stats.add(profiler)
+                if self.outputPath is not None:
+                    self.stats.dump_stats(self.outputPath)
+
+    def report(self, sortBy: str = "cumulative", limit: int = 30) -> str:
+        """formats the top entries of the accumulated statistics"""
+        if self.stats is None:
+            return ""
+        output: io.StringIO = io.StringIO()
+        self.stats.stream = output
+        self.stats.sort_stats(sortBy).print_stats(limit)
+        return output.getvalue()
@@ -2,11 +2,19 @@ import logging
 from logging import Logger
 from dataclasses import dataclass
 from azbaseliner.util.collections import ListUtils
-import requests
+from azbaseliner.pricing.throttling import RequestScheduler
+from azbaseliner.pricing.metrics import CallProfiler, MetricsConstants, MetricsRegistry
 import os
+import threading
 import json
 import math
+from contextlib import nullcontext
 from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    # requests is imported on first use, parsing and locally resolved prices never load the http stack
+    import requests
 
 
 @dataclass
@@ -23,12 +31,30 @@ class MonthlyPlanPricing:
     paygo: float = float("NaN")
 
 
+class PricingRequestError(Exception):
+    """Raised when a page request fails with a status that is not retried, the meters of the query would otherwise be silently missing"""
+
+    def __init__(self, url: str, statusCode: int, reason: str = "failed") -> None:
+        super().__init__(f"rest call on {url} {reason} with status {statusCode}")
+        self.url: str = url
+        self.statusCode: int = statusCode
+
+
+class PricingQueryRejectedError(PricingRequestError):
+    """Raised when the pricing api rejects a query, typically because its filter is too large"""
+
+    def __init__(self, url: str, statusCode: int) -> None:
+        super().__init__(url, statusCode, "was rejected")
+
+
 class PricingAPIConstants(object):
     """'Holds constants for usage of the pricing API"""
 
     API_ENDPOINT: str = "https://prices.azure.com/api/retail/prices"
     API_VERSION: str = "api-version=2023-01-01-preview"
     API_CALL_HEADERS: dict = {"Content-Type": "application/json"}
+    HEADER_ACCEPT_ENCODING: str = "Accept-Encoding"
+    HEADER_CONNECTION: str = "Connection"
 
     KEY_TERM: str = "term"
     VALUE_TERM_3YEARS: str = "3 Years"
@@ -45,37 +71,144 @@ class PricingAPIConstants(object):
     KEY_TYPE: str = "type"
     KEY_CONSUMPTION: str = "Consumption"
     KEY_SERVICE_FAMILY: str = "serviceFamily"
+    KEY_EFFECTIVE_START_DATE: str = "effectiveStartDate"
+    # item fields read when pricing a meter, the others are dropped while grouping
+    PRICING_ITEM_FIELDS: tuple = (KEY_METER_ID, KEY_SERVICE_FAMILY, KEY_TYPE, KEY_RETAIL_PRICE, KEY_UNIT_PRICE, KEY_RESERVATION_TERM, KEY_TERM, KEY_SAVINGS_PLAN)
 
     QUERY_PARAM_CURRENCY_CODE: str = "currencyCode"
     QUERY_PARAM_CURRENCY_VALUE_EUR: str = "EUR"
     QUERY_PARAM_CURRENCY_VALUE_USD: str = "USD"
     QUERY_FILTER: str = "$filter"
+    QUERY_FILTER_SEPARATOR: str = " or "
     QUERY_PARAM_REGION: str = "armRegionName"
     QUERY_PARAM_CURRENCY_CODE: str = "currencyCode"
 
     HOURS_IN_MONTH: int = 730
+    # fixed chunk size, only used when the query url budget is disabled
     MAX_METER_IDS_PER_REQUEST: int = 20
+    # max length of a query url once percent encoded, meter ids are packed in each request up to this budget
+    MAX_QUERY_URL_BYTES: int = 2048
+    # part of the budget kept for the paging parameters the api appends to the next page links
+    QUERY_URL_PAGING_HEADROOM_BYTES: int = 32
+    # status codes returned when the query url or filter is too large to be processed
+    QUERY_REJECTED_STATUS_CODES: tuple = (400, 413, 414, 431)
+    DEFAULT_MAX_CONCURRENT_REQUESTS: int = 1
+    DEFAULT_CACHE_TTL_SECONDS: int = 24 * 3600
+    DEFAULT_CONNECTION_POOL_SIZE: int = 16
 
 
 class PricingAPIClient(object):
     """Handles the pricing lookup via the Azure pricing API"""
 
     logger: Logger = logging.getLogger("PricingAPIClient")
+    # optional azbaseliner.pricing.cache.PriceCache consulted before calling the api
+    cache = None
+    # azbaseliner.pricing.catalog.PriceCatalog snapshots per (regionName, currencyCode), resolved without network calls
+    catalogs: dict = dict()
+    # query url byte budget used to pack meter ids in requests, None falls back to fixed chunks of MAX_METER_IDS_PER_REQUEST
+    queryUrlBudget: int = PricingAPIConstants.MAX_QUERY_URL_BYTES
+    # rate limits and retries every page request, a failed page is retried alone so pagination resumes where it stopped
+    scheduler: RequestScheduler = RequestScheduler()
+    # http session shared by all chunk and page requests, created on first use
+    session: "requests.Session" = None
+    _sessionLock = threading.Lock()
+    # optional azbaseliner.pricing.metrics.MetricsRegistry recording the timings and volumes of each phase, nothing is measured when None
+    metrics: MetricsRegistry = None
+    # optional azbaseliner.pricing.metrics.CallProfiler sampling getOfferMonthlyPriceForMeterIdList calls under cProfile
+    profiler: CallProfiler = None
+    _noTimer = nullcontext()
+    # json decoder of the response bodies, orjson when installed, resolved on first decode
+    _jsonLoads = None
+
+    @classmethod
+    def buildSession(ctx, poolSize: int = PricingAPIConstants.DEFAULT_CONNECTION_POOL_SIZE, keepAlive: bool = True, gzip: bool = True) -> "requests.Session":
+        """builds an http session keeping up to poolSize connections alive, poolSize should be at least the maxConcurrency used for queries"""
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session: requests.Session = requests.Session()
+        adapter: HTTPAdapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolSize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(PricingAPIConstants.API_CALL_HEADERS)
+        session.headers[PricingAPIConstants.HEADER_ACCEPT_ENCODING] = "gzip, deflate" if gzip else "identity"
+        if not keepAlive:
+            session.headers[PricingAPIConstants.HEADER_CONNECTION] = "close"
+        return session
+
+    @classmethod
+    def configureSession(ctx, poolSize: int = PricingAPIConstants.DEFAULT_CONNECTION_POOL_SIZE, keepAlive: bool = True, gzip: bool = True) -> None:
+        """replaces the shared http session with one built from the given settings"""
+        with ctx._sessionLock:
+            if ctx.session is not None:
+                ctx.session.close()
+            ctx.session = ctx.buildSession(poolSize, keepAlive, gzip)
+
+    @classmethod
+    def registerCatalog(ctx, catalog) -> None:
+        """registers a PriceCatalog snapshot, meters it contains are then priced from it instead of the api"""
+        ctx.catalogs = {**ctx.catalogs, (catalog.regionName, catalog.currencyCode): catalog}
+
+    @classmethod
+    def _timer(ctx, name: str):
+        """times a block into the metrics registry, a shared no-op context when metrics are disabled"""
+        return ctx._noTimer if ctx.metrics is None else ctx.metrics.timer(name)
+
+    @classmethod
+    def _getSession(ctx) -> "requests.Session":
+        if ctx.session is None:
+            with ctx._sessionLock:
+                if ctx.session is None:
+                    ctx.session = ctx.buildSession()
+        return ctx.session
+
+    @classmethod
+    def _buildQueryFilterPrefix(ctx, regionName: str) -> str:
+        return PricingAPIConstants.QUERY_PARAM_REGION + " eq '" + regionName + "' and "
+
+    @classmethod
+    def _buildMeterIdClause(ctx, meterId: str) -> str:
+        return PricingAPIConstants.KEY_METER_ID + " eq '" + meterId + "'"
 
     @classmethod
     def _buildQueryFilter(ctx, regionName: str, meterIds: list) -> str:
         """builds the OOD query filter for a given region and a set of meter ids"""
-        oodFilterString: str = PricingAPIConstants.QUERY_PARAM_REGION + " eq '" + regionName + "' and "
-        doAppend: bool = False
-        for meterId in meterIds:
-            if doAppend:
-                oodFilterString = oodFilterString + " or "
-            oodFilterString = oodFilterString + PricingAPIConstants.KEY_METER_ID + " eq '" + meterId + "'"
-            doAppend = True
-
+        oodFilterString: str = ctx._buildQueryFilterPrefix(regionName) + PricingAPIConstants.QUERY_FILTER_SEPARATOR.join(ctx._buildMeterIdClause(meterId) for meterId in meterIds)
         ctx.logger.debug(f"query filter : {oodFilterString}")
         return oodFilterString
 
+    @classmethod
+    def _encodedLength(ctx, text: str) -> int:
+        """length of the text once percent encoded as done by requests when sending the url"""
+        from requests.utils import requote_uri
+
+        return len(requote_uri(text))
+
+    @classmethod
+    def _planMeterIdChunks(ctx, regionName: str, currencyCode: str, meterIds: list) -> list:
+        """splits the meter ids into chunks, packing as many meter ids per query as the url budget allows"""
+        if ctx.queryUrlBudget is None:
+            return ListUtils.splitIntoChunks(meterIds, PricingAPIConstants.MAX_METER_IDS_PER_REQUEST)
+        baseLength: int = ctx._encodedLength(f"{ctx._buildQueryUrl(currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={ctx._buildQueryFilterPrefix(regionName)}")
+        separatorLength: int = ctx._encodedLength(PricingAPIConstants.QUERY_FILTER_SEPARATOR)
+        budget: int = ctx.queryUrlBudget - PricingAPIConstants.QUERY_URL_PAGING_HEADROOM_BYTES
+        chunks: list = list()
+        chunk: list = list()
+        length: int = baseLength
+        for meterId in meterIds:
+            clauseLength: int = ctx._encodedLength(ctx._buildMeterIdClause(meterId)) + (separatorLength if len(chunk) > 0 else 0)
+            if len(chunk) > 0 and length + clauseLength > budget:
+                chunks.append(chunk)
+                chunk = list()
+                length = baseLength
+                clauseLength -= separatorLength
+            chunk.append(meterId)
+            length += clauseLength
+        if len(chunk) > 0:
+            chunks.append(chunk)
+        ctx.logger.debug(f"{len(meterIds)} meter ids packed into {len(chunks)} queries of at most {ctx.queryUrlBudget} bytes")
+        return chunks
+
     @classmethod
     def _buildQueryUrl(ctx, currencyCode=PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR) -> str:
         """builds the query url for a given currency code"""
@@ -91,23 +224,68 @@ class PricingAPIClient(object):
                 json.dump(data, f)
 
     @classmethod
-    def _execCallAndReturnItems(ctx, url: str) -> list:
-        """executes rest call and returns the items from the response, manages multi page responses"""
-        items: list = list()
+    def _fetchPage(ctx, url: str, scheduler: RequestScheduler = None) -> dict:
+        """executes the rest call for a single page through the scheduler, the shared one unless given, and returns the decoded response.
+        Raises RetryExhaustedError when the page stays throttled or unavailable after all retries, PricingRequestError when it fails with another status"""
         ctx.logger.info(f"invoking pricing api on url {url}")
-        response = requests.get(url, headers=PricingAPIConstants.API_CALL_HEADERS)
+        metrics: MetricsRegistry = ctx.metrics
+        with ctx._timer(MetricsConstants.REQUEST_SECONDS):
+            response = (scheduler or ctx.scheduler).execute(lambda timeout: ctx._getSession().get(url, timeout=timeout), f"rest call on {url}")
+        if metrics is not None:
+            metrics.observe(MetricsConstants.REQUEST_BYTES, len(response.content))
+            metrics.increment(MetricsConstants.REQUESTS)
         message = f"rest call on {url} returned status {response.status_code}"
-        if response.ok:
-            ctx.logger.info(message)
-            data = response.json()
-            ctx.__dumpResponseForDebug(data)
-            items = items + data[PricingAPIConstants.KEY_ITEMS]
-            if data[PricingAPIConstants.KEY_NEXT_PAGE_LINK] is not None:
-                nextUrl: str = data[PricingAPIConstants.KEY_NEXT_PAGE_LINK]
-                items = items + ctx._execCallAndReturnItems(nextUrl)
-        else:
-            ctx.logger.error(message)
-        return items
+        if response.status_code in PricingAPIConstants.QUERY_REJECTED_STATUS_CODES:
+            raise PricingQueryRejectedError(url, response.status_code)
+        if not response.ok:
+            raise PricingRequestError(url, response.status_code)
+        ctx.logger.info(message)
+        with ctx._timer(MetricsConstants.DECODE_SECONDS):
+            data = ctx._decodeJson(response.content)
+        ctx.__dumpResponseForDebug(data)
+        return data
+
+    @classmethod
+    def _decodeJson(ctx, content: bytes) -> dict:
+        """decodes a response body with orjson when installed, with the standard json module otherwise"""
+        if ctx._jsonLoads is None:
+            try:
+                # optional faster json parser
+                import orjson
+
+                ctx._jsonLoads = orjson.loads
+            except ImportError:
+                ctx._jsonLoads = json.loads
+        return ctx._jsonLoads(content)
+
+    @classmethod
+    def _iterPages(ctx, url: str, scheduler: RequestScheduler = None) -> Iterator[list]:
+        """yields the items of each page of the response, following the next page links"""
+        metrics: MetricsRegistry = ctx.metrics
+        nextUrl: str = url
+        pageCount: int = 0
+        try:
+            while nextUrl is not None:
+                data: dict = ctx._fetchPage(nextUrl, scheduler)
+                nextUrl = data[PricingAPIConstants.KEY_NEXT_PAGE_LINK]
+                pageCount += 1
+                if metrics is not None:
+                    metrics.observe(MetricsConstants.ITEMS_PER_PAGE, len(data[PricingAPIConstants.KEY_ITEMS]))
+                yield data[PricingAPIConstants.KEY_ITEMS]
+        finally:
+            if metrics is not None:
+                metrics.observe(MetricsConstants.PAGES_PER_QUERY, pageCount)
+
+    @classmethod
+    def _iterItems(ctx, url: str, scheduler: RequestScheduler = None) -> Iterator[dict]:
+        """yields the items of a multi page response one by one, only one page is held in memory at a time"""
+        for pageItems in ctx._iterPages(url, scheduler):
+            yield from pageItems
+
+    @classmethod
+    def _execCallAndReturnItems(ctx, url: str) -> list:
+        """executes rest call and returns the items from the response, manages multi page responses"""
+        return list(ctx._iterItems(url))
 
     @classmethod
     def _itemIsSupportedForPricing(ctx, item: any) -> bool:
@@ -144,7 +322,7 @@ class PricingAPIClient(object):
         return PricingAPIConstants.KEY_SAVINGS_PLAN in item.keys()
 
     @classmethod
-    def _parseItemsForMeterId(ctx, meterId: str, regionName: str, currencyCode: str, items: list) -> MonthlyPlanPricing:
+    def _parseItemsForMeterId(ctx, meterId: str, regionName: str, currencyCode: str, items: Iterable) -> MonthlyPlanPricing:
         """parses the pricing api response for a given meter id, returns the corresponsing MonthlyPlanPricing record"""
         monthlyPricing: MonthlyPlanPricing = MonthlyPlanPricing(meterId=meterId, regionName=regionName, currency=currencyCode)
         for item in items:
@@ -179,38 +357,133 @@ class PricingAPIClient(object):
         return monthlyPricing
 
     @classmethod
-    def _groupRecordsByMeterId(ctx, items: list) -> dict:
-        """groups all records by meterId in a given dict"""
-        mapPerMeterId: dict = dict()
+    def _groupRecordsByMeterId(ctx, items: Iterable, mapPerMeterId: dict = None, fields: tuple = None) -> dict:
+        """groups all records by meterId in a given dict, appending to mapPerMeterId when given.
+        When fields is given only these item fields are kept, so that the decoded pages can be released"""
+        if mapPerMeterId is None:
+            mapPerMeterId = dict()
         for item in items:
+            if fields is not None:
+                item = {field: item[field] for field in fields if field in item}
             meterId: str = item[PricingAPIConstants.KEY_METER_ID]
-            if meterId not in mapPerMeterId.keys():
-                mapPerMeterId[meterId] = list()
-            mapPerMeterId[meterId].append(item)
+            meterIdItems: list = mapPerMeterId.get(meterId)
+            if meterIdItems is None:
+                mapPerMeterId[meterId] = [item]
+            else:
+                meterIdItems.append(item)
         return mapPerMeterId
 
     @classmethod
     def _getPricingRecords(ctx, regionName: str, currencyCode: str, mapRecordsPerMeterId: dict) -> list:
         """parses records for each and every meterId and returns the corresponing plan pricing record"""
         pricingItems: list = list()
-        for meterId in mapRecordsPerMeterId.keys():
-            meterIdItems = mapRecordsPerMeterId[meterId]
-            pricingItems.append(ctx._parseItemsForMeterId(meterId, regionName, currencyCode, meterIdItems))
+        with ctx._timer(MetricsConstants.PARSE_SECONDS):
+            for meterId in mapRecordsPerMeterId.keys():
+                meterIdItems = mapRecordsPerMeterId[meterId]
+                pricingItems.append(ctx._parseItemsForMeterId(meterId, regionName, currencyCode, meterIdItems))
+        if ctx.metrics is not None:
+            ctx.metrics.increment(MetricsConstants.PARSED_METERS, len(pricingItems))
         return pricingItems
 
+    @classmethod
+    def _fetchRecordsForMeterIdChunk(ctx, regionName: str, currencyCode: str, meterIds: list, recordsPerMeterId: dict = None, scheduler: RequestScheduler = None) -> dict:
+        """fetches the pricing records of a single chunk of meter ids, grouped by meterId into recordsPerMeterId when given.
+        Items are grouped page by page as they are decoded, keeping only the fields used for pricing. Every page goes through scheduler when given"""
+        url: str = f"{ctx._buildQueryUrl(currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={ctx._buildQueryFilter(regionName, meterIds)}"
+        chunkRecordsPerMeterId: dict = dict()
+        try:
+            # self time, the page requests and decoding made while grouping are measured on their own
+            with ctx._timer(MetricsConstants.GROUP_SECONDS):
+                ctx._groupRecordsByMeterId(ctx._iterItems(url, scheduler), chunkRecordsPerMeterId, PricingAPIConstants.PRICING_ITEM_FIELDS)
+        except PricingQueryRejectedError as e:
+            if len(meterIds) <= 1:
+                ctx.logger.error(str(e))
+                return recordsPerMeterId if recordsPerMeterId is not None else dict()
+            # the query was too large for the server, retry with two halves
+            ctx.logger.warning(f"{e}, retrying with {len(meterIds) // 2} meter ids per query")
+            half: int = len(meterIds) // 2
+            chunkRecordsPerMeterId = ctx._fetchRecordsForMeterIdChunk(regionName, currencyCode, meterIds[:half], scheduler=scheduler)
+            ctx._fetchRecordsForMeterIdChunk(regionName, currencyCode, meterIds[half:], chunkRecordsPerMeterId, scheduler)
+        # a rejected query may have yielded pages before failing, they are only merged once the chunk completes
+        if recordsPerMeterId is None:
+            return chunkRecordsPerMeterId
+        recordsPerMeterId.update(chunkRecordsPerMeterId)
+        return recordsPerMeterId
+
+    @classmethod
+    def _fetchRecordsForMeterIdChunks(ctx, regionName: str, currencyCode: str, listOfMeterIdList: list, maxConcurrency: int) -> list:
+        """fetches the records of all chunks, with at most maxConcurrency requests in flight, results are returned in chunk order"""
+        if maxConcurrency <= 1 or len(listOfMeterIdList) <= 1:
+            # serial chunks all append to the same dict
+            recordsPerMeterId: dict = dict()
+            for meterIdList in listOfMeterIdList:
+                ctx._fetchRecordsForMeterIdChunk(regionName, currencyCode, meterIdList, recordsPerMeterId)
+            return [recordsPerMeterId]
+        workers: int = min(maxConcurrency, len(listOfMeterIdList))
+        ctx.logger.debug(f"fetching {len(listOfMeterIdList)} chunks with {workers} workers")
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="PricingAPIClient") as executor:
+            return list(executor.map(lambda meterIdList: ctx._fetchRecordsForMeterIdChunk(regionName, currencyCode, meterIdList), listOfMeterIdList))
+
     @classmethod
     def getOfferMonthlyPriceForMeterIdList(
         ctx,
         regionName: str,
         meterIds: list,
         currencyCode=PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR,
+        maxConcurrency: int = PricingAPIConstants.DEFAULT_MAX_CONCURRENT_REQUESTS,
     ) -> list:
-        """Queries the pricing offers for a list of meter Ids. Returns a list of MonthlyPlanPricing records, one by requested meter Id"""
-        recordsPerMeterId: dict = dict()
-        listOfMeterIdList: list = ListUtils.splitIntoChunks(meterIds, PricingAPIConstants.MAX_METER_IDS_PER_REQUEST)
-        for meterIdList in listOfMeterIdList:
-            url: str = f"{ctx._buildQueryUrl(currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={ctx._buildQueryFilter(regionName, meterIdList)}"
-            responseItems: dict = ctx._execCallAndReturnItems(url)
-            mapRecordsPerMeterId: dict = ctx._groupRecordsByMeterId(responseItems)
-            recordsPerMeterId = recordsPerMeterId | mapRecordsPerMeterId
+        """Queries the pricing offers for a list of meter Ids. Returns a list of MonthlyPlanPricing records, one by requested meter Id.
+        The meter ids are queried by chunks, maxConcurrency sets the number of chunk requests that can be in flight at the same time"""
+        if ctx.profiler is not None:
+            with ctx.profiler.sample():
+                return ctx._getOfferMonthlyPriceForMeterIdList(regionName, meterIds, currencyCode, maxConcurrency)
+        return ctx._getOfferMonthlyPriceForMeterIdList(regionName, meterIds, currencyCode, maxConcurrency)
+
+    @classmethod
+    def _getOfferMonthlyPriceForMeterIdList(ctx, regionName: str, meterIds: list, currencyCode: str, maxConcurrency: int) -> list:
+        if ctx.cache is None and (regionName, currencyCode) not in ctx.catalogs:
+            return ctx._fetchPricingRecords(regionName, meterIds, currencyCode, maxConcurrency)
+        pricingPerMeterId, missingMeterIds = ctx._lookupLocalRecords(regionName, currencyCode, meterIds)
+        ctx.logger.info(f"{len(pricingPerMeterId)} meters resolved locally, {len(missingMeterIds)} to be queried")
+        if len(missingMeterIds) > 0:
+            fetchedRecords: list = ctx._fetchPricingRecords(regionName, missingMeterIds, currencyCode, maxConcurrency)
+            ctx._storeLocalRecords(fetchedRecords)
+            pricingPerMeterId.update((record.meterId, record) for record in fetchedRecords)
+        return ctx._orderRecords(meterIds, pricingPerMeterId)
+
+    @classmethod
+    def _lookupLocalRecords(ctx, regionName: str, currencyCode: str, meterIds: list) -> tuple:
+        """resolves meter ids from the registered catalog then from the cache, returns the found records per meterId and the missing meter ids"""
+        pricingPerMeterId: dict = dict()
+        missingMeterIds: list = list(dict.fromkeys(meterIds))
+        catalog = ctx.catalogs.get((regionName, currencyCode))
+        if catalog is not None:
+            found, missingMeterIds = catalog.getMany(missingMeterIds)
+            pricingPerMeterId.update(found)
+        if ctx.cache is not None and len(missingMeterIds) > 0:
+            found, missingMeterIds = ctx.cache.getMany(regionName, currencyCode, missingMeterIds)
+            pricingPerMeterId.update(found)
+        return pricingPerMeterId, missingMeterIds
+
+    @classmethod
+    def _storeLocalRecords(ctx, records: list) -> None:
+        if ctx.cache is not None:
+            ctx.cache.putMany(records)
+
+    @classmethod
+    def _orderRecords(ctx, meterIds: list, pricingPerMeterId: dict) -> list:
+        """returns the records in requested meter id order, without duplicates"""
+        return [pricingPerMeterId[meterId] for meterId in dict.fromkeys(meterIds) if meterId in pricingPerMeterId]
+
+    @classmethod
+    def _fetchPricingRecords(ctx, regionName: str, meterIds: list, currencyCode: str, maxConcurrency: int) -> list:
+        """queries the api by chunks of meter ids and returns the MonthlyPlanPricing records of all chunks"""
+        listOfMeterIdList: list = ctx._planMeterIdChunks(regionName, currencyCode, meterIds)
+        chunkResults: list = ctx._fetchRecordsForMeterIdChunks(regionName, currencyCode, listOfMeterIdList, maxConcurrency)
+        # in place merge into the first chunk dict, no per chunk copy of the accumulated records
+        recordsPerMeterId: dict = chunkResults[0] if len(chunkResults) > 0 else dict()
+        for mapRecordsPerMeterId in chunkResults[1:]:
+            recordsPerMeterId.update(mapRecordsPerMeterId)
         return ctx._getPricingRecords(regionName, currencyCode, recordsPerMeterId)
@@ -0,0 +1,121 @@
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from logging import Logger
+
+from azbaseliner.pricing.cache import PriceCache
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIClient, PricingAPIConstants
+
+
+@dataclass
+class RefreshReport:
+    """Outcome of an incremental refresh of a region and currency"""
+
+    regionName: str
+    currencyCode: str
+    # None when the refresh was a full one
+    previousSyncPoint: str
+    # the previous sync point when the refresh could not be completed
+    syncPoint: str
+    # items returned by the delta query
+    deltaItemCount: int = 0
+    # meters queried in full, the changed and the not yet cached ones
+    fetchedMeterIds: list = field(default_factory=list)
+    changedMeterIds: list = field(default_factory=list)
+    addedMeterIds: list = field(default_factory=list)
+    # current records of the requested meters, in requested order
+    records: list = field(default_factory=list)
+
+    @property
+    def full(self) -> bool:
+        return self.previousSyncPoint is None
+
+
+class IncrementalPriceRefresher(object):
+    """Keeps the cached prices of a fleet current with small delta queries.
+    The first refresh of a region and currency prices every meter and stores a sync point in the cache, the next ones only query the compute items
+    whose effectiveStartDate is at or after that sync point, then re-price every cached meter they touch, requested or not, as the sync point
+    covers the whole region and currency. The sync point is kept when a re-priced meter comes back without prices, so the next run checks it again.
+    Records refreshed this way should not expire, the cache is best built with ttlSeconds=None"""
+
+    logger: Logger = logging.getLogger("IncrementalPriceRefresher")
+
+    # date granularity as documented for the api filters, the one day overlap between two runs only re-checks a few meters
+    SYNC_POINT_FORMAT: str = "%Y-%m-%d"
+
+    def __init__(self, cache: PriceCache, client=PricingAPIClient, clock=lambda: datetime.now(timezone.utc)) -> None:
+        self.cache: PriceCache = cache
+        self.client = client
+        self.clock = clock
+
+    def _buildDeltaUrl(self, regionName: str, currencyCode: str, syncPoint: str) -> str:
+        oodFilter: str = (
+            f"{PricingAPIConstants.QUERY_PARAM_REGION} eq '{regionName}' and {PricingAPIConstants.KEY_SERVICE_FAMILY} eq '{PricingAPIConstants.VALUE_COMPUTE}'"
+            f" and {PricingAPIConstants.KEY_EFFECTIVE_START_DATE} ge '{syncPoint}'"
+        )
+        return f"{self.client._buildQueryUrl(currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={oodFilter}"
+
+    def _fetchDeltaMeterIds(self, regionName: str, currencyCode: str, syncPoint: str) -> tuple:
+        """returns the meter ids having items effective since the sync point and the number of delta items"""
+        meterIds: set = set()
+        itemCount: int = 0
+        for item in self.client._iterItems(self._buildDeltaUrl(regionName, currencyCode, syncPoint)):
+            meterIds.add(item[PricingAPIConstants.KEY_METER_ID])
+            itemCount += 1
+        return meterIds, itemCount
+
+    @classmethod
+    def _recordsDiffer(ctx, left: MonthlyPlanPricing, right: MonthlyPlanPricing) -> bool:
+        """compares the prices of two records, NaN equals NaN"""
+        for name in PriceCache.PRICE_FIELDS:
+            leftValue: float = getattr(left, name)
+            rightValue: float = getattr(right, name)
+            if leftValue != rightValue and not (math.isnan(leftValue) and math.isnan(rightValue)):
+                return True
+        return False
+
+    def refresh(
+        self,
+        regionName: str,
+        meterIds: list,
+        currencyCode: str = PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR,
+        maxConcurrency: int = PricingAPIConstants.DEFAULT_MAX_CONCURRENT_REQUESTS,
+    ) -> RefreshReport:
+        """Brings the cached prices of meterIds up to date and reports the meters whose prices changed since the last refresh"""
+        syncPoint: str = self.clock().strftime(self.SYNC_POINT_FORMAT)
+        report: RefreshReport = RefreshReport(regionName, currencyCode, self.cache.getSyncPoint(regionName, currencyCode), syncPoint)
+        cachedPerMeterId, missingMeterIds = self.cache.getMany(regionName, currencyCode, meterIds)
+        # cached meters of the region and currency touched by the delta but not requested this time, re-priced as well
+        otherCachedPerMeterId: dict = dict()
+        if report.full:
+            report.fetchedMeterIds = list(dict.fromkeys(meterIds))
+        else:
+            deltaMeterIds, report.deltaItemCount = self._fetchDeltaMeterIds(regionName, currencyCode, report.previousSyncPoint)
+            otherDeltaMeterIds: list = sorted(deltaMeterIds.difference(cachedPerMeterId.keys(), missingMeterIds))
+            otherCachedPerMeterId, _ = self.cache.getMany(regionName, currencyCode, otherDeltaMeterIds)
+            report.fetchedMeterIds = [meterId for meterId in cachedPerMeterId.keys() if meterId in deltaMeterIds] + list(otherCachedPerMeterId.keys()) + missingMeterIds
+        self.logger.info(f"refreshing {len(report.fetchedMeterIds)} of {len(cachedPerMeterId) + len(missingMeterIds)} meters in {regionName}/{currencyCode} since {report.previousSyncPoint}")
+        fetchedRecords: list = list()
+        if len(report.fetchedMeterIds) > 0:
+            fetchedRecords = self.client._fetchPricingRecords(regionName, report.fetchedMeterIds, currencyCode, maxConcurrency)
+            self.cache.putMany(fetchedRecords)
+        repricedMeterIds: set = {meterId for meterId in report.fetchedMeterIds if meterId in cachedPerMeterId or meterId in otherCachedPerMeterId}
+        for record in fetchedRecords:
+            repricedMeterIds.discard(record.meterId)
+            cached: MonthlyPlanPricing = cachedPerMeterId.get(record.meterId, otherCachedPerMeterId.get(record.meterId))
+            if cached is None:
+                report.addedMeterIds.append(record.meterId)
+            elif self._recordsDiffer(cached, record):
+                report.changedMeterIds.append(record.meterId)
+            if record.meterId not in otherCachedPerMeterId:
+                cachedPerMeterId[record.meterId] = record
+        # the sync point only moves once the delta has been applied to every cached meter it touches
+        if len(repricedMeterIds) > 0:
+            self.logger.warning(f"{len(repricedMeterIds)} re-priced meters came back without prices in {regionName}/{currencyCode}, keeping the sync point {report.previousSyncPoint}")
+            report.syncPoint = report.previousSyncPoint
+        else:
+            self.cache.putSyncPoint(regionName, currencyCode, syncPoint)
+        report.records = self.client._orderRecords(meterIds, cachedPerMeterId)
+        self.logger.info(f"{len(report.changedMeterIds)} meters changed and {len(report.addedMeterIds)} added in {regionName}/{currencyCode}")
+        return report
@@ -0,0 +1,336 @@
+import argparse
+import errno
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+from dataclasses import asdict, astuple, dataclass
+from logging import Logger
+
+from azbaseliner.pricing.cache import MemoryPriceCache, PriceCache, SqlitePriceCache
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIClient, PricingAPIConstants
+
+
+class PriceServiceConstants(object):
+    """Holds the settings and protocol keys of the local price service"""
+
+    # the per user runtime directory, otherwise a private directory of the user in the temporary directory
+    SOCKET_DIRECTORY: str = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"azbaseliner-{os.getuid()}")
+    DEFAULT_SOCKET_PATH: str = os.path.join(SOCKET_DIRECTORY, "azbaseliner-pricing.sock")
+    SOCKET_DIRECTORY_PERMISSIONS: int = 0o700
+    DEFAULT_TIMEOUT_SECONDS: float = 300.0
+    SOCKET_PERMISSIONS: int = 0o600
+    ENCODING: str = "utf-8"
+
+    KEY_OPERATION: str = "op"
+    KEY_REGION_NAME: str = "regionName"
+    KEY_CURRENCY_CODE: str = "currencyCode"
+    KEY_METER_IDS: str = "meterIds"
+    KEY_RECORDS: str = "records"
+    KEY_STATS: str = "stats"
+    KEY_ERROR: str = "error"
+    OPERATION_GET_OFFER: str = "getOffer"
+    OPERATION_STATS: str = "stats"
+    OPERATION_PING: str = "ping"
+
+
+class PriceServiceError(Exception):
+    """Raised by the service client when the service answers a request with an error"""
+
+
+@dataclass
+class ServiceStats:
+    """Holds the counters of a price service"""
+
+    requests: int = 0
+    requestedMeters: int = 0
+    # meters answered from the cache, from a fetch made for another caller, and fetched upstream for this caller
+    cachedMeters: int = 0
+    coalescedMeters: int = 0
+    fetchedMeters: int = 0
+    upstreamFetches: int = 0
+
+
+class _Flight(object):
+    """An upstream fetch in progress, the callers waiting for one of its meters share its outcome"""
+
+    def __init__(self) -> None:
+        self.done: threading.Event = threading.Event()
+        self.recordsPerMeterId: dict = dict()
+        self.error: Exception = None
+
+
+class PricingService(object):
+    """Prices meter ids for many callers with a single cache and a single connection pool.
+    Identical in-flight requests are coalesced per meter (single-flight): a meter already being fetched for a caller is waited for instead of
+    being fetched again, so N callers asking for the same (region, currency, meterIds) cause one upstream fetch"""
+
+    logger: Logger = logging.getLogger("PricingService")
+
+    def __init__(
+        self,
+        cache: PriceCache = None,
+        client=PricingAPIClient,
+        maxConcurrency: int = PricingAPIConstants.DEFAULT_MAX_CONCURRENT_REQUESTS,
+        timeout: float = PriceServiceConstants.DEFAULT_TIMEOUT_SECONDS,
+    ) -> None:
+        self.cache: PriceCache = cache if cache is not None else MemoryPriceCache()
+        self.client = client
+        self.maxConcurrency: int = maxConcurrency
+        # seconds a caller waits for the fetch of another caller
+        self.timeout: float = timeout
+        self.stats: ServiceStats = ServiceStats()
+        # (regionName, currencyCode, meterId) -> _Flight fetching it
+        self._inFlight: dict = dict()
+        self._lock = threading.Lock()
+
+    def _claim(self, regionName: str, currencyCode: str, meterIds: list) -> tuple:
+        """splits the missing meter ids between a new flight owned by the caller and the flights already fetching the others"""
+        ownedMeterIds: list = list()
+        waitedFlights: dict = dict()
+        flight: _Flight = _Flight()
+        with self._lock:
+            for meterId in meterIds:
+                key: tuple = (regionName, currencyCode, meterId)
+                other: _Flight = self._inFlight.get(key)
+                if other is None:
+                    self._inFlight[key] = flight
+                    ownedMeterIds.append(meterId)
+                else:
+                    waitedFlights.setdefault(id(other), other)
+            self.stats.coalescedMeters += len(meterIds) - len(ownedMeterIds)
+            self.stats.fetchedMeters += len(ownedMeterIds)
+            self.stats.upstreamFetches += 1 if len(ownedMeterIds) > 0 else 0
+        return flight, ownedMeterIds, list(waitedFlights.values())
+
+    def _fly(self, regionName: str, currencyCode: str, flight: _Flight, meterIds: list) -> None:
+        """fetches the meters of a flight, then releases its waiters whatever the outcome"""
+        try:
+            records: list = self.client._fetchPricingRecords(regionName, meterIds, currencyCode, self.maxConcurrency)
+            self.cache.putMany(records)
+            flight.recordsPerMeterId = {record.meterId: record for record in records}
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                for meterId in meterIds:
+                    self._inFlight.pop((regionName, currencyCode, meterId), None)
+            flight.done.set()
+
+    def getOfferMonthlyPriceForMeterIdList(self, regionName: str, meterIds: list, currencyCode: str = PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR) -> list:
+        """same contract as PricingAPIClient.getOfferMonthlyPriceForMeterIdList, served from the cache then from the coalesced upstream fetches"""
+        pricingPerMeterId, missingMeterIds = self.cache.getMany(regionName, currencyCode, meterIds)
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.requestedMeters += len(pricingPerMeterId) + len(missingMeterIds)
+            self.stats.cachedMeters += len(pricingPerMeterId)
+        if len(missingMeterIds) > 0:
+            flight, ownedMeterIds, waitedFlights = self._claim(regionName, currencyCode, missingMeterIds)
+            if len(ownedMeterIds) > 0:
+                self._fly(regionName, currencyCode, flight, ownedMeterIds)
+                pricingPerMeterId.update(flight.recordsPerMeterId)
+            for other in waitedFlights:
+                if not other.done.wait(self.timeout):
+                    raise TimeoutError(f"no answer from the fetch of another caller after {self.timeout}s")
+                if other.error is not None:
+                    raise other.error
+                pricingPerMeterId.update(other.recordsPerMeterId)
+        return self.client._orderRecords(meterIds, pricingPerMeterId)
+
+    def handle(self, message: dict) -> dict:
+        """answers a decoded protocol message"""
+        operation: str = message.get(PriceServiceConstants.KEY_OPERATION)
+        if operation == PriceServiceConstants.OPERATION_GET_OFFER:
+            records: list = self.getOfferMonthlyPriceForMeterIdList(
+                message[PriceServiceConstants.KEY_REGION_NAME], message[PriceServiceConstants.KEY_METER_IDS], message[PriceServiceConstants.KEY_CURRENCY_CODE]
+            )
+            return {PriceServiceConstants.KEY_RECORDS: [astuple(record) for record in records]}
+        if operation == PriceServiceConstants.OPERATION_STATS:
+            with self._lock:
+                return {PriceServiceConstants.KEY_STATS: asdict(self.stats)}
+        if operation == PriceServiceConstants.OPERATION_PING:
+            return dict()
+        raise ValueError(f"unknown operation {operation}")
+
+
+class _ServiceRequestHandler(socketserver.StreamRequestHandler):
+    """Answers newline delimited json messages, one answer line per message, until the client disconnects"""
+
+    def handle(self) -> None:
+        service: PricingService = self.server.service
+        for line in self.rfile:
+            try:
+                answer: dict = service.handle(json.loads(line))
+            except Exception as e:
+                service.logger.warning(f"request failed with {type(e).__name__} {e}")
+                answer = {PriceServiceConstants.KEY_ERROR: f"{type(e).__name__}: {e}"}
+            # NaN prices are kept, both ends use the standard json module
+            self.wfile.write(json.dumps(answer).encode(PriceServiceConstants.ENCODING) + b"\n")
+            self.wfile.flush()
+
+
+class PriceServiceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves a PricingService on a unix socket, each connection gets its own thread, the socket is only accessible to the owner of the process"""
+
+    logger: Logger = logging.getLogger("PriceServiceServer")
+    daemon_threads: bool = True
+
+    def __init__(self, service: PricingService, socketPath: str = PriceServiceConstants.DEFAULT_SOCKET_PATH) -> None:
+        self.service: PricingService = service
+        self.socketPath: str = socketPath
+        self._thread: threading.Thread = None
+        self._prepareSocketDirectory(os.path.dirname(os.path.abspath(socketPath)))
+        self._removeStaleSocket(socketPath)
+        super().__init__(socketPath, _ServiceRequestHandler)
+
+    @classmethod
+    def _prepareSocketDirectory(ctx, directory: str) -> None:
+        """creates a missing socket directory accessible to the owner only, the shared temporary directory fallback must be private to the user"""
+        if not os.path.isdir(directory):
+            os.makedirs(directory, mode=PriceServiceConstants.SOCKET_DIRECTORY_PERMISSIONS)
+        if directory == os.path.abspath(PriceServiceConstants.SOCKET_DIRECTORY):
+            status: os.stat_result = os.lstat(directory)
+            if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid() or stat.S_IMODE(status.st_mode) & ~PriceServiceConstants.SOCKET_DIRECTORY_PERMISSIONS:
+                raise PermissionError(f"{directory} must be a directory owned and only accessible by the current user")
+
+    @classmethod
+    def _removeStaleSocket(ctx, socketPath: str) -> None:
+        """removes a socket left by a previous run, raises when a service still answers on it or when the path is not a socket"""
+        try:
+            mode: int = os.lstat(socketPath).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(errno.EEXIST, "not a socket, refusing to replace it", socketPath)
+        probe: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socketPath)
+        except ConnectionRefusedError:
+            ctx.logger.info(f"removing the stale socket {socketPath}")
+            os.unlink(socketPath)
+            return
+        finally:
+            probe.close()
+        raise OSError(errno.EADDRINUSE, "a price service is already serving on this socket", socketPath)
+
+    def server_bind(self) -> None:
+        # the socket file is created by bind, the umask makes it private from its creation instead of chmod-ing it afterwards
+        previousUmask: int = os.umask(0o777 & ~PriceServiceConstants.SOCKET_PERMISSIONS)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previousUmask)
+
+    def start(self) -> "PriceServiceServer":
+        """serves in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="PriceServiceServer", daemon=True)
+        self._thread.start()
+        self.logger.info(f"serving prices on {self.socketPath}")
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        if os.path.exists(self.socketPath):
+            os.unlink(self.socketPath)
+
+
+class PriceServiceClient(object):
+    """Client of a PriceServiceServer, offers the PricingAPIClient pricing call over one persistent connection.
+    An instance can be shared by threads, their requests are sent one at a time"""
+
+    def __init__(self, socketPath: str = PriceServiceConstants.DEFAULT_SOCKET_PATH, timeout: float = PriceServiceConstants.DEFAULT_TIMEOUT_SECONDS) -> None:
+        self.socketPath: str = socketPath
+        self.timeout: float = timeout
+        self._socket: socket.socket = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.timeout)
+        self._socket.connect(self.socketPath)
+        self._reader = self._socket.makefile("rb")
+
+    def _call(self, message: dict) -> dict:
+        with self._lock:
+            if self._socket is None:
+                self._connect()
+            try:
+                self._socket.sendall(json.dumps(message).encode(PriceServiceConstants.ENCODING) + b"\n")
+                line: bytes = self._reader.readline()
+            except OSError:
+                self.close()
+                raise
+            if len(line) == 0:
+                self.close()
+                raise ConnectionError(f"price service on {self.socketPath} closed the connection")
+        answer: dict = json.loads(line)
+        if PriceServiceConstants.KEY_ERROR in answer:
+            raise PriceServiceError(answer[PriceServiceConstants.KEY_ERROR])
+        return answer
+
+    def getOfferMonthlyPriceForMeterIdList(self, regionName: str, meterIds: list, currencyCode: str = PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR) -> list:
+        """Queries the pricing offers for a list of meter Ids through the service. Returns a list of MonthlyPlanPricing records, one by requested meter Id"""
+        answer: dict = self._call(
+            {
+                PriceServiceConstants.KEY_OPERATION: PriceServiceConstants.OPERATION_GET_OFFER,
+                PriceServiceConstants.KEY_REGION_NAME: regionName,
+                PriceServiceConstants.KEY_CURRENCY_CODE: currencyCode,
+                PriceServiceConstants.KEY_METER_IDS: list(meterIds),
+            }
+        )
+        return [MonthlyPlanPricing(*row) for row in answer[PriceServiceConstants.KEY_RECORDS]]
+
+    def stats(self) -> ServiceStats:
+        return ServiceStats(**self._call({PriceServiceConstants.KEY_OPERATION: PriceServiceConstants.OPERATION_STATS})[PriceServiceConstants.KEY_STATS])
+
+    def ping(self) -> None:
+        self._call({PriceServiceConstants.KEY_OPERATION: PriceServiceConstants.OPERATION_PING})
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
+            self._reader = None
+
+    def __enter__(self) -> "PriceServiceClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def main(arguments: list = None) -> None:
+    """runs the price service in the foreground, python -m azbaseliner.pricing.service --help"""
+    parser = argparse.ArgumentParser(description="serves azure prices to the local processes over a unix socket")
+    parser.add_argument("--socket", default=PriceServiceConstants.DEFAULT_SOCKET_PATH, help="path of the unix socket")
+    parser.add_argument("--cache", default=None, help="sqlite file persisting the prices, kept in memory when not set")
+    parser.add_argument("--workers", type=int, default=8, help="number of upstream requests in flight per fetch")
+    parser.add_argument("--log-level", default="INFO", help="logging level")
+    options: argparse.Namespace = parser.parse_args(arguments)
+    logging.basicConfig(format="[%(asctime)s] [%(levelname)s] %(message)s", level=options.log_level.upper())
+    cache: PriceCache = SqlitePriceCache(options.cache) if options.cache is not None else MemoryPriceCache()
+    PricingAPIClient.configureSession(poolSize=max(options.workers, PricingAPIConstants.DEFAULT_CONNECTION_POOL_SIZE))
+    server: PriceServiceServer = PriceServiceServer(PricingService(cache, maxConcurrency=options.workers), options.socket)
+    server.logger.info(f"serving prices on {options.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(options.socket):
+            os.unlink(options.socket)
+
+
+if __name__ == "__main__":
+    main()
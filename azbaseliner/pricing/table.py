@@ -0,0 +1,141 @@
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from azbaseliner.pricing.pricer import MonthlyPlanPricing
+from azbaseliner.pricing.vectorized import BatchPricingEngine
+
+
+class PricingTable(object):
+    """Struct of arrays container of MonthlyPlanPricing records.
+    Prices live in a single float matrix, region and currency names are interned and stored as small integer codes"""
+
+    __slots__ = ("_meterIds", "_regionCodes", "_currencyCodes", "_prices", "_regions", "_currencies", "_regionNames", "_currencyNames", "_size", "_index")
+
+    PRICE_COLUMNS: list = BatchPricingEngine.PRICE_COLUMNS
+    COLUMN_METER_ID: str = "meterId"
+    COLUMN_REGION_NAME: str = "regionName"
+    COLUMN_CURRENCY: str = "currency"
+    INITIAL_CAPACITY: int = 1024
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY) -> None:
+        capacity = max(1, capacity)
+        self._meterIds: list = list()
+        self._regionCodes: np.ndarray = np.empty(capacity, dtype=np.int16)
+        self._currencyCodes: np.ndarray = np.empty(capacity, dtype=np.int16)
+        self._prices: np.ndarray = np.empty((capacity, len(self.PRICE_COLUMNS)), dtype=np.float64)
+        # interned names, name -> code and code -> name
+        self._regions: dict = dict()
+        self._currencies: dict = dict()
+        self._regionNames: list = list()
+        self._currencyNames: list = list()
+        self._size: int = 0
+        # (regionCode, currencyCode) -> meterId -> row
+        self._index: dict = dict()
+
+    @classmethod
+    def fromRecords(ctx, records: Iterable) -> "PricingTable":
+        """builds a table from MonthlyPlanPricing records"""
+        records = list(records)
+        table: PricingTable = PricingTable(len(records))
+        table.extend(records)
+        return table
+
+    @classmethod
+    def fromFrame(ctx, regionName: str, currencyCode: str, pricingFrame: pd.DataFrame) -> "PricingTable":
+        """builds a table from a BatchPricingEngine pricing frame without creating any intermediate record"""
+        table: PricingTable = PricingTable(len(pricingFrame))
+        size: int = len(pricingFrame)
+        table._prices[:size] = pricingFrame[ctx.PRICE_COLUMNS].to_numpy(dtype=np.float64)
+        regionCode: int = table._intern(table._regions, table._regionNames, regionName)
+        currencyCode: int = table._intern(table._currencies, table._currencyNames, currencyCode)
+        table._regionCodes[:size] = regionCode
+        table._currencyCodes[:size] = currencyCode
+        table._meterIds = pricingFrame.index.tolist()
+        table._size = size
+        table._index[(regionCode, currencyCode)] = {meterId: row for row, meterId in enumerate(table._meterIds)}
+        return table
+
+    @staticmethod
+    def _intern(codes: dict, names: list, name: str) -> int:
+        code: int = codes.get(name)
+        if code is None:
+            code = len(names)
+            codes[name] = code
+            names.append(name)
+        return code
+
+    def _grow(self) -> None:
+        capacity: int = 2 * len(self._regionCodes)
+        # exported views keep referencing the previous buffers, which stay valid
+        self._regionCodes = np.resize(self._regionCodes, capacity)
+        self._currencyCodes = np.resize(self._currencyCodes, capacity)
+        prices: np.ndarray = np.empty((capacity, len(self.PRICE_COLUMNS)), dtype=np.float64)
+        prices[: self._size] = self._prices[: self._size]
+        self._prices = prices
+
+    def append(self, record: MonthlyPlanPricing) -> None:
+        """adds a record, a record with the same meterId, region and currency replaces the previous one"""
+        regionCode: int = self._intern(self._regions, self._regionNames, record.regionName)
+        currencyCode: int = self._intern(self._currencies, self._currencyNames, record.currency)
+        rowsPerMeterId: dict = self._index.setdefault((regionCode, currencyCode), dict())
+        row: int = rowsPerMeterId.get(record.meterId)
+        if row is None:
+            if self._size == len(self._regionCodes):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._meterIds.append(record.meterId)
+            self._regionCodes[row] = regionCode
+            self._currencyCodes[row] = currencyCode
+            rowsPerMeterId[record.meterId] = row
+        self._prices[row] = [getattr(record, column) for column in self.PRICE_COLUMNS]
+
+    def extend(self, records: Iterable) -> None:
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _record(self, row: int) -> MonthlyPlanPricing:
+        return MonthlyPlanPricing(self._meterIds[row], self._regionNames[self._regionCodes[row]], self._currencyNames[self._currencyCodes[row]], *self._prices[row].tolist())
+
+    def __getitem__(self, row: int) -> MonthlyPlanPricing:
+        """returns a MonthlyPlanPricing copy of a row"""
+        if row < 0:
+            row += self._size
+        if not 0 <= row < self._size:
+            raise IndexError(f"row {row} out of range for a table of {self._size} records")
+        return self._record(row)
+
+    def __iter__(self) -> Iterator[MonthlyPlanPricing]:
+        for row in range(self._size):
+            yield self._record(row)
+
+    def get(self, meterId: str, regionName: str, currencyCode: str) -> MonthlyPlanPricing:
+        """returns the record of a meter priced in a region and currency, or None"""
+        regionCode: int = self._regions.get(regionName)
+        currencyCode: int = self._currencies.get(currencyCode)
+        row: int = self._index.get((regionCode, currencyCode), dict()).get(meterId)
+        return None if row is None else self._record(row)
+
+    @property
+    def prices(self) -> np.ndarray:
+        """read only view of the price matrix, one row per record and one column per PRICE_COLUMNS entry"""
+        view: np.ndarray = self._prices[: self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def meterIds(self) -> list:
+        return self._meterIds
+
+    def toDataFrame(self) -> pd.DataFrame:
+        """exports the table as a DataFrame, the price columns share the table memory and region/currency are categoricals over the interned codes"""
+        frame: pd.DataFrame = pd.DataFrame(self.prices, columns=self.PRICE_COLUMNS, copy=False)
+        frame.insert(0, self.COLUMN_CURRENCY, pd.Categorical.from_codes(self._currencyCodes[: self._size], categories=self._currencyNames))
+        frame.insert(0, self.COLUMN_REGION_NAME, pd.Categorical.from_codes(self._regionCodes[: self._size], categories=self._regionNames))
+        frame.insert(0, self.COLUMN_METER_ID, self._meterIds)
+        return frame
@@ -0,0 +1,243 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging import Logger
+from typing import Callable
+
+
+class TokenBucket(object):
+    """Thread safe token bucket, acquire() blocks until a token is available so that calls stay under ratePerSecond"""
+
+    def __init__(self, ratePerSecond: float, capacity: float = None, clock=time.monotonic, sleep=time.sleep) -> None:
+        self.ratePerSecond: float = ratePerSecond
+        self.capacity: float = capacity if capacity is not None else max(1.0, ratePerSecond)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens: float = self.capacity
+        self._updatedAt: float = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now: float = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updatedAt) * self.ratePerSecond)
+        self._updatedAt = now
+
+    def tryAcquire(self, tokens: float = 1.0) -> float:
+        """takes the tokens if available and returns 0, otherwise returns the number of seconds to wait before retrying"""
+        with self._lock:
+            self._refill()
+            # tolerance so that float rounding cannot produce endless tiny waits
+            if self._tokens >= tokens - 1e-9:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.ratePerSecond
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """blocks until the tokens are taken, returns the time spent waiting"""
+        waited: float = 0.0
+        delay: float = self.tryAcquire(tokens)
+        while delay > 0:
+            self.sleep(delay)
+            waited += delay
+            delay = self.tryAcquire(tokens)
+        return waited
+
+
+class RetryExhaustedError(Exception):
+    """Raised when a request still fails after all the retries allowed by the scheduler"""
+
+    def __init__(self, description: str, attempts: int, lastError: str) -> None:
+        super().__init__(f"{description} failed after {attempts} attempts, last error : {lastError}")
+        self.attempts: int = attempts
+        self.lastError: str = lastError
+
+
+@dataclass
+class SchedulerStats:
+    """Holds the counters of a request scheduler"""
+
+    requests: int = 0
+    retries: int = 0
+    throttledResponses: int = 0
+    serverErrors: int = 0
+    transportErrors: int = 0
+    # time spent waiting for the rate limiter or backing off after a 429
+    throttledSeconds: float = 0.0
+    # time spent backing off after server or transport errors
+    backoffSeconds: float = 0.0
+
+
+class RequestScheduler(object):
+    """Executes http calls under an optional token bucket rate limit, retrying throttled (429), transient 5xx and transport failures
+    with exponential backoff and full jitter, honouring the Retry-After header when the server sends one.
+    maxDelay caps the backoff delays only, a Retry-After is always waited in full and one longer than maxRetryAfter raises RetryExhaustedError"""
+
+    logger: Logger = logging.getLogger("RequestScheduler")
+
+    STATUS_THROTTLED: int = 429
+    RETRYABLE_STATUS_CODES: tuple = (429, 500, 502, 503, 504)
+    HEADER_RETRY_AFTER: str = "Retry-After"
+
+    def __init__(
+        self,
+        ratePerSecond: float = None,
+        maxRetries: int = 5,
+        baseDelay: float = 0.5,
+        maxDelay: float = 30.0,
+        maxRetryAfter: float = 300.0,
+        timeout: float = 60.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rnd: random.Random = None,
+        asyncSleep=None,
+    ) -> None:
+        self.clock = clock
+        self.sleep = sleep
+        self.rateLimiter: TokenBucket = None
+        self.setRate(ratePerSecond)
+        self.maxRetries: int = maxRetries
+        self.baseDelay: float = baseDelay
+        self.maxDelay: float = maxDelay
+        # longest Retry-After waited for, the request fails rather than being retried before the server allows it
+        self.maxRetryAfter: float = maxRetryAfter
+        # per request timeout, in seconds
+        self.timeout: float = timeout
+        # asyncio.sleep when None, resolved on first use as only the asyncio client needs it
+        self.asyncSleep = asyncSleep
+        self.random: random.Random = rnd if rnd is not None else random.Random()
+        self.stats: SchedulerStats = SchedulerStats()
+        self._lock = threading.Lock()
+
+    def setRate(self, ratePerSecond: float) -> None:
+        """replaces the rate limit applied to every request of the scheduler, None removes it"""
+        self.rateLimiter = TokenBucket(ratePerSecond, clock=self.clock, sleep=self.sleep) if ratePerSecond is not None else None
+
+    def withRate(self, ratePerSecond: float) -> "RequestScheduler":
+        """returns a scheduler with the retry settings of this one, its own rate limit and its own stats"""
+        return RequestScheduler(
+            ratePerSecond,
+            self.maxRetries,
+            self.baseDelay,
+            self.maxDelay,
+            self.maxRetryAfter,
+            self.timeout,
+            clock=self.clock,
+            sleep=self.sleep,
+            rnd=self.random,
+            asyncSleep=self.asyncSleep,
+        )
+
+    def _count(self, **increments) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def _backoffDelay(self, attempt: int) -> float:
+        return self.random.uniform(0, min(self.maxDelay, self.baseDelay * (2**attempt)))
+
+    def _retryAfterDelay(self, response) -> float:
+        """returns the delay requested by the Retry-After header, either in seconds or as an http date, None if absent or invalid"""
+        value: str = response.headers.get(self.HEADER_RETRY_AFTER)
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        # http dates are rare, their parser is only loaded when one is met
+        from email.utils import parsedate_to_datetime
+
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def _retryDecision(self, attempt: int, response, error: Exception) -> tuple:
+        """counts a finished attempt and returns (delay, delayCounter, lastError) when it has to be retried, None when the response is final"""
+        if error is not None:
+            self._count(transportErrors=1)
+            return self._backoffDelay(attempt), "backoffSeconds", f"{type(error).__name__} {error}"
+        if response.status_code not in self.RETRYABLE_STATUS_CODES:
+            return None
+        retryAfter: float = self._retryAfterDelay(response)
+        delay: float = retryAfter if retryAfter is not None else self._backoffDelay(attempt)
+        if response.status_code == self.STATUS_THROTTLED:
+            self._count(throttledResponses=1)
+            return delay, "throttledSeconds", f"status {response.status_code}"
+        self._count(serverErrors=1)
+        return delay, "backoffSeconds", f"status {response.status_code}"
+
+    def _scheduleRetry(self, description: str, attempt: int, decision: tuple) -> float:
+        """raises RetryExhaustedError once all retries are spent, otherwise counts the retry and returns the delay to wait"""
+        delay, delayCounter, lastError = decision
+        if attempt >= self.maxRetries:
+            raise RetryExhaustedError(description, attempt + 1, lastError)
+        if delay > self.maxRetryAfter:
+            raise RetryExhaustedError(description, attempt + 1, f"{lastError} with a Retry-After of {delay:.2f}s over {self.maxRetryAfter:.2f}s")
+        self.logger.warning(f"{description} got {lastError}, retry {attempt + 1}/{self.maxRetries} in {delay:.2f}s")
+        self._count(retries=1, **{delayCounter: delay})
+        return delay
+
+    def execute(self, call: Callable, description: str = "request"):
+        """runs call(timeout) until it returns a non retryable response, the last response of a retryable status raises RetryExhaustedError"""
+        # imported on first use so that importing the scheduler does not load the http stack
+        import requests
+
+        attempt: int = 0
+        while True:
+            if self.rateLimiter is not None:
+                self._count(throttledSeconds=self.rateLimiter.acquire())
+            self._count(requests=1)
+            response = None
+            error: Exception = None
+            try:
+                response = call(self.timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            decision: tuple = self._retryDecision(attempt, response, error)
+            if decision is None:
+                return response
+            self.sleep(self._scheduleRetry(description, attempt, decision))
+            attempt += 1
+
+    def _getAsyncSleep(self) -> Callable:
+        if self.asyncSleep is None:
+            import asyncio
+
+            return asyncio.sleep
+        return self.asyncSleep
+
+    async def _acquireAsync(self) -> float:
+        waited: float = 0.0
+        delay: float = self.rateLimiter.tryAcquire()
+        while delay > 0:
+            await self._getAsyncSleep()(delay)
+            waited += delay
+            delay = self.rateLimiter.tryAcquire()
+        return waited
+
+    async def executeAsync(self, call: Callable, description: str = "request", transportErrors: tuple = None):
+        """asyncio variant of execute, call(timeout) is a coroutine function and waits never block the event loop.
+        transportErrors lists the exceptions of the http stack that are retried like connection errors, asyncio timeouts and OSError by default"""
+        import asyncio
+
+        transportErrors = transportErrors if transportErrors is not None else (asyncio.TimeoutError, OSError)
+        attempt: int = 0
+        while True:
+            if self.rateLimiter is not None:
+                self._count(throttledSeconds=await self._acquireAsync())
+            self._count(requests=1)
+            response = None
+            error: Exception = None
+            try:
+                response = await call(self.timeout)
+            except transportErrors as e:
+                error = e
+            decision: tuple = self._retryDecision(attempt, response, error)
+            if decision is None:
+                return response
+            await self._getAsyncSleep()(self._scheduleRetry(description, attempt, decision))
+            attempt += 1
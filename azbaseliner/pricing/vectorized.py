@@ -0,0 +1,136 @@
+import logging
+from logging import Logger
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIConstants
+
+
+class BatchPricingEngine(object):
+    """Computes the MonthlyPlanPricing figures of many meters at once over columnar data, same results as PricingAPIClient._parseItemsForMeterId"""
+
+    logger: Logger = logging.getLogger("BatchPricingEngine")
+
+    PRICE_COLUMNS: list = ["ri3y", "ri1y", "sp3y", "sp1y", "paygo"]
+    COLUMN_METER_ID: str = PricingAPIConstants.KEY_METER_ID
+    COLUMN_SUPPORTED: str = "supported"
+    COLUMN_TYPE: str = PricingAPIConstants.KEY_TYPE
+    COLUMN_TERM: str = "term"
+    COLUMN_HAS_RETAIL_PRICE: str = "hasRetailPrice"
+    COLUMN_RETAIL_PRICE: str = PricingAPIConstants.KEY_RETAIL_PRICE
+    COLUMN_UNIT_PRICE: str = PricingAPIConstants.KEY_UNIT_PRICE
+
+    @classmethod
+    def _termOf(ctx, item: dict) -> str:
+        """same term resolution as _itemHas3YTerm/_itemHas1YTerm, the reservation term wins over the savings plan term"""
+        if PricingAPIConstants.KEY_RESERVATION_TERM in item:
+            return item[PricingAPIConstants.KEY_RESERVATION_TERM]
+        return item.get(PricingAPIConstants.KEY_TERM)
+
+    @classmethod
+    def normalizeItems(ctx, items: Iterable) -> tuple:
+        """single pass over the raw api items, returns a frame of the items and a frame of their savings plan entries, both in item order"""
+        meterIds: list = list()
+        supported: list = list()
+        types: list = list()
+        reservationTerms: list = list()
+        hasRetailPrice: list = list()
+        retailPrices: list = list()
+        unitPrices: list = list()
+        spMeterIds: list = list()
+        spTerms: list = list()
+        spUnitPrices: list = list()
+        for item in items:
+            meterId: str = item[PricingAPIConstants.KEY_METER_ID]
+            isSupported: bool = item.get(PricingAPIConstants.KEY_SERVICE_FAMILY) == PricingAPIConstants.VALUE_COMPUTE
+            meterIds.append(meterId)
+            supported.append(isSupported)
+            types.append(item.get(PricingAPIConstants.KEY_TYPE))
+            reservationTerms.append(item.get(PricingAPIConstants.KEY_RESERVATION_TERM))
+            hasRetailPrice.append(PricingAPIConstants.KEY_RETAIL_PRICE in item)
+            retailPrices.append(item.get(PricingAPIConstants.KEY_RETAIL_PRICE, np.nan))
+            unitPrices.append(item.get(PricingAPIConstants.KEY_UNIT_PRICE, np.nan))
+            if isSupported:
+                for itemSP in item.get(PricingAPIConstants.KEY_SAVINGS_PLAN, ()):
+                    spMeterIds.append(meterId)
+                    spTerms.append(ctx._termOf(itemSP))
+                    spUnitPrices.append(itemSP[PricingAPIConstants.KEY_UNIT_PRICE])
+        itemsFrame: pd.DataFrame = pd.DataFrame(
+            {
+                ctx.COLUMN_METER_ID: pd.Series(meterIds, dtype=object),
+                ctx.COLUMN_SUPPORTED: pd.Series(supported, dtype=bool),
+                ctx.COLUMN_TYPE: pd.Series(types, dtype=object),
+                ctx.COLUMN_TERM: pd.Series(reservationTerms, dtype=object),
+                ctx.COLUMN_HAS_RETAIL_PRICE: pd.Series(hasRetailPrice, dtype=bool),
+                ctx.COLUMN_RETAIL_PRICE: pd.Series(retailPrices, dtype=np.float64),
+                ctx.COLUMN_UNIT_PRICE: pd.Series(unitPrices, dtype=np.float64),
+            }
+        )
+        savingsPlanFrame: pd.DataFrame = pd.DataFrame(
+            {
+                ctx.COLUMN_METER_ID: pd.Series(spMeterIds, dtype=object),
+                ctx.COLUMN_TERM: pd.Series(spTerms, dtype=object),
+                ctx.COLUMN_UNIT_PRICE: pd.Series(spUnitPrices, dtype=np.float64),
+            }
+        )
+        return itemsFrame, savingsPlanFrame
+
+    @classmethod
+    def _round2(ctx, values: np.ndarray) -> np.ndarray:
+        """rounds to 2 decimals exactly like the builtin round, np.round only differs on values sitting next to a half cent"""
+        rounded: np.ndarray = np.round(values, 2)
+        scaled: np.ndarray = values * 100
+        ambiguous: np.ndarray = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        if ambiguous.any():
+            rounded[ambiguous] = [round(value, 2) for value in values[ambiguous].tolist()]
+        return rounded
+
+    @classmethod
+    def _selectPerMeter(ctx, frame: pd.DataFrame, mask: pd.Series, values: pd.Series, keep: str) -> pd.Series:
+        """picks the first or last masked value of each meter"""
+        selected: pd.DataFrame = pd.DataFrame({ctx.COLUMN_METER_ID: frame[ctx.COLUMN_METER_ID][mask], "value": values[mask]})
+        selected = selected.drop_duplicates(subset=ctx.COLUMN_METER_ID, keep=keep)
+        return pd.Series(ctx._round2(selected["value"].to_numpy(dtype=np.float64)), index=selected[ctx.COLUMN_METER_ID].to_numpy())
+
+    @classmethod
+    def computeFrames(ctx, itemsFrame: pd.DataFrame, savingsPlanFrame: pd.DataFrame) -> pd.DataFrame:
+        """derives the five monthly prices of every meter, one row per meter in first appearance order, NaN for missing offers"""
+        meterIds: np.ndarray = pd.unique(itemsFrame[ctx.COLUMN_METER_ID])
+        supported: pd.Series = itemsFrame[ctx.COLUMN_SUPPORTED]
+        unsupportedCount: int = int((~supported).sum())
+        if unsupportedCount > 0:
+            ctx.logger.warning(f"{unsupportedCount} items cannot be processed as their {PricingAPIConstants.KEY_SERVICE_FAMILY} is not {PricingAPIConstants.VALUE_COMPUTE}")
+        terms: pd.Series = itemsFrame[ctx.COLUMN_TERM]
+        unitPrices: pd.Series = itemsFrame[ctx.COLUMN_UNIT_PRICE]
+        paygoMask: pd.Series = supported & itemsFrame[ctx.COLUMN_HAS_RETAIL_PRICE] & (itemsFrame[ctx.COLUMN_TYPE] == PricingAPIConstants.KEY_CONSUMPTION)
+        spTerms: pd.Series = savingsPlanFrame[ctx.COLUMN_TERM]
+        spMonthly: pd.Series = savingsPlanFrame[ctx.COLUMN_UNIT_PRICE] * PricingAPIConstants.HOURS_IN_MONTH
+        columns: dict = {
+            "ri3y": ctx._selectPerMeter(itemsFrame, supported & (terms == PricingAPIConstants.VALUE_TERM_3YEARS), unitPrices / 3 / 12, "last"),
+            "ri1y": ctx._selectPerMeter(itemsFrame, supported & (terms == PricingAPIConstants.VALUE_TERM_1YEAR), unitPrices / 12, "last"),
+            "sp3y": ctx._selectPerMeter(savingsPlanFrame, spTerms == PricingAPIConstants.VALUE_TERM_3YEARS, spMonthly, "last"),
+            "sp1y": ctx._selectPerMeter(savingsPlanFrame, spTerms == PricingAPIConstants.VALUE_TERM_1YEAR, spMonthly, "last"),
+            "paygo": ctx._selectPerMeter(itemsFrame, paygoMask, itemsFrame[ctx.COLUMN_RETAIL_PRICE] * PricingAPIConstants.HOURS_IN_MONTH, "first"),
+        }
+        return pd.DataFrame({name: column.reindex(meterIds) for name, column in columns.items()}, index=pd.Index(meterIds, name=ctx.COLUMN_METER_ID))[ctx.PRICE_COLUMNS]
+
+    @classmethod
+    def computeFrame(ctx, items: Iterable) -> pd.DataFrame:
+        """normalizes the raw api items and computes the per meter pricing frame"""
+        itemsFrame, savingsPlanFrame = ctx.normalizeItems(items)
+        return ctx.computeFrames(itemsFrame, savingsPlanFrame)
+
+    @classmethod
+    def toRecords(ctx, regionName: str, currencyCode: str, pricingFrame: pd.DataFrame) -> list:
+        """converts a pricing frame into MonthlyPlanPricing records"""
+        return [
+            MonthlyPlanPricing(meterId, regionName, currencyCode, *prices)
+            for meterId, prices in zip(pricingFrame.index.tolist(), pricingFrame[ctx.PRICE_COLUMNS].to_numpy(dtype=np.float64).tolist())
+        ]
+
+    @classmethod
+    def computeRecords(ctx, regionName: str, currencyCode: str, items: Iterable) -> list:
+        """batch equivalent of grouping the items by meter and parsing each group with _parseItemsForMeterId"""
+        return ctx.toRecords(regionName, currencyCode, ctx.computeFrame(items))
@@ -1,3 +1,7 @@
+from itertools import islice
+from typing import Iterable, Iterator
+
+
 class ListUtils(object):
     @classmethod
     def splitIntoChunks(ctx, items: list, chunkSize: int) -> list:
@@ -5,6 +9,15 @@ class ListUtils(object):
         x = [items[i : i + chunkSize] for i in range(0, len(items), chunkSize)]
         return x
 
+    @classmethod
+    def iterChunks(ctx, items: Iterable, chunkSize: int) -> Iterator[list]:
+        """lazy variant of splitIntoChunks, yields sublists of max chunkSize one at a time from any iterable"""
+        iterator: Iterator = iter(items)
+        chunk: list = list(islice(iterator, chunkSize))
+        while len(chunk) > 0:
+            yield chunk
+            chunk = list(islice(iterator, chunkSize))
+
 
 class DictUtils(object):
     @classmethod
@@ -22,3 +35,62 @@ class DictUtils(object):
                 else:
                     dict_3[key] = [value, dict_1[key]]
         return dict_3
+
+    @classmethod
+    def _own(ctx, value):
+        """copies the lists and dicts the accumulator will later extend, so that merged inputs are never modified"""
+        if type(value) is list:
+            return list(value)
+        if type(value) is dict:
+            return ctx.mergeInto(dict(), value)
+        return value
+
+    @classmethod
+    def mergeInto(ctx, accumulator: dict, other: dict) -> dict:
+        """in place variant of mergeDicts, merges other into accumulator and returns it.
+        Only the entries of other are visited, so folding many dicts costs their total size instead of copying the accumulator at every step"""
+        for key, value in other.items():
+            if key not in accumulator:
+                accumulator[key] = ctx._own(value)
+                continue
+            current = accumulator[key]
+            if (type(current) is list) and (type(value) is list):
+                current.extend(value)
+            elif (type(current) is dict) and (type(value) is dict):
+                ctx.mergeInto(current, value)
+            else:
+                accumulator[key] = [value, current]
+        return accumulator
+
+    @classmethod
+    def _mergeCopyOnWrite(ctx, accumulator: dict, other: dict, owned: set) -> None:
+        """merges other into accumulator sharing the values of other, a shared list or dict is only copied the first time it has to be extended.
+        owned holds the ids of the containers created by the merge, which are kept alive by the accumulator"""
+        for key, value in other.items():
+            if key not in accumulator:
+                accumulator[key] = value
+                continue
+            current = accumulator[key]
+            if (type(current) is list) and (type(value) is list):
+                if id(current) not in owned:
+                    current = accumulator[key] = list(current)
+                    owned.add(id(current))
+                current.extend(value)
+            elif (type(current) is dict) and (type(value) is dict):
+                if id(current) not in owned:
+                    current = accumulator[key] = dict(current)
+                    owned.add(id(current))
+                ctx._mergeCopyOnWrite(current, value, owned)
+            else:
+                accumulator[key] = [value, current]
+                owned.add(id(accumulator[key]))
+
+    @classmethod
+    def mergeMany(ctx, dicts: Iterable) -> dict:
+        """k-way merge, same result as folding mergeDicts over the dicts, which can be any iterable such as a generator.
+        Each entry is visited once and values are shared with the inputs until they need to be extended, the inputs are never modified"""
+        accumulator: dict = dict()
+        owned: set = set()
+        for other in dicts:
+            ctx._mergeCopyOnWrite(accumulator, other, owned)
+        return accumulator
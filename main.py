@@ -1,14 +1,56 @@
 #!/usr/bin/python3
 
+import argparse
 import logging
 from logging import Logger
 
-# from azbaseliner.calculator import Calculator
+from azbaseliner.baseline.inventory import InventoryConstants, InventoryReader
+from azbaseliner.baseline.runner import BaselineRunner, BaselineStats, ProgressReporter
+from azbaseliner.baseline.writers import PricingWriter
+from azbaseliner.pricing.cache import SqlitePriceCache
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
 
-logging.basicConfig(format="[%(asctime)s] [%(levelname)s] %(message)s", level=logging.INFO)
-logger: Logger = logging.getLogger("main")
 
-logger.info("starting processing ")
-# c: Calculator = Calculator()
-# logger.info("helloer just said that 2+2=" + str(c.add(2, 2)))
-logger.info("finished processing ")
+def parseArguments(arguments: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="prices the meters of a VM inventory with the Azure pricing API and writes their monthly plan prices")
+    parser.add_argument("inventory", help="csv or xlsx inventory with a meter id column and optionally a region column")
+    parser.add_argument("--output", "-o", required=True, help="csv, parquet or xlsx file receiving the prices")
+    parser.add_argument("--currency", default=PricingAPIConstants.QUERY_PARAM_CURRENCY_VALUE_EUR, help="currency code of the prices")
+    parser.add_argument("--workers", type=int, default=8, help="number of pricing requests in flight")
+    parser.add_argument("--batch-size", type=int, default=BaselineRunner.DEFAULT_BATCH_SIZE, help="number of unique meters priced per batch")
+    parser.add_argument("--chunk-rows", type=int, default=InventoryConstants.DEFAULT_CHUNK_ROWS, help="number of inventory rows read at once")
+    parser.add_argument("--meter-column", default=InventoryConstants.COLUMN_METER_ID, help="name of the meter id column")
+    parser.add_argument("--region-column", default=InventoryConstants.COLUMN_REGION_NAME, help="name of the region column")
+    parser.add_argument("--region", default=None, help="region of the rows without region")
+    parser.add_argument("--sheet", default=None, help="sheet of an xlsx inventory, the active one by default")
+    parser.add_argument("--cache", default=None, help="sqlite file caching the prices between runs")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between two progress reports")
+    parser.add_argument("--log-level", default="INFO", help="logging level")
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list = None) -> BaselineStats:
+    options: argparse.Namespace = parseArguments(arguments)
+    logging.basicConfig(format="[%(asctime)s] [%(levelname)s] %(message)s", level=options.log_level.upper())
+    logger: Logger = logging.getLogger("main")
+
+    logger.info("starting processing ")
+    reader: InventoryReader = InventoryReader(options.inventory, options.meter_column, options.region_column, options.region, options.chunk_rows, options.sheet)
+    PricingAPIClient.configureSession(poolSize=max(options.workers, PricingAPIConstants.DEFAULT_CONNECTION_POOL_SIZE))
+    if options.cache is not None:
+        PricingAPIClient.cache = SqlitePriceCache(options.cache)
+    try:
+        with PricingWriter.open(options.output) as writer:
+            runner: BaselineRunner = BaselineRunner(reader, writer, options.currency, options.workers, options.batch_size, progress=ProgressReporter(options.progress_interval))
+            stats: BaselineStats = runner.run()
+    finally:
+        if options.cache is not None:
+            PricingAPIClient.cache.close()
+            PricingAPIClient.cache = None
+    logger.info(f"{stats.recordsWritten} records written to {options.output}")
+    logger.info("finished processing ")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import asyncio
+import importlib.util
+import logging
+import time
+from unittest.mock import patch
+
+from azbaseliner.pricing.asyncpricer import AsyncPricingAPIClient
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from stubserver import PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_async.py (requires aiohttp)
+
+METER_COUNT: int = 2000
+LATENCY: float = 0.05
+CONCURRENCY_LEVELS: list = [8, 32, 64]
+
+
+async def priceAsync(meterIds: list, level: int) -> list:
+    async with AsyncPricingAPIClient(maxConcurrency=level, poolSize=level) as client:
+        return await client.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR")
+
+
+def main() -> None:
+    # an environment installed without the requirements must not fail make benchmarks
+    if importlib.util.find_spec("aiohttp") is None:
+        print("aiohttp is not installed, skipping the asyncio client benchmark")
+        return
+    logging.basicConfig(level=logging.WARNING)
+    meterIds: list = [f"meter-{i:05d}" for i in range(METER_COUNT)]
+    with PricingStubServer(latency=LATENCY) as stub:
+        with patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint):
+            for level in CONCURRENCY_LEVELS:
+                PricingAPIClient.configureSession(poolSize=level)
+                start: float = time.perf_counter()
+                reference: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR", maxConcurrency=level)
+                elapsed: float = time.perf_counter() - start
+                print(f"threads   concurrency={level:3d} meters={len(reference)} requests={stub.requestCount} wallclock={elapsed:.3f}s")
+                stub.resetCounters()
+                start = time.perf_counter()
+                prices: list = asyncio.run(priceAsync(meterIds, level))
+                elapsed = time.perf_counter() - start
+                assert repr(prices) == repr(reference), f"async client at concurrency {level} returned different results"
+                print(f"asyncio   concurrency={level:3d} meters={len(prices)} requests={stub.requestCount} connections={stub.connectionCount} wallclock={elapsed:.3f}s")
+                stub.resetCounters()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import gc
+import time
+import tracemalloc
+
+from azbaseliner.util.collections import DictUtils, ListUtils
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_collections.py
+
+KEY_COUNT: int = 1000000
+SUBSCRIPTION_COUNT: int = 100
+REGION_COUNT: int = 10
+CHUNK_SIZE: int = 20
+
+
+def buildSubscriptionResults() -> list:
+    # per subscription results keyed by region then meter, regions are shared so nested dicts merge on every step
+    keysPerRegion: int = KEY_COUNT // SUBSCRIPTION_COUNT // REGION_COUNT
+    results: list = list()
+    for subscription in range(SUBSCRIPTION_COUNT):
+        result: dict = {f"region-{region}": {f"meter-{subscription}-{index}": [index] for index in range(keysPerRegion)} for region in range(REGION_COUNT)}
+        result["subscriptions"] = [subscription]
+        results.append(result)
+    return results
+
+
+def measure(name: str, function) -> object:
+    gc.collect()
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    result = function()
+    elapsed: float = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} wallclock={elapsed:.3f}s peak={peak / 2**20:.1f}MB")
+    return result
+
+
+def foldMergeDicts(dicts: list) -> dict:
+    accumulator: dict = dict()
+    for other in dicts:
+        accumulator = DictUtils.mergeDicts(accumulator, other)
+    return accumulator
+
+
+def consumeChunks(chunks) -> int:
+    count: int = 0
+    for chunk in chunks:
+        count += len(chunk)
+    return count
+
+
+def main() -> None:
+    dicts: list = buildSubscriptionResults()
+    folded: dict = measure(f"mergeDicts fold {KEY_COUNT} keys", lambda: foldMergeDicts(dicts))
+    merged: dict = measure(f"mergeMany {KEY_COUNT} keys", lambda: DictUtils.mergeMany(dicts))
+    assert merged == folded, "k-way merge differs from the mergeDicts fold"
+    del folded, merged
+    items: list = list(range(KEY_COUNT))
+    measure(f"splitIntoChunks {KEY_COUNT} items", lambda: consumeChunks(ListUtils.splitIntoChunks(items, CHUNK_SIZE)))
+    measure(f"iterChunks {KEY_COUNT} items", lambda: consumeChunks(ListUtils.iterChunks(items, CHUNK_SIZE)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import logging
+import time
+from unittest.mock import patch
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from stubserver import PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_concurrency.py
+
+METER_COUNT: int = 400
+LATENCY: float = 0.05
+CONCURRENCY_LEVELS: list = [1, 2, 4, 8, 16]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING)
+    meterIds: list = [f"meter-{i:05d}" for i in range(METER_COUNT)]
+    with PricingStubServer(latency=LATENCY) as stub:
+        with patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint):
+            reference: list = None
+            for level in CONCURRENCY_LEVELS:
+                start: float = time.perf_counter()
+                prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR", maxConcurrency=level)
+                elapsed: float = time.perf_counter() - start
+                if reference is None:
+                    reference = prices
+                assert prices == reference, f"concurrency {level} returned different results"
+                print(f"concurrency={level:3d} meters={len(prices)} requests={stub.requestCount} wallclock={elapsed:.3f}s")
+                stub.resetCounters()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from azbaseliner.baseline.costs import FleetCostEngine
+from azbaseliner.pricing.pricer import PricingAPIConstants
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_costs.py
+
+METER_COUNT: int = 50000
+REGIONS: list = ["westeurope", "northeurope", "eastus", "westus"]
+ROW_COUNTS: list = [100000, 2000000]
+LOOP_ROW_COUNT: int = 100000
+MISSING_OFFER_RATIO: float = 0.1
+
+
+def buildPrices(rng: np.random.Generator) -> pd.DataFrame:
+    prices: pd.DataFrame = pd.DataFrame({"regionName": np.repeat(REGIONS, METER_COUNT), "meterId": [f"meter-{index}" for index in range(METER_COUNT)] * len(REGIONS)})
+    for plan in FleetCostEngine.PLANS:
+        values: np.ndarray = rng.uniform(10, 500, len(prices))
+        values[rng.random(len(prices)) < MISSING_OFFER_RATIO] = np.nan
+        prices[plan] = values
+    return prices
+
+
+def buildInventory(rng: np.random.Generator, rowCount: int) -> pd.DataFrame:
+    # a few percent of the rows reference meters missing from the prices
+    meterIds: np.ndarray = np.char.add("meter-", rng.integers(0, int(METER_COUNT * 1.02), rowCount).astype(str)).astype(object)
+    return pd.DataFrame({"regionName": rng.choice(REGIONS, rowCount), "meterId": meterIds, "quantity": rng.integers(1, 5, rowCount), "hours": rng.uniform(100, 730, rowCount)})
+
+
+def loopBestCosts(inventory: pd.DataFrame, prices: pd.DataFrame) -> list:
+    # per row reference implementation over dict lookups
+    pricesPerKey: dict = {(row[0], row[1]): row[2:] for row in prices[["regionName", "meterId"] + FleetCostEngine.PLANS].itertuples(index=False)}
+    paygoColumn: int = FleetCostEngine.PLANS.index(FleetCostEngine.PLAN_PAYGO)
+    bestCosts: list = list()
+    for regionName, meterId, quantity, hours in inventory[["regionName", "meterId", "quantity", "hours"]].itertuples(index=False):
+        costs: list = [price * quantity for price in pricesPerKey.get((regionName, meterId), [math.nan] * len(FleetCostEngine.PLANS))]
+        costs[paygoColumn] *= hours / PricingAPIConstants.HOURS_IN_MONTH
+        priced: list = [cost for cost in costs if not math.isnan(cost)]
+        bestCosts.append(min(priced) if priced else math.nan)
+    return bestCosts
+
+
+def main() -> None:
+    rng: np.random.Generator = np.random.default_rng(0)
+    prices: pd.DataFrame = buildPrices(rng)
+    inventory: pd.DataFrame = buildInventory(rng, LOOP_ROW_COUNT)
+    start: float = time.perf_counter()
+    expected: list = loopBestCosts(inventory, prices)
+    print(f"{'per row loop':<24} rows={LOOP_ROW_COUNT:<8} wallclock={time.perf_counter() - start:.3f}s")
+    vmCosts: pd.DataFrame = FleetCostEngine.computeVmCosts(inventory, prices)
+    assert np.allclose(vmCosts[FleetCostEngine.COLUMN_BEST_COST].to_numpy(), expected, equal_nan=True), "vectorized best costs differ from the per row loop"
+    for rowCount in ROW_COUNTS:
+        inventory = buildInventory(rng, rowCount)
+        start = time.perf_counter()
+        vmCosts = FleetCostEngine.computeVmCosts(inventory, prices)
+        joined: float = time.perf_counter()
+        FleetCostEngine.rollUp(vmCosts)
+        done: float = time.perf_counter()
+        print(f"{'vectorized':<24} rows={rowCount:<8} vm costs={joined - start:.3f}s roll up={done - joined:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
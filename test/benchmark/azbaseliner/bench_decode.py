@@ -0,0 +1,81 @@
+import gc
+import importlib.util
+import json
+import sys
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from stubserver import ItemSynthesizer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_decode.py [itemCount]
+
+ITEM_COUNT: int = 100000
+# about what a 2048 bytes query url holds
+METERS_PER_CHUNK: int = 30
+
+
+def buildChunkPages(itemCount: int) -> list:
+    # one json encoded page per chunk of meters, as served by the api
+    items: list = ItemSynthesizer().catalog(itemCount)
+    pages: list = list()
+    meterIds: list = list(dict.fromkeys(item[PricingAPIConstants.KEY_METER_ID] for item in items))
+    itemsPerMeterId: dict = PricingAPIClient._groupRecordsByMeterId(items)
+    for offset in range(0, len(meterIds), METERS_PER_CHUNK):
+        chunkItems: list = [item for meterId in meterIds[offset : offset + METERS_PER_CHUNK] for item in itemsPerMeterId[meterId]]
+        pages.append(json.dumps({PricingAPIConstants.KEY_ITEMS: chunkItems, PricingAPIConstants.KEY_NEXT_PAGE_LINK: None}).encode("utf-8"))
+    return pages
+
+
+def legacyPipeline(pages: list) -> dict:
+    # response.json(), grouping with keys() lookups and a dict union per chunk, as before
+    recordsPerMeterId: dict = dict()
+    for page in pages:
+        mapPerMeterId: dict = dict()
+        for item in json.loads(page.decode("utf-8"))[PricingAPIConstants.KEY_ITEMS]:
+            meterId: str = item[PricingAPIConstants.KEY_METER_ID]
+            if meterId not in mapPerMeterId.keys():
+                mapPerMeterId[meterId] = list()
+            mapPerMeterId[meterId].append(item)
+        recordsPerMeterId = recordsPerMeterId | mapPerMeterId
+    return recordsPerMeterId
+
+
+def pipeline(pages: list) -> dict:
+    recordsPerMeterId: dict = dict()
+    for page in pages:
+        items: list = PricingAPIClient._decodeJson(page)[PricingAPIConstants.KEY_ITEMS]
+        PricingAPIClient._groupRecordsByMeterId(items, recordsPerMeterId, PricingAPIConstants.PRICING_ITEM_FIELDS)
+    return recordsPerMeterId
+
+
+def measure(name: str, function, pages: list, reference: dict) -> None:
+    gc.collect()
+    start: float = time.perf_counter()
+    recordsPerMeterId: dict = function(pages)
+    elapsed: float = time.perf_counter() - start
+    del recordsPerMeterId
+    gc.collect()
+    tracemalloc.start()
+    recordsPerMeterId = function(pages)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    records: list = PricingAPIClient._getPricingRecords("westeurope", "EUR", recordsPerMeterId)
+    assert repr(records) == repr(reference), f"{name} priced differently"
+    print(f"{name:<18} chunks={len(pages)} meters={len(records)} wallclock={elapsed:.3f}s retained={retained / 2**20:.1f}MB peak={peak / 2**20:.1f}MB")
+
+
+def main() -> None:
+    itemCount: int = int(sys.argv[1]) if len(sys.argv) > 1 else ITEM_COUNT
+    pages: list = buildChunkPages(itemCount)
+    reference: list = PricingAPIClient._getPricingRecords("westeurope", "EUR", legacyPipeline(pages))
+    measure("legacy", legacyPipeline, pages, reference)
+    with patch.object(PricingAPIClient, "_jsonLoads", json.loads):
+        measure("pipeline json", pipeline, pages, reference)
+    if importlib.util.find_spec("orjson") is not None:
+        measure("pipeline orjson", pipeline, pages, reference)
+
+
+if __name__ == "__main__":
+    main()
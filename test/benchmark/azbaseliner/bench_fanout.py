@@ -0,0 +1,47 @@
+import logging
+import time
+from unittest.mock import patch
+
+from azbaseliner.pricing.fanout import PricingFanOut
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from stubserver import PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_fanout.py
+
+REGIONS: list = ["westeurope", "northeurope", "francecentral"]
+CURRENCIES: list = ["EUR", "USD"]
+METER_COUNT: int = 200
+LATENCY: float = 0.02
+CONCURRENCY: int = 8
+
+
+def buildRequests() -> list:
+    # each fleet overlaps the previous one by half of its meters, and each region is asked twice
+    requests: list = list()
+    for index, region in enumerate(REGIONS):
+        for currency in CURRENCIES:
+            requests.append((region, currency, [f"meter-{i:05d}" for i in range(0, METER_COUNT)]))
+            requests.append((region, currency, [f"meter-{i:05d}" for i in range(METER_COUNT // 2, METER_COUNT + METER_COUNT // 2)]))
+    return requests
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING)
+    requests: list = buildRequests()
+    with PricingStubServer(latency=LATENCY) as stub:
+        with patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint):
+            start: float = time.perf_counter()
+            for region, currency, meterIds in requests:
+                PricingAPIClient.getOfferMonthlyPriceForMeterIdList(region, meterIds, currency)
+            elapsed: float = time.perf_counter() - start
+            print(f"naive loop          requests={stub.requestCount} wallclock={elapsed:.3f}s")
+            stub.resetCounters()
+            start = time.perf_counter()
+            results: dict = PricingFanOut.getOfferMonthlyPrices(requests, maxConcurrency=CONCURRENCY)
+            elapsed = time.perf_counter() - start
+            pricedCount: int = sum(len(prices) for perCurrency in results.values() for prices in perCurrency.values())
+            print(f"fan-out x{CONCURRENCY}          requests={stub.requestCount} wallclock={elapsed:.3f}s records={pricedCount}")
+
+
+if __name__ == "__main__":
+    main()
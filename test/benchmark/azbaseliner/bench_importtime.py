@@ -0,0 +1,54 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_importtime.py [--runs 5] [--scale 1.0]
+# exits with status 1 when a module exceeds its cold import budget or loads a module it must defer
+
+# module -> (cold import budget in milliseconds, modules that must not be loaded by importing it)
+IMPORT_BUDGETS: dict = {
+    "azbaseliner.pricing.pricer": (80, ["requests", "urllib3", "asyncio", "cProfile", "orjson", "concurrent.futures.thread", "numpy", "pandas"]),
+    "azbaseliner.pricing.cache": (100, ["requests", "asyncio", "numpy", "pandas"]),
+    "azbaseliner.pricing.refresh": (100, ["requests", "asyncio", "numpy", "pandas"]),
+    "azbaseliner.pricing.fanout": (100, ["requests", "asyncio", "numpy", "pandas"]),
+    "azbaseliner.pricing.service": (120, ["requests", "asyncio", "numpy", "pandas"]),
+    "azbaseliner.pricing.asyncpricer": (150, ["requests", "aiohttp", "numpy", "pandas"]),
+    "azbaseliner.baseline.writers": (100, ["requests", "pyarrow", "openpyxl", "pandas"]),
+}
+
+
+def importTimes(module: str) -> dict:
+    """imports module in a fresh interpreter and returns the cumulative import time in microseconds of every loaded module"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True)
+    times: dict = dict()
+    for line in completed.stderr.splitlines():
+        fields: list = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="checks the cold import time of the azbaseliner modules against their budgets")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module, the median is compared to the budget")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every budget, for slower machines")
+    options = parser.parse_args()
+    failures: list = list()
+    for module, (budget, deferred) in IMPORT_BUDGETS.items():
+        runs: list = [importTimes(module) for _ in range(max(1, options.runs))]
+        median: float = statistics.median(times[module] for times in runs) / 1000
+        loaded: list = [name for name in deferred if name in runs[0]]
+        limit: float = budget * options.scale
+        status: str = "ok" if median <= limit and len(loaded) == 0 else "FAILED"
+        print(f"{module:<34} cold import={median:7.1f}ms budget={limit:6.1f}ms {status}" + (f" loads {loaded}" if loaded else ""))
+        if status != "ok":
+            failures.append(module)
+    if failures:
+        print(f"import budget exceeded by {failures}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
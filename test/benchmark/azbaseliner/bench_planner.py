@@ -0,0 +1,34 @@
+import logging
+import time
+import uuid
+from unittest.mock import patch
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from stubserver import PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_planner.py
+
+METER_COUNT: int = 1000
+LATENCY: float = 0.01
+SERVER_MAX_URL_BYTES: int = 4096
+# None is the legacy fixed chunking of MAX_METER_IDS_PER_REQUEST meter ids
+BUDGETS: list = [None, 2048, 4096, 8192]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.ERROR)
+    meterIds: list = [str(uuid.UUID(int=i)) for i in range(METER_COUNT)]
+    with PricingStubServer(latency=LATENCY, maxUrlBytes=SERVER_MAX_URL_BYTES) as stub:
+        with patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint):
+            for budget in BUDGETS:
+                stub.resetCounters()
+                with patch.object(PricingAPIClient, "queryUrlBudget", budget):
+                    start: float = time.perf_counter()
+                    prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR")
+                    elapsed: float = time.perf_counter() - start
+                label: str = "fixed chunks of 20" if budget is None else f"budget {budget} bytes"
+                print(f"{label:20s} meters={len(prices)} requests={stub.requestCount} wallclock={elapsed:.3f}s (server limit {SERVER_MAX_URL_BYTES} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import logging
+import time
+from unittest.mock import patch
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.throttling import RequestScheduler
+from stubserver import PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_retry.py
+
+METER_COUNT: int = 300
+PAGE_SIZE: int = 50
+THROTTLE_EVERY: int = 4
+STALL_EVERY: int = 9
+CLIENT_TIMEOUT: float = 0.2
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.ERROR)
+    meterIds: list = [f"meter-{i:05d}" for i in range(METER_COUNT)]
+    stub: PricingStubServer = PricingStubServer(pageSize=PAGE_SIZE, throttleEvery=THROTTLE_EVERY, stallEvery=STALL_EVERY, stallSeconds=2 * CLIENT_TIMEOUT)
+    with stub, patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint):
+        for ratePerSecond in [None, 50]:
+            scheduler: RequestScheduler = RequestScheduler(ratePerSecond=ratePerSecond, baseDelay=0.05, timeout=CLIENT_TIMEOUT)
+            stub.resetCounters()
+            with patch.object(PricingAPIClient, "scheduler", scheduler):
+                start: float = time.perf_counter()
+                prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR", maxConcurrency=4)
+                elapsed: float = time.perf_counter() - start
+            assert len(prices) == METER_COUNT, f"{METER_COUNT - len(prices)} meters were dropped"
+            stats = scheduler.stats
+            print(
+                f"rate={str(ratePerSecond):5s} meters={len(prices)} requests={stats.requests} retries={stats.retries} throttled={stats.throttledResponses} "
+                f"timeouts={stats.transportErrors} throttledTime={stats.throttledSeconds:.2f}s backoffTime={stats.backoffSeconds:.2f}s wallclock={elapsed:.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from unittest.mock import patch
+
+from azbaseliner.pricing.cache import MemoryPriceCache
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.service import PriceServiceClient, PriceServiceServer, PricingService
+from stubserver import PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_service.py
+
+METER_COUNT: int = 5000
+LATENCY: float = 0.05
+CONCURRENCY: int = 8
+PROCESS_COUNTS: list = [1, 4, 8]
+
+
+def priceDirectly(endpoint: str, meterIds: list) -> int:
+    # each worker process has its own session and fetches every meter
+    with patch.object(PricingAPIConstants, "API_ENDPOINT", endpoint):
+        return len(PricingAPIClient.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR", maxConcurrency=CONCURRENCY))
+
+
+def priceThroughService(socketPath: str, meterIds: list) -> int:
+    with PriceServiceClient(socketPath) as client:
+        return len(client.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR"))
+
+
+def run(name: str, processCount: int, function, target: str, meterIds: list, stub: PricingStubServer) -> None:
+    stub.resetCounters()
+    with ProcessPoolExecutor(max_workers=processCount, mp_context=get_context("spawn")) as executor:
+        # workers are started before timing
+        list(executor.map(abs, range(processCount)))
+        start: float = time.perf_counter()
+        counts: list = list(executor.map(function, [target] * processCount, [meterIds] * processCount))
+        elapsed: float = time.perf_counter() - start
+    assert len(set(counts)) == 1, f"{name} workers priced different meter counts {counts}"
+    print(f"{name:<8} processes={processCount} meters={counts[0]} upstream requests={stub.requestCount} wallclock={elapsed:.3f}s")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING)
+    meterIds: list = [f"meter-{i:05d}" for i in range(METER_COUNT)]
+    with PricingStubServer(latency=LATENCY) as stub, tempfile.TemporaryDirectory() as tempDir:
+        for processCount in PROCESS_COUNTS:
+            run("direct", processCount, priceDirectly, stub.endpoint, meterIds, stub)
+            # a fresh service for each run, nothing is cached beforehand
+            with patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint):
+                PricingAPIClient.configureSession(poolSize=CONCURRENCY)
+                server = PriceServiceServer(PricingService(MemoryPriceCache(), maxConcurrency=CONCURRENCY), os.path.join(tempDir, "pricing.sock")).start()
+                try:
+                    run("service", processCount, priceThroughService, server.socketPath, meterIds, stub)
+                finally:
+                    server.stop()
+
+
+if __name__ == "__main__":
+    main()
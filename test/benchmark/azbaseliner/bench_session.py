@@ -0,0 +1,36 @@
+import logging
+import time
+from unittest.mock import patch
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from stubserver import PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_session.py
+
+METER_COUNT: int = 400
+PAGE_SIZE: int = 25
+CONNECT_LATENCY: float = 0.02
+SCENARIOS: list = [
+    ("no keep-alive", dict(keepAlive=False, gzip=False), 1),
+    ("pooled session", dict(keepAlive=True, gzip=False), 1),
+    ("pooled session + gzip", dict(keepAlive=True, gzip=True), 1),
+    ("pooled session x8", dict(poolSize=8, keepAlive=True, gzip=True), 8),
+]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING)
+    meterIds: list = [f"meter-{i:05d}" for i in range(METER_COUNT)]
+    with PricingStubServer(pageSize=PAGE_SIZE, connectLatency=CONNECT_LATENCY) as stub:
+        with patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint):
+            for name, sessionSettings, concurrency in SCENARIOS:
+                PricingAPIClient.configureSession(**sessionSettings)
+                stub.resetCounters()
+                start: float = time.perf_counter()
+                prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR", maxConcurrency=concurrency)
+                elapsed: float = time.perf_counter() - start
+                print(f"{name:24s} meters={len(prices)} requests={stub.requestCount} connections={stub.connectionCount} wallclock={elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+
+from azbaseliner.pricing.metrics import MetricsRegistry
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from stubserver import ItemSynthesizer, PricingStubServer
+
+# run with : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_suite.py --output baseline.json
+# compare  : PYTHONPATH=. python3 test/benchmark/azbaseliner/bench_suite.py --compare baseline.json
+
+SCENARIOS: list = ["getOffer", "group", "parse"]
+DEFAULT_SIZES: str = "10000,100000"
+DEFAULT_LATENCY: float = 0.005
+DEFAULT_CONCURRENCY: int = 8
+DEFAULT_PAGE_SIZE: int = 1000
+DEFAULT_TOLERANCE: float = 0.10
+REGION: str = "westeurope"
+CURRENCY: str = "EUR"
+
+
+def peakRssMb() -> float:
+    # ru_maxrss is in kilobytes on linux and in bytes on macos
+    maxrss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def summarize(scenario: str, itemCount: int, elapsed: float, latencies: list, **extra) -> dict:
+    latencies: np.ndarray = np.array(latencies, dtype=np.float64)
+    result: dict = {
+        "scenario": scenario,
+        "items": itemCount,
+        "seconds": round(elapsed, 6),
+        "itemsPerSecond": round(itemCount / elapsed, 1) if elapsed > 0 else None,
+        "p50Ms": round(float(np.percentile(latencies, 50)) * 1000, 4) if len(latencies) > 0 else None,
+        "p99Ms": round(float(np.percentile(latencies, 99)) * 1000, 4) if len(latencies) > 0 else None,
+        "peakRssMb": round(peakRssMb(), 1),
+    }
+    result.update(extra)
+    return result
+
+
+def benchGetOffer(itemCount: int, latency: float, concurrency: int, pageSize: int, phases: bool = False) -> dict:
+    # serves a recorded catalog of itemCount items and prices all of its meters, latencies are per page request
+    items: list = ItemSynthesizer().catalog(itemCount)
+    meterIds: list = list(dict.fromkeys(item[PricingAPIConstants.KEY_METER_ID] for item in items))
+    latencies: list = list()
+    registry: MetricsRegistry = MetricsRegistry() if phases else None
+    fetchPage = PricingAPIClient._fetchPage
+
+    def timedFetchPage(url: str) -> dict:
+        start: float = time.perf_counter()
+        try:
+            return fetchPage(url)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    with PricingStubServer(latency=latency, pageSize=pageSize, recordedItems=items) as stub:
+        del items
+        with patch.object(PricingAPIConstants, "API_ENDPOINT", stub.endpoint), patch.object(PricingAPIClient, "_fetchPage", timedFetchPage), patch.object(PricingAPIClient, "metrics", registry):
+            PricingAPIClient.configureSession(poolSize=concurrency)
+            start: float = time.perf_counter()
+            records: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(REGION, meterIds, CURRENCY, maxConcurrency=concurrency)
+            elapsed: float = time.perf_counter() - start
+        extra: dict = {"phases": registry.snapshot()["histograms"]} if phases else dict()
+        return summarize("getOffer", itemCount, elapsed, latencies, requests=stub.requestCount, bytes=stub.bytesSent, records=len(records), **extra)
+
+
+def benchGroup(itemCount: int, **unused) -> dict:
+    # one timed grouping of the whole item list, latencies are the per page share of a grouping done page by page
+    items: list = ItemSynthesizer().catalog(itemCount)
+    start: float = time.perf_counter()
+    groups: dict = PricingAPIClient._groupRecordsByMeterId(items)
+    elapsed: float = time.perf_counter() - start
+    latencies: list = list()
+    for offset in range(0, itemCount, DEFAULT_PAGE_SIZE):
+        pageStart: float = time.perf_counter()
+        PricingAPIClient._groupRecordsByMeterId(items[offset : offset + DEFAULT_PAGE_SIZE])
+        latencies.append(time.perf_counter() - pageStart)
+    return summarize("group", itemCount, elapsed, latencies, meters=len(groups))
+
+
+def benchParse(itemCount: int, **unused) -> dict:
+    # parses every meter group, latencies are per meter
+    groups: dict = PricingAPIClient._groupRecordsByMeterId(ItemSynthesizer().catalog(itemCount))
+    latencies: list = list()
+    start: float = time.perf_counter()
+    for meterId, meterItems in groups.items():
+        meterStart: float = time.perf_counter()
+        PricingAPIClient._parseItemsForMeterId(meterId, REGION, CURRENCY, meterItems)
+        latencies.append(time.perf_counter() - meterStart)
+    elapsed: float = time.perf_counter() - start
+    return summarize("parse", itemCount, elapsed, latencies, meters=len(groups))
+
+
+BENCHMARKS: dict = {"getOffer": benchGetOffer, "group": benchGroup, "parse": benchParse}
+
+
+def runScenario(scenario: str, itemCount: int, options: dict) -> dict:
+    logging.basicConfig(level=logging.ERROR)
+    return BENCHMARKS[scenario](itemCount, **options)
+
+
+def runIsolated(scenario: str, itemCount: int, options: dict) -> dict:
+    # a fresh interpreter per scenario so that peak RSS is not inherited from the previous ones
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(runScenario, scenario, itemCount, options).result()
+
+
+def gitCommit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """returns the results whose throughput dropped by more than tolerance against the baseline"""
+    baselineResults: dict = {(result["scenario"], result["items"]): result for result in baseline["results"]}
+    regressions: list = list()
+    for result in current["results"]:
+        reference: dict = baselineResults.get((result["scenario"], result["items"]))
+        if reference is None or not reference["itemsPerSecond"] or not result["itemsPerSecond"]:
+            continue
+        ratio: float = result["itemsPerSecond"] / reference["itemsPerSecond"]
+        rssDelta: float = result["peakRssMb"] - reference["peakRssMb"]
+        flag: str = "REGRESSION" if ratio < 1 - tolerance else ""
+        print(f"{result['scenario']:<10} items={result['items']:<8} throughput x{ratio:.2f} peakRss {rssDelta:+.1f}MB p99 {reference['p99Ms']}ms -> {result['p99Ms']}ms {flag}")
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def parseArguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="pricing benchmark suite against a local replay server")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated item counts, such as 10000,100000,1000000")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated scenarios among " + ",".join(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="replay server latency per request in seconds")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="maxConcurrency of the getOffer scenario")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="items per page served by the replay server")
+    parser.add_argument("--phases", action="store_true", help="records the per phase timings of the getOffer scenario through a MetricsRegistry")
+    parser.add_argument("--output", help="writes the results as json to this file")
+    parser.add_argument("--compare", help="baseline json results to compare with, exits with 1 on throughput regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="accepted throughput drop ratio before flagging a regression")
+    return parser.parse_args()
+
+
+def main() -> None:
+    arguments: argparse.Namespace = parseArguments()
+    options: dict = {"latency": arguments.latency, "concurrency": arguments.concurrency, "pageSize": arguments.page_size}
+    if arguments.phases:
+        options["phases"] = True
+    report: dict = {
+        "commit": gitCommit(),
+        "createdAt": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "results": list(),
+    }
+    for itemCount in [int(size) for size in arguments.sizes.split(",")]:
+        for scenario in arguments.scenarios.split(","):
+            result: dict = runIsolated(scenario, itemCount, options)
+            report["results"].append(result)
+            print(
+                f"{scenario:<10} items={itemCount:<8} {result['seconds']:.3f}s {result['itemsPerSecond']:.0f} items/s "
+                f"p50={result['p50Ms']}ms p99={result['p99Ms']}ms peakRss={result['peakRssMb']}MB"
+            )
+            for phase, summary in result.get("phases", dict()).items():
+                print(f"    {phase:<26} count={summary['count']:<8} total={summary['total']:.4f} p50={summary['p50']:.6g} p99={summary['p99']:.6g}")
+    if arguments.output:
+        with open(arguments.output, "w") as fout:
+            json.dump(report, fout, indent=2)
+    if arguments.compare:
+        with open(arguments.compare) as fin:
+            baseline: dict = json.load(fin)
+        if len(compare(baseline, report, arguments.tolerance)) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
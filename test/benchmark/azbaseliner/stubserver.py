@@ -0,0 +1,234 @@
+import gzip
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from azbaseliner.pricing.pricer import PricingAPIConstants
+
+
+class ItemSynthesizer(object):
+    """Synthesizes retail price items from the unit test fixtures, prices vary per meter but are stable across runs"""
+
+    fixtureFilePricingResponse: str = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+
+    def __init__(self) -> None:
+        with open(self.fixtureFilePricingResponse) as fin:
+            items: list = json.load(fin)[PricingAPIConstants.KEY_ITEMS]
+        # one template per fixture meter, each is a reservation 3Y/1Y plus a consumption with savings plans
+        self.templates: list = list()
+        for item in items:
+            if len(self.templates) == 0 or self.templates[-1][0][PricingAPIConstants.KEY_METER_ID] != item[PricingAPIConstants.KEY_METER_ID]:
+                self.templates.append(list())
+            self.templates[-1].append(item)
+
+    @classmethod
+    def meterIdOf(ctx, index: int) -> str:
+        return f"{index:08x}-0000-4000-8000-000000000000"
+
+    def itemsForMeter(self, meterId: str) -> list:
+        index: int = sum(meterId.encode("ascii"))
+        factor: float = 1.0 + (index % 97) / 100.0
+        items: list = list()
+        for item in self.templates[index % len(self.templates)]:
+            item = dict(item, meterId=meterId)
+            item[PricingAPIConstants.KEY_UNIT_PRICE] = round(item[PricingAPIConstants.KEY_UNIT_PRICE] * factor, 6)
+            item[PricingAPIConstants.KEY_RETAIL_PRICE] = round(item[PricingAPIConstants.KEY_RETAIL_PRICE] * factor, 6)
+            if PricingAPIConstants.KEY_SAVINGS_PLAN in item:
+                item[PricingAPIConstants.KEY_SAVINGS_PLAN] = [dict(sp, unitPrice=round(sp[PricingAPIConstants.KEY_UNIT_PRICE] * factor, 6)) for sp in item[PricingAPIConstants.KEY_SAVINGS_PLAN]]
+            items.append(item)
+        return items
+
+    def catalog(self, itemCount: int) -> list:
+        """synthesizes about itemCount items spread over itemCount/3 meters"""
+        items: list = list()
+        index: int = 0
+        while len(items) < itemCount:
+            items.extend(self.itemsForMeter(self.meterIdOf(index)))
+            index += 1
+        return items[:itemCount]
+
+
+class PricingStubServer(object):
+    """Local replay server standing in for the retail prices API.
+    Meter id filters are answered from the recorded items when given, otherwise from synthesized ones, other filters list all the recorded items"""
+
+    meterIdPattern = re.compile(PricingAPIConstants.KEY_METER_ID + r" eq '([^']+)'")
+    PATH: str = "/api/retail/prices"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        pageSize: int = 100,
+        connectLatency: float = 0.0,
+        maxUrlBytes: int = None,
+        throttleEvery: int = None,
+        retryAfter: str = "0.05",
+        stallEvery: int = None,
+        stallSeconds: float = 1.0,
+        recordedItems: list = None,
+    ) -> None:
+        self.latency: float = latency
+        # longer request urls are rejected with a 414
+        self.maxUrlBytes: int = maxUrlBytes
+        # every throttleEvery-th request gets a 429 with the given Retry-After
+        self.throttleEvery: int = throttleEvery
+        self.retryAfter: str = retryAfter
+        # every stallEvery-th request waits stallSeconds before answering, to trigger client timeouts
+        self.stallEvery: int = stallEvery
+        self.stallSeconds: float = stallSeconds
+        # simulates the tcp+tls handshake cost paid once per new connection
+        self.connectLatency: float = connectLatency
+        self.pageSize: int = pageSize
+        self.requestCount: int = 0
+        self.connectionCount: int = 0
+        self.bytesSent: int = 0
+        self._lock = threading.Lock()
+        self.synthesizer: ItemSynthesizer = ItemSynthesizer()
+        self.recordedItems: list = recordedItems
+        self._recordedPerMeterId: dict = None
+        if recordedItems is not None:
+            self._recordedPerMeterId = dict()
+            for item in recordedItems:
+                self._recordedPerMeterId.setdefault(item[PricingAPIConstants.KEY_METER_ID], list()).append(item)
+        self._server: ThreadingHTTPServer = None
+        self._thread: threading.Thread = None
+
+    @classmethod
+    def loadRecording(ctx, path: str) -> list:
+        """loads the items of a recorded response, either an api response (such as AZB_DUMP_REST_PAYLOADS captures) or a plain list, optionally gzipped"""
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as fin:
+            data = json.load(fin)
+        return data[PricingAPIConstants.KEY_ITEMS] if isinstance(data, dict) else data
+
+    @classmethod
+    def saveRecording(ctx, path: str, items: list) -> None:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt") as fout:
+            json.dump({PricingAPIConstants.KEY_ITEMS: items, PricingAPIConstants.KEY_NEXT_PAGE_LINK: None, "Count": len(items)}, fout)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.PATH}"
+
+    def itemsForFilter(self, oodFilter: str) -> list:
+        meterIds: list = self.meterIdPattern.findall(oodFilter)
+        if len(meterIds) == 0:
+            return self.recordedItems if self.recordedItems is not None else list()
+        items: list = list()
+        for meterId in meterIds:
+            if self._recordedPerMeterId is not None:
+                items.extend(self._recordedPerMeterId.get(meterId, ()))
+            else:
+                items.extend(self.synthesizer.itemsForMeter(meterId))
+        return items
+
+    def buildResponse(self, path: str) -> dict:
+        query: dict = parse_qs(urlsplit(path).query)
+        oodFilter: str = query.get(PricingAPIConstants.QUERY_FILTER, [""])[0]
+        skip: int = int(query.get("$skip", ["0"])[0])
+        items: list = self.itemsForFilter(oodFilter)
+        page: list = items[skip : skip + self.pageSize]
+        nextPageLink: str = None
+        if skip + self.pageSize < len(items):
+            nextPageLink = f"{self.endpoint}?{urlsplit(path).query}&$skip={skip + self.pageSize}"
+            nextPageLink = re.sub(r"&\$skip=\d+(?=.*&\$skip=)", "", nextPageLink)
+        return {PricingAPIConstants.KEY_ITEMS: page, PricingAPIConstants.KEY_NEXT_PAGE_LINK: nextPageLink, "Count": len(page)}
+
+    def _failure(self, requestNumber: int, path: str) -> tuple:
+        """returns the (status, headers) of the failure injected for this request, or None"""
+        if self.throttleEvery is not None and requestNumber % self.throttleEvery == 0:
+            return 429, {"Retry-After": self.retryAfter}
+        if self.stallEvery is not None and requestNumber % self.stallEvery == 0:
+            time.sleep(self.stallSeconds)
+        if self.maxUrlBytes is not None and len(f"{self.endpoint}{path[len(self.PATH):]}") > self.maxUrlBytes:
+            return 414, dict()
+        return None
+
+    def respond(self, handler: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.requestCount += 1
+            requestNumber: int = self.requestCount
+        if self.latency > 0:
+            time.sleep(self.latency)
+        failure: tuple = self._failure(requestNumber, handler.path)
+        body: bytes = b""
+        headers: dict = dict()
+        if failure is not None:
+            status, headers = failure
+        else:
+            status = 200
+            body = json.dumps(self.buildResponse(handler.path)).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+            if "gzip" in handler.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(body))
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        if handler.close_connection:
+            handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self._lock:
+            self.bytesSent += len(body)
+
+    def start(self) -> "PricingStubServer":
+        stub = self
+
+        class Server(ThreadingHTTPServer):
+            # the default backlog of 5 drops connection bursts and clients wait for a SYN retransmit
+            request_queue_size = 128
+
+            def process_request(self, request, client_address) -> None:
+                with stub._lock:
+                    stub.connectionCount += 1
+                super().process_request(request, client_address)
+
+            def handle_error(self, request, client_address) -> None:
+                # clients timing out on stalled requests close their socket
+                if not isinstance(sys.exc_info()[1], ConnectionError):
+                    super().handle_error(request, client_address)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                if stub.connectLatency > 0:
+                    time.sleep(stub.connectLatency)
+
+            def do_GET(self) -> None:
+                stub.respond(self)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def resetCounters(self) -> None:
+        with self._lock:
+            self.requestCount = 0
+            self.connectionCount = 0
+            self.bytesSent = 0
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "PricingStubServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
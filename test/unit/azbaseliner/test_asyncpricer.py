@@ -0,0 +1,129 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from azbaseliner.pricing.asyncpricer import AsyncPricingAPIClient
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants, PricingRequestError
+from azbaseliner.pricing.throttling import RequestScheduler, RetryExhaustedError
+
+
+class FakeResponse(object):
+    def __init__(self, status: int, payload: dict = None, headers: dict = None) -> None:
+        self.status: int = status
+        self.headers: dict = headers if headers is not None else dict()
+        self.payload: dict = payload
+
+    async def read(self) -> bytes:
+        return json.dumps(self.payload).encode("utf-8") if self.payload is not None else b""
+
+    async def __aenter__(self) -> "FakeResponse":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+
+class FakeSession(object):
+    """aiohttp like session answering each url with a callback returning a FakeResponse"""
+
+    def __init__(self, answer, delay: float = 0.0) -> None:
+        self.answer = answer
+        self.delay: float = delay
+        self.urls: list = list()
+        self.inFlight: int = 0
+        self.maxInFlight: int = 0
+
+    async def _respond(self, url: str) -> FakeResponse:
+        self.urls.append(url)
+        self.inFlight += 1
+        self.maxInFlight = max(self.maxInFlight, self.inFlight)
+        try:
+            await asyncio.sleep(self.delay)
+            return self.answer(url)
+        finally:
+            self.inFlight -= 1
+
+    def get(self, url: str):
+        session = self
+
+        class Request(object):
+            async def __aenter__(self) -> FakeResponse:
+                return await session._respond(url)
+
+            async def __aexit__(self, *args) -> None:
+                pass
+
+        return Request()
+
+
+class TestAsyncPricing(unittest.IsolatedAsyncioTestCase):
+    regionName: str = "westeurope"
+    currencyCode: str = "EUR"
+    fixtureFilePricingResponse = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+
+    def loadItems(self) -> list:
+        with open(self.fixtureFilePricingResponse) as fin:
+            return json.load(fin)[PricingAPIConstants.KEY_ITEMS]
+
+    def answerFromItems(self, items: list, pageSize: int):
+        # serves the items of the queried meters, pageSize items per page
+        def answer(url: str) -> FakeResponse:
+            base, _, page = url.partition("#page=")
+            page = int(page) if page else 0
+            selected: list = [item for item in items if f"'{item[PricingAPIConstants.KEY_METER_ID]}'" in base]
+            nextPageLink: str = f"{base}#page={page + 1}" if (page + 1) * pageSize < len(selected) else None
+            return FakeResponse(200, {PricingAPIConstants.KEY_ITEMS: selected[page * pageSize : (page + 1) * pageSize], PricingAPIConstants.KEY_NEXT_PAGE_LINK: nextPageLink})
+
+        return answer
+
+    async def test_001_same_records_as_sync_client(self) -> None:
+        items: list = self.loadItems()
+        meterIds: list = list(dict.fromkeys(item[PricingAPIConstants.KEY_METER_ID] for item in items))
+        with patch.object(PricingAPIClient, "_iterItems", return_value=items):
+            expected: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)
+        session = FakeSession(self.answerFromItems(items, pageSize=2), delay=0.01)
+        with patch.object(PricingAPIClient, "queryUrlBudget", None), patch.object(PricingAPIConstants, "MAX_METER_IDS_PER_REQUEST", 1):
+            async with AsyncPricingAPIClient(session=session, maxConcurrency=4) as client:
+                records: list = await client.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)
+        self.assertEqual(repr(records), repr(expected))
+        # one chunk per meter, 3 items per meter over pages of 2 items
+        self.assertEqual(len(session.urls), 2 * len(meterIds))
+        self.assertEqual(session.maxInFlight, len(meterIds))
+
+    async def test_002_rejected_query_is_retried_in_halves(self) -> None:
+        items: list = self.loadItems()
+        meterIds: list = list(dict.fromkeys(item[PricingAPIConstants.KEY_METER_ID] for item in items))
+        answer = self.answerFromItems(items, pageSize=100)
+        session = FakeSession(lambda url: FakeResponse(414) if url.count("meterId eq") > 1 else answer(url))
+        with self.assertLogs(AsyncPricingAPIClient.logger, level="WARNING"):
+            records: list = await AsyncPricingAPIClient(session=session).getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)
+        self.assertEqual([record.meterId for record in records], meterIds)
+
+    async def test_003_throttled_page_is_retried(self) -> None:
+        items: list = self.loadItems()
+        answer = self.answerFromItems(items, pageSize=100)
+        responses: list = [FakeResponse(429, headers={"Retry-After": "0"})]
+        session = FakeSession(lambda url: responses.pop() if responses else answer(url))
+        scheduler = RequestScheduler(maxRetries=1)
+        with self.assertLogs(RequestScheduler.logger, level="WARNING"):
+            records: list = await AsyncPricingAPIClient(session=session, scheduler=scheduler).getOfferMonthlyPriceForMeterIdList(self.regionName, [items[0]["meterId"]], self.currencyCode)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(scheduler.stats.throttledResponses, 1)
+
+    async def test_004_timeouts_and_cancellation(self) -> None:
+        session = FakeSession(lambda url: FakeResponse(200, {PricingAPIConstants.KEY_ITEMS: [], PricingAPIConstants.KEY_NEXT_PAGE_LINK: None}), delay=10)
+        client = AsyncPricingAPIClient(session=session, scheduler=RequestScheduler(maxRetries=0, timeout=0.05))
+        with self.assertRaises(RetryExhaustedError):
+            await client.getOfferMonthlyPriceForMeterIdList(self.regionName, ["A"], self.currencyCode)
+        client = AsyncPricingAPIClient(session=session)
+        with self.assertRaises(asyncio.TimeoutError):
+            await client.getOfferMonthlyPriceForMeterIdList(self.regionName, ["A", "B"], self.currencyCode, timeout=0.05)
+        await asyncio.sleep(0)
+        self.assertEqual(session.inFlight, 0)
+
+    async def test_005_failed_page_raises(self) -> None:
+        session = FakeSession(lambda url: FakeResponse(401))
+        with self.assertRaises(PricingRequestError) as raised:
+            await AsyncPricingAPIClient(session=session).getOfferMonthlyPriceForMeterIdList(self.regionName, ["A"], self.currencyCode)
+        self.assertEqual(raised.exception.statusCode, 401)
@@ -0,0 +1,100 @@
+import csv
+import json
+import math
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import openpyxl
+
+from azbaseliner.baseline.inventory import InventoryReader, MeterDeduplicator
+from azbaseliner.baseline.runner import BaselineRunner, ProgressReporter
+from azbaseliner.baseline.writers import CsvPricingWriter, PricingWriter, XlsxPricingWriter
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.throttling import RequestScheduler
+
+
+class TestBaseline(unittest.TestCase):
+    fixtureFilePricingResponse = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+
+    def setUp(self) -> None:
+        self.tempDir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tempDir.cleanup()
+
+    def pathOf(self, name: str) -> str:
+        return os.path.join(self.tempDir.name, name)
+
+    def writeCsvInventory(self, name: str, rows: list) -> str:
+        path: str = self.pathOf(name)
+        with open(path, "w", newline="") as fout:
+            writer = csv.writer(fout)
+            writer.writerow(["vmName", "regionName", "meterId"])
+            writer.writerows(rows)
+        return path
+
+    def test_001_csv_and_xlsx_inventories_are_read_in_chunks(self) -> None:
+        rows: list = [[f"vm-{i}", "westeurope" if i % 2 else None, f"meter-{i % 3}"] for i in range(7)]
+        csvPath: str = self.writeCsvInventory("inventory.csv", rows)
+        xlsxPath: str = self.pathOf("inventory.xlsx")
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["vmName", "regionName", "meterId"])
+        for row in rows:
+            workbook.active.append(row)
+        workbook.save(xlsxPath)
+        for path in [csvPath, xlsxPath]:
+            frames: list = list(InventoryReader(path, defaultRegion="northeurope", chunkRows=3).iterChunks())
+            self.assertEqual([len(frame) for frame in frames], [3, 3, 1])
+            self.assertEqual(list(frames[0].columns), ["regionName", "meterId"])
+            self.assertEqual(frames[0].values.tolist(), [["northeurope", "meter-0"], ["westeurope", "meter-1"], ["northeurope", "meter-2"]])
+        with self.assertRaises(ValueError):
+            list(InventoryReader(csvPath, regionColumn="region").iterChunks())
+        deduplicator = MeterDeduplicator()
+        pairs: list = [pair for frame in InventoryReader(csvPath, regionColumn="region", defaultRegion="westeurope", chunkRows=2).iterChunks() for pair in deduplicator.newPairs(frame)]
+        self.assertEqual(pairs, [("westeurope", "meter-0"), ("westeurope", "meter-1"), ("westeurope", "meter-2")])
+
+    def test_002_writers_round_trip(self) -> None:
+        records: list = [MonthlyPlanPricing("A", "westeurope", "EUR", 1.0, 2.0, 3.0, 4.0, 5.0), MonthlyPlanPricing("B", "westeurope", "EUR", paygo=10.0)]
+        with PricingWriter.open(self.pathOf("prices.csv")) as writer:
+            self.assertIsInstance(writer, CsvPricingWriter)
+            writer.write(records[:1])
+            writer.write(records[1:])
+        with open(self.pathOf("prices.csv")) as fin:
+            rows: list = list(csv.reader(fin))
+        self.assertEqual(rows[0], list(PricingWriter.COLUMNS))
+        self.assertEqual(rows[2], ["B", "westeurope", "EUR", "", "", "", "", "10.0"])
+        with PricingWriter.open(self.pathOf("prices.xlsx")) as writer:
+            self.assertIsInstance(writer, XlsxPricingWriter)
+            writer.write(records)
+        rows = list(openpyxl.load_workbook(self.pathOf("prices.xlsx"), read_only=True).active.iter_rows(values_only=True))
+        self.assertEqual(rows[1], ("A", "westeurope", "EUR", 1, 2, 3, 4, 5))
+        self.assertEqual(rows[2][3:], (None, None, None, None, 10))
+        with self.assertRaises(ValueError):
+            PricingWriter.open(self.pathOf("prices.json"))
+
+    def test_003_runner_prices_unique_meters_by_batch(self) -> None:
+        with open(self.fixtureFilePricingResponse) as fin:
+            items: list = json.load(fin)[PricingAPIConstants.KEY_ITEMS]
+        meterIds: list = list(dict.fromkeys(item[PricingAPIConstants.KEY_METER_ID] for item in items))
+        rows: list = [[f"vm-{i}", "westeurope", meterIds[i % len(meterIds)]] for i in range(10)] + [["vm-unknown", "westeurope", "unknown"]]
+        reader = InventoryReader(self.writeCsvInventory("inventory.csv", rows), chunkRows=4)
+        urls: list = list()
+
+        def serveItems(url: str, scheduler: RequestScheduler = None) -> list:
+            urls.append(url)
+            return [item for item in items if f"'{item[PricingAPIConstants.KEY_METER_ID]}'" in url]
+
+        with patch.object(PricingAPIClient, "_iterItems", side_effect=serveItems), patch.object(PricingAPIClient, "cache", None):
+            with CsvPricingWriter(self.pathOf("prices.csv")) as writer:
+                stats = BaselineRunner(reader, writer, workers=2, batchSize=2, progress=ProgressReporter(intervalSeconds=0)).run()
+            # one query per batch
+            self.assertEqual(len(urls), stats.batches)
+            expected: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList("westeurope", meterIds, "EUR")
+        self.assertEqual((stats.rowsRead, stats.uniqueMeters, stats.metersPriced, stats.recordsWritten), (11, len(meterIds) + 1, len(meterIds) + 1, len(meterIds)))
+        self.assertEqual(stats.batches, math.ceil((len(meterIds) + 1) / 2))
+        with open(self.pathOf("prices.csv")) as fin:
+            rows = list(csv.DictReader(fin))
+        self.assertEqual([row["meterId"] for row in rows], meterIds)
+        self.assertEqual([float(row["paygo"]) for row in rows], [record.paygo for record in expected])
@@ -0,0 +1,134 @@
+import math
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from azbaseliner.pricing.cache import MemoryPriceCache, SqlitePriceCache, TieredPriceCache
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIClient
+
+
+class FakeClock(object):
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestPriceCache(unittest.TestCase):
+    regionName: str = "westeurope"
+    currencyCode: str = "EUR"
+
+    def buildRecord(self, meterId: str) -> MonthlyPlanPricing:
+        return MonthlyPlanPricing(meterId=meterId, regionName=self.regionName, currency=self.currencyCode, ri3y=1.0, ri1y=2.0, sp3y=3.0)
+
+    def setUp(self) -> None:
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.dbPath: str = os.path.join(self.tempDir.name, "prices.db")
+
+    def tearDown(self) -> None:
+        self.tempDir.cleanup()
+
+    def test_001_memory_cache_hit_miss_and_lru_eviction(self) -> None:
+        cache = MemoryPriceCache(maxSize=2)
+        cache.putMany([self.buildRecord("A"), self.buildRecord("B")])
+        self.assertIsNotNone(cache.get(self.regionName, self.currencyCode, "A"))
+        cache.put(self.buildRecord("C"))
+        self.assertIsNone(cache.get(self.regionName, self.currencyCode, "B"))
+        self.assertIsNone(cache.get("northeurope", self.currencyCode, "A"))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 2)
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_002_memory_cache_ttl(self) -> None:
+        clock = FakeClock()
+        cache = MemoryPriceCache(ttlSeconds=60, clock=clock)
+        cache.put(self.buildRecord("A"))
+        clock.now += 61
+        self.assertIsNone(cache.get(self.regionName, self.currencyCode, "A"))
+        self.assertEqual(cache.stats.expirations, 1)
+
+    def test_003_sqlite_cache_persists_nan_and_evicts(self) -> None:
+        clock = FakeClock()
+        cache = SqlitePriceCache(self.dbPath, maxSize=2, clock=clock)
+        for meterId in ["A", "B", "C"]:
+            clock.now += 1
+            cache.put(self.buildRecord(meterId))
+        self.assertEqual(len(cache), 2)
+        cache.close()
+        reopened = SqlitePriceCache(self.dbPath, maxSize=2, clock=clock)
+        self.assertIsNone(reopened.get(self.regionName, self.currencyCode, "A"))
+        record: MonthlyPlanPricing = reopened.get(self.regionName, self.currencyCode, "C")
+        self.assertEqual(record.sp3y, 3.0)
+        self.assertTrue(math.isnan(record.sp1y))
+        reopened.close()
+
+    def test_004_tiered_cache_promotes_persistent_hits(self) -> None:
+        persistent = SqlitePriceCache(self.dbPath)
+        persistent.put(self.buildRecord("A"))
+        memory = MemoryPriceCache()
+        cache = TieredPriceCache(memory, persistent)
+        self.assertIsNotNone(cache.get(self.regionName, self.currencyCode, "A"))
+        self.assertEqual(len(memory), 1)
+        persistent.close()
+
+    def test_005_client_only_queries_missing_meter_ids(self) -> None:
+        cache = MemoryPriceCache()
+        cache.put(self.buildRecord("A"))
+        fetched: list = [self.buildRecord("B"), self.buildRecord("C")]
+        with patch.object(PricingAPIClient, "cache", cache), patch.object(PricingAPIClient, "_fetchPricingRecords", return_value=fetched) as mockedMethod:
+            prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, ["C", "A", "B", "A"], self.currencyCode)
+            self.assertEqual(mockedMethod.call_args.args[1], ["C", "B"])
+            self.assertEqual([p.meterId for p in prices], ["C", "A", "B"])
+            PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, ["A", "B", "C"], self.currencyCode)
+            self.assertEqual(mockedMethod.call_count, 1)
+        self.assertEqual(cache.stats.hits, 4)
+
+    def test_006_sqlite_cache_batches_run_in_one_transaction(self) -> None:
+        clock = FakeClock()
+        cache = SqlitePriceCache(self.dbPath, maxSize=1500, ttlSeconds=60, clock=clock)
+        statements: list = list()
+        cache._connection.set_trace_callback(statements.append)
+        cache.putMany([self.buildRecord(f"meter-{i:04d}") for i in range(2000)])
+        self.assertEqual(len(cache), 1500)
+        self.assertEqual(cache.stats.evictions, 500)
+        # the executemany inserts are traced row by row, every other statement runs once per batch
+        self.assertEqual(sum(statement.startswith("INSERT") for statement in statements), 2000)
+        self.assertLess(sum(not statement.startswith("INSERT") for statement in statements), 20)
+        self.assertEqual(sum(statement == "COMMIT" for statement in statements), 1)
+        statements.clear()
+        meterIds: list = [f"meter-{i:04d}" for i in reversed(range(2000))]
+        cached, missing = cache.getMany(self.regionName, self.currencyCode, meterIds)
+        self.assertEqual(list(cached.keys()), meterIds[:1500])
+        self.assertEqual(missing, meterIds[1500:])
+        self.assertLess(len(statements), 20)
+        self.assertEqual(sum(statement == "COMMIT" for statement in statements), 1)
+        # replacing stored rows does not change the row count
+        cache.putMany([self.buildRecord("meter-1999"), self.buildRecord("meter-1999")])
+        self.assertEqual(len(cache), 1500)
+        clock.now += 61
+        cached, missing = cache.getMany(self.regionName, self.currencyCode, meterIds[:10])
+        self.assertEqual((len(cached), len(missing), cache.stats.expirations), (0, 10, 10))
+        self.assertEqual(len(cache), 1490)
+        cache.close()
+        reopened = SqlitePriceCache(self.dbPath, maxSize=1500)
+        self.assertEqual(len(reopened), 1490)
+        reopened.close()
+
+    def test_007_tiered_cache_promotion_keeps_the_record_age(self) -> None:
+        clock = FakeClock()
+        persistent = SqlitePriceCache(self.dbPath, ttlSeconds=100, clock=clock)
+        persistent.putMany([self.buildRecord("A"), self.buildRecord("B")])
+        clock.now += 80
+        cache = TieredPriceCache(MemoryPriceCache(ttlSeconds=100, clock=clock), persistent)
+        self.assertIsNotNone(cache.get(self.regionName, self.currencyCode, "A"))
+        cached, _ = cache.getMany(self.regionName, self.currencyCode, ["B"])
+        self.assertEqual(list(cached.keys()), ["B"])
+        # both records were stored 180 seconds ago, promotion to memory does not restart their ttl
+        clock.now += 100
+        cached, missing = cache.getMany(self.regionName, self.currencyCode, ["A", "B"])
+        self.assertEqual((cached, missing), (dict(), ["A", "B"]))
+        self.assertIsNone(cache.get(self.regionName, self.currencyCode, "A"))
+        persistent.close()
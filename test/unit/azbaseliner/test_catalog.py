@@ -0,0 +1,78 @@
+import json
+import math
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from azbaseliner.pricing.catalog import PriceCatalog
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIClient, PricingAPIConstants
+
+
+class TestPriceCatalog(unittest.TestCase):
+    regionName: str = "westeurope"
+    currencyCode: str = "EUR"
+    fixtureFilePricingResponse = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+    meterA: str = "f1a44e37-1c48-567c-a0e0-b55263ef5ceb"
+    meterB: str = "ef8e981f-27ae-50ae-9145-a36ec129424e"
+
+    def downloadFixtureCatalog(self) -> PriceCatalog:
+        with open(self.fixtureFilePricingResponse) as fin:
+            fixture = json.load(fin)
+        with patch.object(PricingAPIClient, "_iterItems", return_value=fixture[PricingAPIConstants.KEY_ITEMS]) as mockedMethod:
+            catalog: PriceCatalog = PriceCatalog.download(self.regionName, self.currencyCode)
+            self.assertIn("serviceFamily eq 'Compute'", mockedMethod.call_args.args[0])
+        return catalog
+
+    def test_001_download_builds_indexed_catalog(self) -> None:
+        catalog: PriceCatalog = self.downloadFixtureCatalog()
+        self.assertEqual(len(catalog), 2)
+        self.assertIn(self.meterA, catalog)
+        record: MonthlyPlanPricing = catalog.get(self.meterB)
+        self.assertEqual((record.ri3y, record.ri1y, record.sp3y, record.sp1y), (34.66, 53.8, 43.4, 62.19))
+        self.assertIsNone(catalog.get("unknown"))
+
+    def test_002_save_and_load_memory_mapped(self) -> None:
+        catalog: PriceCatalog = PriceCatalog.fromRecords(self.regionName, self.currencyCode, [MonthlyPlanPricing("A", self.regionName, self.currencyCode, ri3y=1.5)])
+        with tempfile.TemporaryDirectory() as path:
+            catalog.save(path)
+            loaded: PriceCatalog = PriceCatalog.load(path)
+            self.assertIsInstance(loaded.prices, np.memmap)
+            record: MonthlyPlanPricing = loaded.get("A")
+            self.assertEqual(record.ri3y, 1.5)
+            self.assertTrue(math.isnan(record.paygo))
+            self.assertEqual((loaded.regionName, loaded.currencyCode), (self.regionName, self.currencyCode))
+
+    def test_003_client_resolves_from_catalog_without_network(self) -> None:
+        catalog: PriceCatalog = self.downloadFixtureCatalog()
+        fetched: list = [MonthlyPlanPricing("C", self.regionName, self.currencyCode)]
+        with patch.object(PricingAPIClient, "catalogs", dict()), patch.object(PricingAPIClient, "_fetchPricingRecords", return_value=fetched) as mockedMethod:
+            PricingAPIClient.registerCatalog(catalog)
+            prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, [self.meterA, self.meterB], self.currencyCode)
+            self.assertEqual(mockedMethod.call_count, 0)
+            self.assertEqual([p.meterId for p in prices], [self.meterA, self.meterB])
+            prices = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, ["C", self.meterA], self.currencyCode)
+            self.assertEqual(mockedMethod.call_args.args[1], ["C"])
+            self.assertEqual([p.meterId for p in prices], ["C", self.meterA])
+
+    def test_004_meter_ids_are_saved_sorted_and_binary_searched(self) -> None:
+        records: list = [MonthlyPlanPricing(meterId, self.regionName, self.currencyCode, paygo=float(i)) for i, meterId in enumerate(["C", "A", "BB", "B"])]
+        with tempfile.TemporaryDirectory() as path:
+            PriceCatalog.fromRecords(self.regionName, self.currencyCode, records).save(path)
+            loaded: PriceCatalog = PriceCatalog.load(path)
+            self.assertIsInstance(loaded.meterIds, np.memmap)
+            self.assertEqual(loaded.meterIds.tolist(), [b"A", b"B", b"BB", b"C"])
+            found, missing = loaded.getMany(["BB", "unknown", "C", "A", "BB", "CC", ""])
+            self.assertEqual({meterId: record.paygo for meterId, record in found.items()}, {"BB": 2.0, "C": 0.0, "A": 1.0})
+            self.assertEqual(missing, ["unknown", "CC", ""])
+            # catalogs saved unsorted are sorted once loaded
+            np.save(f"{path}/{PriceCatalog.FILE_METER_IDS}", np.array([b"C", b"A", b"BB", b"B"]))
+            np.save(f"{path}/{PriceCatalog.FILE_PRICES}", np.array([[float(i)] * len(PriceCatalog.PRICE_COLUMNS) for i in range(4)]))
+            with open(f"{path}/{PriceCatalog.FILE_METADATA}") as fin:
+                metadata: dict = json.load(fin)
+            del metadata["sortedMeterIds"]
+            with open(f"{path}/{PriceCatalog.FILE_METADATA}", "w") as fout:
+                json.dump(metadata, fout)
+            self.assertEqual(PriceCatalog.load(path).get("B").paygo, 3.0)
+        self.assertEqual(PriceCatalog.fromRecords(self.regionName, self.currencyCode, []).getMany(["A"]), (dict(), ["A"]))
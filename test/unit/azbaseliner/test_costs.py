@@ -0,0 +1,67 @@
+import math
+import unittest
+
+import pandas as pd
+
+from azbaseliner.baseline.costs import FleetCostEngine
+from azbaseliner.pricing.pricer import MonthlyPlanPricing
+from azbaseliner.pricing.table import PricingTable
+
+
+class TestFleetCostEngine(unittest.TestCase):
+    def buildRecords(self) -> list:
+        return [
+            MonthlyPlanPricing("A", "westeurope", "EUR", 50.0, 70.0, 60.0, 80.0, 100.0),
+            MonthlyPlanPricing("B", "westeurope", "EUR", paygo=20.0),
+            MonthlyPlanPricing("A", "northeurope", "EUR", ri1y=30.0, paygo=40.0),
+        ]
+
+    def buildInventory(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "vmName": ["vm-1", "vm-2", "vm-3", "vm-4", "vm-5"],
+                "regionName": ["westeurope", "westeurope", "northeurope", "northeurope", "westeurope"],
+                "meterId": ["A", "B", "A", "C", "A"],
+                "quantity": ["2", None, 1, 1, 1],
+                "hours": [730, 365, 100, 730, None],
+            }
+        )
+
+    def test_001_vm_costs_and_best_plan(self) -> None:
+        with self.assertLogs(FleetCostEngine.logger, level="WARNING"):
+            vmCosts: pd.DataFrame = FleetCostEngine.computeVmCosts(self.buildInventory(), self.buildRecords())
+        self.assertEqual(vmCosts["vmName"].tolist(), ["vm-1", "vm-2", "vm-3", "vm-4", "vm-5"])
+        # commitments are billed for the month, paygo for the hours used
+        self.assertEqual(vmCosts.loc[0, FleetCostEngine.COST_COLUMNS].tolist(), [100.0, 140.0, 120.0, 160.0, 200.0])
+        self.assertEqual(vmCosts.loc[1, "paygoCost"], 10.0)
+        self.assertEqual(vmCosts[FleetCostEngine.COLUMN_BEST_PLAN].tolist()[:3], ["ri3y", "paygo", "paygo"])
+        self.assertEqual(vmCosts[FleetCostEngine.COLUMN_SAVINGS].tolist()[:3], [100.0, 0.0, 0.0])
+        # no offer at all for meter C
+        self.assertTrue(pd.isna(vmCosts.loc[3, FleetCostEngine.COLUMN_BEST_PLAN]))
+        self.assertTrue(math.isnan(vmCosts.loc[3, FleetCostEngine.COLUMN_BEST_COST]))
+        self.assertTrue(math.isnan(vmCosts.loc[3, FleetCostEngine.COLUMN_SAVINGS]))
+        table: PricingTable = PricingTable.fromRecords(self.buildRecords() + [MonthlyPlanPricing("A", "westeurope", "USD", paygo=1.0)])
+        with self.assertRaises(ValueError):
+            FleetCostEngine.computeVmCosts(self.buildInventory(), table)
+        with self.assertLogs(FleetCostEngine.logger, level="WARNING"):
+            fromTable: pd.DataFrame = FleetCostEngine.computeVmCosts(self.buildInventory(), table, currencyCode="EUR")
+        pd.testing.assert_frame_equal(fromTable, vmCosts)
+
+    def test_002_roll_ups_skip_missing_offers(self) -> None:
+        with self.assertLogs(FleetCostEngine.logger, level="WARNING"):
+            vmCosts: pd.DataFrame = FleetCostEngine.computeVmCosts(self.buildInventory(), self.buildRecords())
+        perRegion: pd.DataFrame = FleetCostEngine.rollUp(vmCosts)
+        self.assertEqual(perRegion.index.tolist(), ["westeurope", "northeurope"])
+        westeurope: pd.Series = perRegion.loc["westeurope"]
+        self.assertEqual((westeurope[FleetCostEngine.COLUMN_VM_COUNT], westeurope["quantity"], westeurope[FleetCostEngine.COLUMN_UNPRICED]), (3, 4.0, 0))
+        self.assertEqual((westeurope["ri3yCost"], westeurope["paygoCost"], westeurope[FleetCostEngine.COLUMN_BEST_COST]), (150.0, 310.0, 160.0))
+        self.assertAlmostEqual(westeurope[FleetCostEngine.COLUMN_SAVINGS_RATIO], 150.0 / 310.0)
+        # only paygo prices every vm of the region
+        self.assertEqual(westeurope[FleetCostEngine.COLUMN_BEST_UNIFORM_PLAN], "paygo")
+        northeurope: pd.Series = perRegion.loc["northeurope"]
+        self.assertTrue(math.isnan(northeurope["ri3yCost"]))
+        self.assertEqual((northeurope["ri1yCost"], northeurope[FleetCostEngine.COLUMN_UNPRICED]), (30.0, 1))
+        self.assertEqual(northeurope[FleetCostEngine.COLUMN_BEST_UNIFORM_PLAN], "paygo")
+        totals: pd.Series = FleetCostEngine.totals(vmCosts)
+        self.assertEqual((totals[FleetCostEngine.COLUMN_VM_COUNT], totals[FleetCostEngine.COLUMN_SAVINGS]), (5, 150.0))
+        self.assertAlmostEqual(totals["bestCost"], perRegion[FleetCostEngine.COLUMN_BEST_COST].sum())
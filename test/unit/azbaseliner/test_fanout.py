@@ -0,0 +1,77 @@
+import json
+import unittest
+import unittest.mock
+from unittest.mock import patch
+
+from azbaseliner.pricing.fanout import PricingFanOut
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.throttling import RequestScheduler
+
+
+class FakeClock(object):
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestPricingFanOut(unittest.TestCase):
+    def fakeChunkFetch(self, regionName: str, currencyCode: str, meterIds: list, scheduler: RequestScheduler = None) -> dict:
+        items: dict = dict()
+        for meterId in meterIds:
+            item = {
+                PricingAPIConstants.KEY_METER_ID: meterId,
+                PricingAPIConstants.KEY_SERVICE_FAMILY: PricingAPIConstants.VALUE_COMPUTE,
+                PricingAPIConstants.KEY_TYPE: PricingAPIConstants.KEY_CONSUMPTION,
+                PricingAPIConstants.KEY_RETAIL_PRICE: 1.0 if currencyCode == "EUR" else 2.0,
+            }
+            items[meterId] = [item]
+        return items
+
+    def test_001_dedup_requests(self) -> None:
+        requests: list = [("westeurope", "EUR", ["A", "B"]), ("westeurope", "EUR", ["B", "C"]), ("westeurope", "USD", ["A"])]
+        self.assertEqual(PricingFanOut.dedupRequests(requests), {("westeurope", "EUR"): ["A", "B", "C"], ("westeurope", "USD"): ["A"]})
+
+    def test_002_fan_out_indexes_results_by_region_and_currency(self) -> None:
+        meterIds: list = [f"meter-{i}" for i in range(45)]
+        requests: list = [(region, currency, meterIds) for region in ["westeurope", "northeurope"] for currency in ["EUR", "USD"]]
+        requests.append(("westeurope", "EUR", meterIds[:10]))
+        with patch.object(PricingAPIClient, "queryUrlBudget", None), patch.object(PricingAPIClient, "_fetchRecordsForMeterIdChunk", side_effect=self.fakeChunkFetch) as mockedMethod:
+            results: dict = PricingFanOut.getOfferMonthlyPrices(requests, maxConcurrency=4, maxRequestsPerSecond=1000)
+            # 4 pairs of 45 meters, 3 chunks each, the duplicate request adds no call
+            self.assertEqual(mockedMethod.call_count, 12)
+        self.assertEqual(sorted(results.keys()), ["northeurope", "westeurope"])
+        for region in results:
+            for currency, prices in results[region].items():
+                self.assertEqual([p.meterId for p in prices], meterIds)
+                self.assertTrue(all(p.regionName == region and p.currency == currency for p in prices))
+        self.assertEqual(results["northeurope"]["USD"][0].paygo, 1460.0)
+
+    def test_003_rate_limit_applies_to_every_page(self) -> None:
+        clock = FakeClock()
+        pageCount: int = 4
+
+        def get(url: str, timeout: float):
+            page: int = int(url.rsplit("page=", 1)[1]) if "page=" in url else 0
+            nextPageLink: str = f"https://next?page={page + 1}" if page + 1 < pageCount else None
+            item: dict = self.fakeChunkFetch("westeurope", "EUR", [f"meter-{page}"])[f"meter-{page}"][0]
+            payload: dict = {PricingAPIConstants.KEY_ITEMS: [item], PricingAPIConstants.KEY_NEXT_PAGE_LINK: nextPageLink}
+            return unittest.mock.Mock(status_code=200, ok=True, headers=dict(), content=json.dumps(payload).encode("utf-8"))
+
+        session = unittest.mock.Mock()
+        session.get.side_effect = get
+        scheduler: RequestScheduler = RequestScheduler(clock=clock, sleep=clock.sleep)
+        with patch.object(PricingAPIClient, "scheduler", scheduler), patch.object(PricingAPIClient, "session", session), patch.object(PricingAPIClient, "cache", None):
+            results: dict = PricingFanOut.getOfferMonthlyPrices([("westeurope", "EUR", [f"meter-{i}" for i in range(pageCount)])], maxRequestsPerSecond=1)
+        self.assertEqual(session.get.call_count, pageCount)
+        self.assertEqual(len(results["westeurope"]["EUR"]), pageCount)
+        # one token of burst then one per second, the next pages wait for theirs like the first one
+        self.assertAlmostEqual(clock.now, pageCount - 1)
+        # the limit only applied to the call, the shared scheduler is left as is
+        self.assertIsNone(scheduler.rateLimiter)
+        self.assertEqual(scheduler.stats.requests, 0)
+        self.assertIsNone(PricingAPIClient.scheduler.rateLimiter)
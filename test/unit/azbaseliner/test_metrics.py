@@ -0,0 +1,65 @@
+import json
+import time
+import unittest
+import unittest.mock
+from unittest.mock import patch
+
+from azbaseliner.pricing.metrics import CallProfiler, MetricsConstants, MetricsRegistry
+from azbaseliner.pricing.pricer import PricingAPIClient
+
+
+class TestMetrics(unittest.TestCase):
+    regionName: str = "westeurope"
+    currencyCode: str = "EUR"
+    fixtureFilePricingResponse = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+    meterIdList = ["f1a44e37-1c48-567c-a0e0-b55263ef5ceb", "ef8e981f-27ae-50ae-9145-a36ec129424e"]
+
+    def test_001_registry_counters_histograms_and_subscribers(self) -> None:
+        registry = MetricsRegistry()
+        received: list = list()
+        registry.subscribe(lambda name, value: received.append(name))
+        registry.increment("requests")
+        registry.increment("requests", 2)
+        for value in range(1, 101):
+            registry.observe("size", value)
+        snapshot: dict = registry.snapshot()
+        self.assertEqual(snapshot["counters"]["requests"], 3)
+        self.assertEqual(snapshot["histograms"]["size"]["count"], 100)
+        self.assertEqual(snapshot["histograms"]["size"]["p50"], 51)
+        self.assertEqual(snapshot["histograms"]["size"]["p99"], 100)
+        self.assertEqual(len(received), 102)
+
+    def test_002_nested_timers_record_self_time(self) -> None:
+        registry = MetricsRegistry()
+        with registry.timer("outer"):
+            with registry.timer("inner"):
+                time.sleep(0.05)
+        histograms: dict = registry.snapshot()["histograms"]
+        self.assertGreaterEqual(histograms["inner"]["total"], 0.05)
+        self.assertLess(histograms["outer"]["total"], 0.04)
+
+    def test_003_client_records_each_phase(self) -> None:
+        with open(self.fixtureFilePricingResponse) as fin:
+            content: bytes = fin.read().encode("utf-8")
+        response = unittest.mock.Mock(status_code=200, ok=True, content=content)
+        response.json = lambda: json.loads(content)
+        session = unittest.mock.Mock()
+        session.get.return_value = response
+        registry = MetricsRegistry()
+        profiler = CallProfiler(every=2)
+        with patch.object(PricingAPIClient, "session", session), patch.object(PricingAPIClient, "metrics", registry), patch.object(PricingAPIClient, "profiler", profiler):
+            for _ in range(3):
+                prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, self.meterIdList, self.currencyCode)
+        self.assertEqual(len(prices), 2)
+        snapshot: dict = registry.snapshot()
+        self.assertEqual(snapshot["counters"][MetricsConstants.REQUESTS], 3)
+        self.assertEqual(snapshot["counters"][MetricsConstants.PARSED_METERS], 6)
+        histograms: dict = snapshot["histograms"]
+        self.assertEqual(histograms[MetricsConstants.REQUEST_BYTES]["total"], 3 * len(content))
+        self.assertEqual(histograms[MetricsConstants.PAGES_PER_QUERY]["max"], 1)
+        self.assertEqual(histograms[MetricsConstants.ITEMS_PER_PAGE]["max"], 6)
+        for name in [MetricsConstants.REQUEST_SECONDS, MetricsConstants.DECODE_SECONDS, MetricsConstants.GROUP_SECONDS, MetricsConstants.PARSE_SECONDS]:
+            self.assertEqual(histograms[name]["count"], 3)
+        # calls 1 and 3 are sampled
+        self.assertEqual(profiler.calls, 3)
+        self.assertIn("_parseItemsForMeterId", profiler.report())
@@ -1,9 +1,12 @@
 import unittest
 import json
 import math
+import subprocess
+import sys
 import unittest.mock
 from unittest.mock import patch
-from azbaseliner.pricing.pricer import PricingAPIClient, MonthlyPlanPricing, PricingAPIConstants
+from azbaseliner.pricing.pricer import PricingAPIClient, MonthlyPlanPricing, PricingAPIConstants, PricingQueryRejectedError
+from azbaseliner.pricing.throttling import RequestScheduler
 
 
 class TestPricing(unittest.TestCase):
@@ -50,7 +53,7 @@ class TestPricing(unittest.TestCase):
 
     def test_005_get_offer_monthly_price_for_meter_id_list_with_http_mocked(self) -> None:
         # mock the http call return with a json fixture
-        with patch.object(PricingAPIClient, "_execCallAndReturnItems") as mockedMethod:
+        with patch.object(PricingAPIClient, "_iterItems") as mockedMethod:
             fixture = self.loadJsonFile(self.fixtureFilePricingResponse)
             mockedMethod.return_value = fixture[PricingAPIConstants.KEY_ITEMS]
             # perform the test with patched method
@@ -75,3 +78,105 @@ class TestPricing(unittest.TestCase):
                     self.assertEqual(price.ri1y, 179.37)
                     self.assertEqual(price.sp3y, 166.87)
                     self.assertEqual(price.sp1y, 232.43)
+
+    def synthesizeItemsForUrl(self, url: str, scheduler: RequestScheduler = None) -> list:
+        # returns the fixture items of the first meter, renamed after each meter id found in the url filter
+        template = self.loadJsonFile(f"test/unit/azbaseliner/fixtures/items.meterid.{self.meterIdList[0]}.json")
+        items: list = list()
+        for token in url.split("meterId eq '")[1:]:
+            meterId = token.split("'")[0]
+            items = items + [dict(item, meterId=meterId) for item in template]
+        return items
+
+    def test_006_get_offer_monthly_price_concurrent_matches_serial(self) -> None:
+        meterIds = [f"meter-{i:04d}" for i in range(95)]
+        # fixed chunks of MAX_METER_IDS_PER_REQUEST
+        with patch.object(PricingAPIClient, "queryUrlBudget", None), patch.object(PricingAPIClient, "_iterItems") as mockedMethod:
+            mockedMethod.side_effect = self.synthesizeItemsForUrl
+            serial: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)
+            self.assertEqual(mockedMethod.call_count, 5)
+            concurrent: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode, maxConcurrency=4)
+            self.assertEqual(mockedMethod.call_count, 10)
+        self.assertEqual(len(concurrent), len(meterIds))
+        self.assertEqual([p.meterId for p in concurrent], [p.meterId for p in serial])
+        for s, c in zip(serial, concurrent):
+            self.assertEqual((s.ri3y, s.ri1y, s.sp3y, s.sp1y), (c.ri3y, c.ri1y, c.sp3y, c.sp1y))
+
+    def test_007_pagination_is_iterative_and_lazy(self) -> None:
+        pageCount = 1500
+        pages = {f"page-{i}": {PricingAPIConstants.KEY_ITEMS: [{"index": i}], PricingAPIConstants.KEY_NEXT_PAGE_LINK: f"page-{i + 1}" if i + 1 < pageCount else None} for i in range(pageCount)}
+        with patch.object(PricingAPIClient, "_fetchPage") as mockedMethod:
+            mockedMethod.side_effect = pages.get
+            itemIterator = PricingAPIClient._iterItems("page-0")
+            self.assertEqual(next(itemIterator), {"index": 0})
+            self.assertEqual(mockedMethod.call_count, 1)
+            # deeper than the default recursion limit
+            items: list = PricingAPIClient._execCallAndReturnItems("page-0")
+            self.assertEqual([item["index"] for item in items], list(range(pageCount)))
+
+    def test_008_session_is_shared_and_configurable(self) -> None:
+        with patch.object(PricingAPIClient, "session", None):
+            session = PricingAPIClient._getSession()
+            self.assertIs(PricingAPIClient._getSession(), session)
+            self.assertEqual(session.get_adapter(PricingAPIConstants.API_ENDPOINT)._pool_maxsize, PricingAPIConstants.DEFAULT_CONNECTION_POOL_SIZE)
+            self.assertIn("gzip", session.headers[PricingAPIConstants.HEADER_ACCEPT_ENCODING])
+            PricingAPIClient.configureSession(poolSize=4, keepAlive=False, gzip=False)
+            self.assertIsNot(PricingAPIClient.session, session)
+            self.assertEqual(PricingAPIClient.session.get_adapter(PricingAPIConstants.API_ENDPOINT)._pool_maxsize, 4)
+            self.assertEqual(PricingAPIClient.session.headers[PricingAPIConstants.HEADER_CONNECTION], "close")
+            PricingAPIClient.session.close()
+
+    def test_009_meter_ids_are_packed_within_url_budget(self) -> None:
+        meterIds = [f"{i:08d}-1c48-567c-a0e0-b55263ef5ceb" for i in range(200)]
+        for budget in [512, 2048, 8192]:
+            with patch.object(PricingAPIClient, "queryUrlBudget", budget):
+                chunks: list = PricingAPIClient._planMeterIdChunks(self.regionName, self.currencyCode, meterIds)
+            self.assertEqual([meterId for chunk in chunks for meterId in chunk], meterIds)
+            for chunk in chunks:
+                url = f"{PricingAPIClient._buildQueryUrl(self.currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={PricingAPIClient._buildQueryFilter(self.regionName, chunk)}"
+                self.assertLessEqual(PricingAPIClient._encodedLength(url), budget - PricingAPIConstants.QUERY_URL_PAGING_HEADROOM_BYTES)
+            # a chunk is only closed when the next meter id does not fit
+            for chunk, nextChunk in zip(chunks, chunks[1:]):
+                url = f"{PricingAPIClient._buildQueryUrl(self.currencyCode)}&{PricingAPIConstants.QUERY_FILTER}={PricingAPIClient._buildQueryFilter(self.regionName, chunk + nextChunk[:1])}"
+                self.assertGreater(PricingAPIClient._encodedLength(url), budget - PricingAPIConstants.QUERY_URL_PAGING_HEADROOM_BYTES)
+
+    def test_010_rejected_query_is_retried_in_halves(self) -> None:
+        meterIds = [f"meter-{i:04d}" for i in range(8)]
+
+        def rejectLargeQueries(url: str, scheduler: RequestScheduler = None) -> list:
+            if url.count("meterId eq") > 3:
+                raise PricingQueryRejectedError(url, 414)
+            return self.synthesizeItemsForUrl(url)
+
+        with patch.object(PricingAPIClient, "_iterItems", side_effect=rejectLargeQueries) as mockedMethod:
+            prices: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)
+            # 8 rejected, 2x4 rejected, 4x2 accepted
+            self.assertEqual(mockedMethod.call_count, 7)
+        self.assertEqual(sorted(p.meterId for p in prices), meterIds)
+
+    def test_011_grouping_appends_and_keeps_pricing_fields(self) -> None:
+        fixture = self.loadJsonFile(self.fixtureFilePricingResponseItems)
+        mapPerMeterId: dict = dict()
+        PricingAPIClient._groupRecordsByMeterId(fixture[:3], mapPerMeterId, PricingAPIConstants.PRICING_ITEM_FIELDS)
+        self.assertIs(PricingAPIClient._groupRecordsByMeterId(fixture[3:], mapPerMeterId, PricingAPIConstants.PRICING_ITEM_FIELDS), mapPerMeterId)
+        for meterId in self.meterIdList:
+            self.assertEqual(len(mapPerMeterId[meterId]), 3)
+            for item in mapPerMeterId[meterId]:
+                self.assertTrue(set(item.keys()) <= set(PricingAPIConstants.PRICING_ITEM_FIELDS))
+            # projected items price exactly like the full ones
+            fullItems: list = [item for item in fixture if item[PricingAPIConstants.KEY_METER_ID] == meterId]
+            self.assertEqual(
+                repr(PricingAPIClient._parseItemsForMeterId(meterId, self.regionName, self.currencyCode, mapPerMeterId[meterId])),
+                repr(PricingAPIClient._parseItemsForMeterId(meterId, self.regionName, self.currencyCode, fullItems)),
+            )
+
+    def test_012_import_defers_the_http_stack(self) -> None:
+        # a fresh interpreter, the test process has already loaded everything
+        script: str = (
+            "import sys\n"
+            "from azbaseliner.pricing.pricer import PricingAPIClient\n"
+            "PricingAPIClient._parseItemsForMeterId('A', 'westeurope', 'EUR', [])\n"
+            "print(','.join(name for name in ('requests', 'asyncio', 'cProfile', 'orjson') if name in sys.modules))\n"
+        )
+        completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+        self.assertEqual(completed.stdout.strip(), "")
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from azbaseliner.pricing.cache import MemoryPriceCache, SqlitePriceCache
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.refresh import IncrementalPriceRefresher
+from azbaseliner.pricing.throttling import RequestScheduler
+
+
+class FakeCalendar(object):
+    def __init__(self) -> None:
+        self.now: datetime = datetime(2023, 5, 1, 1, 0, tzinfo=timezone.utc)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class TestIncrementalRefresh(unittest.TestCase):
+    regionName: str = "westeurope"
+    currencyCode: str = "EUR"
+    fixtureFilePricingResponse = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+
+    def setUp(self) -> None:
+        with open(self.fixtureFilePricingResponse) as fin:
+            self.items: list = json.load(fin)[PricingAPIConstants.KEY_ITEMS]
+        self.meterIds: list = list(dict.fromkeys(item[PricingAPIConstants.KEY_METER_ID] for item in self.items))
+        self.deltaItems: list = list()
+        self.urls: list = list()
+
+    def serveItems(self, url: str, scheduler: RequestScheduler = None) -> list:
+        # the delta query returns deltaItems, meter queries return the current items of their meters
+        self.urls.append(url)
+        if PricingAPIConstants.KEY_EFFECTIVE_START_DATE in url:
+            return list(self.deltaItems)
+        return [item for item in self.items if f"'{item[PricingAPIConstants.KEY_METER_ID]}'" in url]
+
+    def test_001_full_then_delta_refresh(self) -> None:
+        calendar = FakeCalendar()
+        cache = MemoryPriceCache(ttlSeconds=None)
+        refresher = IncrementalPriceRefresher(cache, clock=calendar)
+        with patch.object(PricingAPIClient, "_iterItems", side_effect=self.serveItems):
+            report = refresher.refresh(self.regionName, self.meterIds, self.currencyCode)
+            self.assertTrue(report.full)
+            self.assertEqual(report.addedMeterIds, self.meterIds)
+            self.assertEqual(cache.getSyncPoint(self.regionName, self.currencyCode), "2023-05-01")
+
+            # nothing published since, only the delta query is made
+            calendar.now = datetime(2023, 5, 2, 1, 0, tzinfo=timezone.utc)
+            self.urls.clear()
+            report = refresher.refresh(self.regionName, self.meterIds, self.currencyCode)
+            self.assertEqual(len(self.urls), 1)
+            self.assertIn("effectiveStartDate ge '2023-05-01'", self.urls[0])
+            self.assertEqual((report.fetchedMeterIds, report.changedMeterIds), ([], []))
+            self.assertEqual([record.meterId for record in report.records], self.meterIds)
+
+            # a new 1 year reservation price for the second meter
+            changedMeterId: str = self.meterIds[1]
+            item: dict = next(item for item in self.items if item[PricingAPIConstants.KEY_METER_ID] == changedMeterId and item.get(PricingAPIConstants.KEY_RESERVATION_TERM) == "1 Year")
+            item[PricingAPIConstants.KEY_UNIT_PRICE] = 1200.0
+            self.deltaItems = [item]
+            previous = cache.get(self.regionName, self.currencyCode, changedMeterId)
+            self.urls.clear()
+            report = refresher.refresh(self.regionName, self.meterIds, self.currencyCode)
+        self.assertEqual(report.deltaItemCount, 1)
+        self.assertEqual(report.fetchedMeterIds, [changedMeterId])
+        self.assertEqual(report.changedMeterIds, [changedMeterId])
+        self.assertEqual(len(self.urls), 2)
+        updated = cache.get(self.regionName, self.currencyCode, changedMeterId)
+        self.assertEqual(updated.ri1y, 100.0)
+        self.assertEqual(updated.ri3y, previous.ri3y)
+        self.assertIs(report.records[1], updated)
+
+    def test_002_sync_point_persists_in_sqlite_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tempDir:
+            path: str = os.path.join(tempDir, "prices.db")
+            cache = SqlitePriceCache(path, ttlSeconds=None)
+            with patch.object(PricingAPIClient, "_iterItems", side_effect=self.serveItems):
+                IncrementalPriceRefresher(cache, clock=FakeCalendar()).refresh(self.regionName, self.meterIds, self.currencyCode)
+            cache.close()
+            cache = SqlitePriceCache(path, ttlSeconds=None)
+            self.assertEqual(cache.getSyncPoint(self.regionName, self.currencyCode), "2023-05-01")
+            self.assertIsNone(cache.getSyncPoint(self.regionName, "USD"))
+            cache.close()
+
+    def test_003_delta_reprices_cached_meters_outside_the_request(self) -> None:
+        calendar = FakeCalendar()
+        cache = MemoryPriceCache(ttlSeconds=None)
+        refresher = IncrementalPriceRefresher(cache, clock=calendar)
+        meterA, meterB = self.meterIds[1], self.meterIds[0]
+        with patch.object(PricingAPIClient, "_iterItems", side_effect=self.serveItems):
+            refresher.refresh(self.regionName, [meterA, meterB], self.currencyCode)
+            item: dict = next(item for item in self.items if item[PricingAPIConstants.KEY_METER_ID] == meterA and item.get(PricingAPIConstants.KEY_RESERVATION_TERM) == "1 Year")
+            item[PricingAPIConstants.KEY_UNIT_PRICE] = 1200.0
+            self.deltaItems = [item]
+            # only B is requested, A is named by the delta and re-priced all the same
+            calendar.now = datetime(2023, 5, 3, 1, 0, tzinfo=timezone.utc)
+            report = refresher.refresh(self.regionName, [meterB], self.currencyCode)
+            self.assertEqual(report.changedMeterIds, [meterA])
+            self.assertEqual([record.meterId for record in report.records], [meterB])
+            self.assertEqual(cache.getSyncPoint(self.regionName, self.currencyCode), "2023-05-03")
+            self.deltaItems = list()
+            calendar.now = datetime(2023, 5, 5, 1, 0, tzinfo=timezone.utc)
+            report = refresher.refresh(self.regionName, [meterA], self.currencyCode)
+            self.assertEqual(report.records[0].ri1y, 100.0)
+
+            # a re-priced meter coming back without prices keeps the sync point
+            self.deltaItems = [item]
+            self.items = [other for other in self.items if other[PricingAPIConstants.KEY_METER_ID] != meterA]
+            calendar.now = datetime(2023, 5, 7, 1, 0, tzinfo=timezone.utc)
+            with self.assertLogs(IncrementalPriceRefresher.logger, level="WARNING"):
+                report = refresher.refresh(self.regionName, [meterB], self.currencyCode)
+        self.assertEqual(report.syncPoint, "2023-05-05")
+        self.assertEqual(cache.getSyncPoint(self.regionName, self.currencyCode), "2023-05-05")
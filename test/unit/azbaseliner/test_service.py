@@ -0,0 +1,108 @@
+import errno
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from azbaseliner.pricing.cache import MemoryPriceCache
+from azbaseliner.pricing.pricer import MonthlyPlanPricing, PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.service import PriceServiceClient, PriceServiceError, PriceServiceServer, PricingService
+
+
+class TestPricingService(unittest.TestCase):
+    regionName: str = "westeurope"
+    currencyCode: str = "EUR"
+    fixtureFilePricingResponse = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+
+    def test_001_in_flight_meters_are_fetched_once(self) -> None:
+        started: threading.Event = threading.Event()
+        release: threading.Event = threading.Event()
+        fetched: list = list()
+
+        def slowFetch(regionName: str, meterIds: list, currencyCode: str, maxConcurrency: int) -> list:
+            fetched.append(list(meterIds))
+            started.set()
+            release.wait(5)
+            return [MonthlyPlanPricing(meterId, regionName, currencyCode, paygo=1.0) for meterId in meterIds if meterId != "unknown"]
+
+        service = PricingService(MemoryPriceCache())
+        results: dict = dict()
+        with patch.object(PricingAPIClient, "_fetchPricingRecords", side_effect=slowFetch):
+            first = threading.Thread(target=lambda: results.setdefault("first", service.getOfferMonthlyPriceForMeterIdList(self.regionName, ["A", "B"], self.currencyCode)))
+            first.start()
+            started.wait(5)
+            # B is being fetched for the first caller, only C and the unknown meter are fetched for the second one
+            second = threading.Thread(target=lambda: results.setdefault("second", service.getOfferMonthlyPriceForMeterIdList(self.regionName, ["B", "C", "unknown"], self.currencyCode)))
+            second.start()
+            deadline: float = time.monotonic() + 5
+            while service.stats.upstreamFetches < 2 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            release.set()
+            first.join(5)
+            second.join(5)
+            self.assertEqual([record.meterId for record in service.getOfferMonthlyPriceForMeterIdList(self.regionName, ["C", "A"], self.currencyCode)], ["C", "A"])
+        self.assertEqual(fetched, [["A", "B"], ["C", "unknown"]])
+        self.assertEqual([record.meterId for record in results["first"]], ["A", "B"])
+        self.assertEqual([record.meterId for record in results["second"]], ["B", "C"])
+        self.assertEqual((service.stats.requests, service.stats.coalescedMeters, service.stats.fetchedMeters, service.stats.cachedMeters), (3, 1, 4, 2))
+        self.assertEqual(len(service._inFlight), 0)
+
+    def test_002_clients_share_the_service_over_a_unix_socket(self) -> None:
+        with open(self.fixtureFilePricingResponse) as fin:
+            items: list = json.load(fin)[PricingAPIConstants.KEY_ITEMS]
+        meterIds: list = list(dict.fromkeys(item[PricingAPIConstants.KEY_METER_ID] for item in items))
+        with patch.object(PricingAPIClient, "_iterItems", return_value=items), patch.object(PricingAPIClient, "cache", None):
+            expected: list = PricingAPIClient.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)
+        with tempfile.TemporaryDirectory() as tempDir:
+            server = PriceServiceServer(PricingService(MemoryPriceCache()), os.path.join(tempDir, "pricing.sock")).start()
+            try:
+                with patch.object(PricingAPIClient, "_iterItems", return_value=items) as mockedMethod:
+                    with PriceServiceClient(server.socketPath) as first, PriceServiceClient(server.socketPath) as second:
+                        self.assertEqual(repr(first.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)), repr(expected))
+                        self.assertEqual(repr(second.getOfferMonthlyPriceForMeterIdList(self.regionName, meterIds, self.currencyCode)), repr(expected))
+                        self.assertEqual(mockedMethod.call_count, 1)
+                        self.assertEqual(second.stats().cachedMeters, len(meterIds))
+                        with self.assertLogs(PricingService.logger, level="WARNING"), self.assertRaises(PriceServiceError):
+                            first._call({"op": "unknown"})
+                        # the connection stays usable after an error
+                        first.ping()
+            finally:
+                server.stop()
+            self.assertFalse(os.path.exists(server.socketPath))
+
+    def test_003_server_only_replaces_stale_sockets(self) -> None:
+        with tempfile.TemporaryDirectory() as tempDir:
+            socketPath: str = os.path.join(tempDir, "private", "pricing.sock")
+            server = PriceServiceServer(PricingService(MemoryPriceCache()), socketPath).start()
+            try:
+                self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(socketPath)).st_mode), 0o700)
+                self.assertEqual(stat.S_IMODE(os.stat(socketPath).st_mode), 0o600)
+                # a live service is left alone
+                with self.assertRaises(OSError) as raised:
+                    PriceServiceServer(PricingService(MemoryPriceCache()), socketPath)
+                self.assertEqual(raised.exception.errno, errno.EADDRINUSE)
+                with PriceServiceClient(socketPath) as client:
+                    client.ping()
+            finally:
+                server.stop()
+            # a socket nobody listens on is replaced
+            stale: socket.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(socketPath)
+            stale.close()
+            server = PriceServiceServer(PricingService(MemoryPriceCache()), socketPath).start()
+            try:
+                with PriceServiceClient(socketPath) as client:
+                    client.ping()
+            finally:
+                server.stop()
+            # anything else is never removed
+            with open(socketPath, "w") as fout:
+                fout.write("data")
+            with self.assertRaises(FileExistsError):
+                PriceServiceServer(PricingService(MemoryPriceCache()), socketPath)
+            self.assertTrue(os.path.isfile(socketPath))
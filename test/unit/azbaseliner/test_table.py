@@ -0,0 +1,59 @@
+import math
+import unittest
+
+import numpy as np
+
+from azbaseliner.pricing.pricer import MonthlyPlanPricing
+from azbaseliner.pricing.table import PricingTable
+from azbaseliner.pricing.vectorized import BatchPricingEngine
+
+
+class TestPricingTable(unittest.TestCase):
+    def buildRecords(self, count: int) -> list:
+        return [MonthlyPlanPricing(f"meter-{i}", "westeurope" if i % 2 else "northeurope", "EUR", ri3y=float(i), paygo=i * 2.0) for i in range(count)]
+
+    def assertSameRecord(self, expected: MonthlyPlanPricing, found: MonthlyPlanPricing) -> None:
+        # repr based as NaN fields never compare equal
+        self.assertEqual(repr(expected), repr(found))
+
+    def test_001_round_trip_records(self) -> None:
+        records: list = self.buildRecords(3000)
+        table: PricingTable = PricingTable.fromRecords(records)
+        self.assertEqual(len(table), 3000)
+        self.assertSameRecord(records[0], table[0])
+        self.assertSameRecord(records[-1], table[-1])
+        self.assertSameRecord(records[1234], list(table)[1234])
+        self.assertTrue(math.isnan(table[5].sp1y))
+        with self.assertRaises(IndexError):
+            table[3000]
+
+    def test_002_lookup_and_replace(self) -> None:
+        table: PricingTable = PricingTable(capacity=2)
+        table.extend(self.buildRecords(10))
+        self.assertEqual(table.get("meter-3", "westeurope", "EUR").ri3y, 3.0)
+        self.assertIsNone(table.get("meter-3", "northeurope", "EUR"))
+        self.assertIsNone(table.get("meter-3", "westeurope", "USD"))
+        table.append(MonthlyPlanPricing("meter-3", "westeurope", "EUR", ri3y=42.0))
+        self.assertEqual(len(table), 10)
+        self.assertEqual(table.get("meter-3", "westeurope", "EUR").ri3y, 42.0)
+
+    def test_003_dataframe_export_shares_price_memory(self) -> None:
+        table: PricingTable = PricingTable.fromRecords(self.buildRecords(100))
+        frame = table.toDataFrame()
+        self.assertEqual(list(frame.columns), ["meterId", "regionName", "currency"] + PricingTable.PRICE_COLUMNS)
+        self.assertTrue(np.shares_memory(frame["ri3y"].to_numpy(), table.prices))
+        self.assertEqual(frame["regionName"].iloc[1], "westeurope")
+        self.assertEqual(frame["paygo"].iloc[10], 20.0)
+
+    def test_004_from_pricing_frame(self) -> None:
+        items: list = [{"meterId": "A", "serviceFamily": "Compute", "type": "Consumption", "retailPrice": 1.0, "unitPrice": 1.0}]
+        table: PricingTable = PricingTable.fromFrame("westeurope", "EUR", BatchPricingEngine.computeFrame(items))
+        self.assertEqual(table.get("A", "westeurope", "EUR").paygo, 730.0)
+
+    def test_005_from_empty_pricing_frame(self) -> None:
+        table: PricingTable = PricingTable.fromFrame("westeurope", "EUR", BatchPricingEngine.computeFrame([]))
+        self.assertEqual(len(table), 0)
+        self.assertEqual(list(table._index.keys()), [(0, 0)])
+        table.append(MonthlyPlanPricing("A", "westeurope", "EUR", paygo=1.0))
+        self.assertEqual(table.get("A", "westeurope", "EUR").paygo, 1.0)
+        self.assertEqual(len(table), 1)
@@ -0,0 +1,142 @@
+import json
+import random
+import unittest
+import unittest.mock
+from unittest.mock import patch
+
+import requests
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants, PricingRequestError
+from azbaseliner.pricing.throttling import RequestScheduler, RetryExhaustedError, TokenBucket
+
+
+class FakeClock(object):
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_001_bucket_limits_rate(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(ratePerSecond=10, capacity=2, clock=clock, sleep=clock.sleep)
+        for _ in range(12):
+            bucket.acquire()
+        # 2 tokens of burst then 10 per second
+        self.assertAlmostEqual(clock.now, 1.0)
+
+    def test_002_try_acquire_returns_wait_time(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(ratePerSecond=4, capacity=1, clock=clock, sleep=clock.sleep)
+        self.assertEqual(bucket.tryAcquire(), 0.0)
+        self.assertAlmostEqual(bucket.tryAcquire(), 0.25)
+
+
+class FakeResponse(object):
+    def __init__(self, statusCode: int, headers: dict = None) -> None:
+        self.status_code: int = statusCode
+        self.headers: dict = headers if headers is not None else dict()
+
+
+class TestRequestScheduler(unittest.TestCase):
+    def buildScheduler(self, clock: FakeClock, **settings) -> RequestScheduler:
+        return RequestScheduler(clock=clock, sleep=clock.sleep, rnd=random.Random(1), **settings)
+
+    def test_001_retries_throttled_and_server_errors(self) -> None:
+        clock = FakeClock()
+        scheduler: RequestScheduler = self.buildScheduler(clock)
+        responses: list = [FakeResponse(429, {"Retry-After": "7"}), FakeResponse(503), requests.Timeout("slow"), FakeResponse(200)]
+
+        def call(timeout: float):
+            self.assertEqual(timeout, scheduler.timeout)
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with self.assertLogs(RequestScheduler.logger, level="WARNING"):
+            self.assertEqual(scheduler.execute(call).status_code, 200)
+        self.assertEqual(scheduler.stats.requests, 4)
+        self.assertEqual(scheduler.stats.retries, 3)
+        self.assertEqual(scheduler.stats.throttledResponses, 1)
+        self.assertEqual(scheduler.stats.serverErrors, 1)
+        self.assertEqual(scheduler.stats.transportErrors, 1)
+        self.assertEqual(scheduler.stats.throttledSeconds, 7.0)
+        self.assertAlmostEqual(clock.now, 7.0 + scheduler.stats.backoffSeconds)
+
+    def test_002_non_retryable_status_is_returned(self) -> None:
+        scheduler: RequestScheduler = self.buildScheduler(FakeClock())
+        self.assertEqual(scheduler.execute(lambda timeout: FakeResponse(404)).status_code, 404)
+        self.assertEqual(scheduler.stats.retries, 0)
+
+    def test_003_retries_are_bounded(self) -> None:
+        clock = FakeClock()
+        scheduler: RequestScheduler = self.buildScheduler(clock, maxRetries=3, baseDelay=1, maxDelay=4)
+        with self.assertLogs(RequestScheduler.logger, level="WARNING"), self.assertRaises(RetryExhaustedError) as raised:
+            scheduler.execute(lambda timeout: FakeResponse(500), "page")
+        self.assertEqual(raised.exception.attempts, 4)
+        # full jitter never exceeds the capped exponential delays 1 + 2 + 4
+        self.assertLessEqual(clock.now, 7.0)
+
+    def test_004_page_retry_resumes_pagination(self) -> None:
+        clock = FakeClock()
+        pages: dict = {
+            "page-0": [FakeResponse(200)],
+            "page-1": [FakeResponse(429, {"Retry-After": "1"}), FakeResponse(200)],
+        }
+        payloads: dict = {
+            "page-0": {PricingAPIConstants.KEY_ITEMS: [1, 2], PricingAPIConstants.KEY_NEXT_PAGE_LINK: "page-1"},
+            "page-1": {PricingAPIConstants.KEY_ITEMS: [3], PricingAPIConstants.KEY_NEXT_PAGE_LINK: None},
+        }
+        fetched: list = list()
+
+        def get(url: str, timeout: float):
+            fetched.append(url)
+            response = pages[url].pop(0)
+            response.ok = response.status_code == 200
+            response.content = json.dumps(payloads[url]).encode("utf-8")
+            return response
+
+        session = unittest.mock.Mock()
+        session.get.side_effect = get
+        with patch.object(PricingAPIClient, "scheduler", self.buildScheduler(clock)), patch.object(PricingAPIClient, "session", session):
+            with self.assertLogs(RequestScheduler.logger, level="WARNING"):
+                self.assertEqual(PricingAPIClient._execCallAndReturnItems("page-0"), [1, 2, 3])
+        self.assertEqual(fetched, ["page-0", "page-1", "page-1"])
+
+    def test_005_retry_after_is_not_cut_by_max_delay(self) -> None:
+        clock = FakeClock()
+        scheduler: RequestScheduler = self.buildScheduler(clock, maxDelay=4, maxRetryAfter=60)
+        responses: list = [FakeResponse(429, {"Retry-After": "45"}), FakeResponse(200)]
+        with self.assertLogs(RequestScheduler.logger, level="WARNING"):
+            self.assertEqual(scheduler.execute(lambda timeout: responses.pop(0)).status_code, 200)
+        # the server delay is waited in full, it is not capped at maxDelay
+        self.assertEqual(clock.now, 45.0)
+        self.assertEqual(scheduler.stats.throttledSeconds, 45.0)
+        # a delay over maxRetryAfter fails instead of retrying before the server allows it
+        with self.assertRaises(RetryExhaustedError) as raised:
+            scheduler.execute(lambda timeout: FakeResponse(429, {"Retry-After": "120"}), "page")
+        self.assertEqual(raised.exception.attempts, 1)
+        self.assertEqual(clock.now, 45.0)
+
+    def test_006_failed_page_raises_instead_of_ending_pagination(self) -> None:
+        payload: dict = {PricingAPIConstants.KEY_ITEMS: [1, 2], PricingAPIConstants.KEY_NEXT_PAGE_LINK: "page-1"}
+        responses: dict = {"page-0": FakeResponse(200), "page-1": FakeResponse(403)}
+
+        def get(url: str, timeout: float):
+            response = responses[url]
+            response.ok = response.status_code == 200
+            response.content = json.dumps(payload).encode("utf-8")
+            return response
+
+        session = unittest.mock.Mock()
+        session.get.side_effect = get
+        with patch.object(PricingAPIClient, "scheduler", self.buildScheduler(FakeClock())), patch.object(PricingAPIClient, "session", session):
+            with self.assertRaises(PricingRequestError) as raised:
+                PricingAPIClient._execCallAndReturnItems("page-0")
+        self.assertEqual((raised.exception.url, raised.exception.statusCode), ("page-1", 403))
@@ -16,6 +16,13 @@ class TestListUtils(unittest.TestCase):
         itemLists = ListUtils.splitIntoChunks(items, maxSize)
         self.assertEqual(len(itemLists), 4)
 
+    def test_003_lazy_chunks_match_split(self) -> None:
+        items: list = list(range(7))
+        chunks = ListUtils.iterChunks(iter(items), 2)
+        self.assertEqual(next(chunks), [0, 1])
+        self.assertEqual([[0, 1]] + list(chunks), ListUtils.splitIntoChunks(items, 2))
+        self.assertEqual(list(ListUtils.iterChunks([], 2)), [])
+
 
 class TestDictUtils(unittest.TestCase):
     def test_001_simple_dict_merge(self) -> None:
@@ -46,3 +53,21 @@ class TestDictUtils(unittest.TestCase):
         self.assertTrue(42 in c["b"]["y"])
         self.assertTrue(17 in c["b"]["y"])
         self.assertEqual(len(c.keys()), 2)
+
+    def test_004_in_place_and_k_way_merge_match_merge_dicts(self) -> None:
+        dicts: list = [
+            {"a": {"x": [10], "y": 1}, "b": [1], "c": 1},
+            {"a": {"x": [11], "y": 2}, "b": [2], "d": {"z": [1]}},
+            {"a": {"x": [12]}, "b": 3, "c": [2], "d": {"z": [2]}},
+        ]
+        expected: dict = dict()
+        for other in dicts:
+            expected = DictUtils.mergeDicts(expected, other)
+        self.assertEqual(DictUtils.mergeMany(iter(dicts)), expected)
+        accumulator: dict = {"a": {"x": [9]}}
+        self.assertIs(DictUtils.mergeInto(accumulator, dicts[0]), accumulator)
+        self.assertEqual(accumulator["a"]["x"], [9, 10])
+        # the merged inputs are left untouched
+        DictUtils.mergeMany(dicts)
+        self.assertEqual(dicts[0], {"a": {"x": [10], "y": 1}, "b": [1], "c": 1})
+        self.assertEqual(dicts[1]["d"], {"z": [1]})
@@ -0,0 +1,64 @@
+import json
+import math
+import random
+import unittest
+
+from azbaseliner.pricing.pricer import PricingAPIClient, PricingAPIConstants
+from azbaseliner.pricing.vectorized import BatchPricingEngine
+
+
+class TestBatchPricingEngine(unittest.TestCase):
+    regionName: str = "westeurope"
+    currencyCode: str = "EUR"
+    fixtureFilePricingResponse = "test/unit/azbaseliner/fixtures/response.pricing.001.json"
+
+    def scalarRecords(self, items: list) -> list:
+        return PricingAPIClient._getPricingRecords(self.regionName, self.currencyCode, PricingAPIClient._groupRecordsByMeterId(items))
+
+    def assertSameRecords(self, expected: list, found: list) -> None:
+        self.assertEqual([r.meterId for r in expected], [r.meterId for r in found])
+        for e, f in zip(expected, found):
+            for name in BatchPricingEngine.PRICE_COLUMNS:
+                expectedValue, foundValue = getattr(e, name), getattr(f, name)
+                if math.isnan(expectedValue):
+                    self.assertTrue(math.isnan(foundValue), f"{e.meterId}.{name} expected NaN got {foundValue}")
+                else:
+                    self.assertEqual(expectedValue, foundValue, f"{e.meterId}.{name}")
+
+    def randomItems(self, meterCount: int) -> list:
+        rnd = random.Random(42)
+        # prices that sit on a half cent once converted, where np.round and round disagree
+        tricky: list = [2.675 / PricingAPIConstants.HOURS_IN_MONTH, 1.005 * 12, 0.125 * 36, 10.245 / PricingAPIConstants.HOURS_IN_MONTH]
+        items: list = list()
+        for i in range(meterCount):
+            meterId = f"meter-{i}"
+            family = "Compute" if i % 17 else "Storage"
+            for _ in range(rnd.randint(0, 6)):
+                price = rnd.choice(tricky) if rnd.random() < 0.2 else round(rnd.uniform(0.001, 5000), 6)
+                kind = rnd.choice(["Consumption", "Reservation", "DevTestConsumption"])
+                item = {PricingAPIConstants.KEY_METER_ID: meterId, PricingAPIConstants.KEY_SERVICE_FAMILY: family, PricingAPIConstants.KEY_TYPE: kind}
+                item[PricingAPIConstants.KEY_UNIT_PRICE] = price
+                if rnd.random() < 0.9:
+                    item[PricingAPIConstants.KEY_RETAIL_PRICE] = price
+                if kind == "Reservation":
+                    item[PricingAPIConstants.KEY_RESERVATION_TERM] = rnd.choice(["1 Year", "3 Years", "5 Years"])
+                elif rnd.random() < 0.7:
+                    terms = rnd.sample(["1 Year", "3 Years"], rnd.randint(1, 2))
+                    item[PricingAPIConstants.KEY_SAVINGS_PLAN] = [{PricingAPIConstants.KEY_UNIT_PRICE: rnd.choice(tricky + [price]), PricingAPIConstants.KEY_TERM: t} for t in terms]
+                items.append(item)
+        rnd.shuffle(items)
+        return items
+
+    def test_001_fixture_matches_scalar_path(self) -> None:
+        with open(self.fixtureFilePricingResponse) as fin:
+            items: list = json.load(fin)[PricingAPIConstants.KEY_ITEMS]
+        self.assertSameRecords(self.scalarRecords(items), BatchPricingEngine.computeRecords(self.regionName, self.currencyCode, items))
+
+    def test_002_random_items_match_scalar_path(self) -> None:
+        items: list = self.randomItems(3000)
+        with self.assertLogs(BatchPricingEngine.logger, level="WARNING"):
+            records: list = BatchPricingEngine.computeRecords(self.regionName, self.currencyCode, items)
+        self.assertSameRecords(self.scalarRecords(items), records)
+
+    def test_003_empty_items(self) -> None:
+        self.assertEqual(BatchPricingEngine.computeRecords(self.regionName, self.currencyCode, []), [])